@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Поиск по журналу аудита
+
+Примеры:
+    python audit_query.py --user manager --since 2h
+    python audit_query.py --path reports --decision deny
+    python audit_query.py --since "2026-10-01 09:00" --until "2026-10-01 18:00" --json
+
+Время: ISO-дата ("2026-10-01", "2026-10-01 09:00") или интервал назад
+от текущего момента ("30m", "2h", "7d"). Путь задается относительно
+workspace и совпадает как префикс по границам папок.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from storage.config_manager import ConfigManager
+from utils.audit import query
+
+RELATIVE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_time(value: str) -> float:
+    """Unix-время из ISO-даты или интервала назад ("2h")"""
+    value = value.strip()
+    unit = RELATIVE_UNITS.get(value[-1:].lower())
+    if unit is not None and value[:-1].replace('.', '', 1).isdigit():
+        return time.time() - float(value[:-1]) * unit
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"некорректное время: {value}")
+
+
+def format_record(record: dict) -> str:
+    timestamp = datetime.fromtimestamp(record.get('t', 0)).strftime("%Y-%m-%d %H:%M:%S")
+    latency = f"{record['ms']:.2f}" if 'ms' in record else "-"
+    return (f"{timestamp}  {record.get('u') or '-':<12} {record.get('r') or '-':<10} "
+            f"{record.get('op', ''):<7} {record.get('d', ''):<6} {latency:>9}  {record.get('p', '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск по журналу аудита")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--dir", help="каталог журнала (по умолчанию из config.yaml)")
+    parser.add_argument("--user", help="пользователь")
+    parser.add_argument("--since", type=parse_time, help="начало интервала")
+    parser.add_argument("--until", type=parse_time, help="конец интервала")
+    parser.add_argument("--path", help="файл или папка относительно workspace")
+    parser.add_argument("--op", help="операция: LOGIN, READ, WRITE, DELETE, LIST")
+    parser.add_argument("--decision", choices=["allow", "deny", "error"])
+    parser.add_argument("--limit", type=int, default=100, help="максимум записей (0 - без ограничения)")
+    parser.add_argument("--json", action="store_true", help="вывод записей JSON по строкам")
+    args = parser.parse_args()
+
+    directory = args.dir or ConfigManager(args.config).get_audit_config()['directory']
+    records = query(directory, args.user, args.since, args.until, args.path, args.op, args.decision)
+    if args.limit > 0:
+        records = islice(records, args.limit)
+
+    count = 0
+    try:
+        if not args.json:
+            print(f"{'время':<19}  {'пользователь':<12} {'роль':<10} {'опер.':<7} {'решен.':<6} {'мс':>9}  путь")
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False) if args.json else format_record(record))
+            count += 1
+    except BrokenPipeError:
+        sys.exit(0)
+
+    if not args.json:
+        print(f"\nНайдено записей: {count}" + (" (достигнут --limit)" if count == args.limit else ""))
+
+
+if __name__ == "__main__":
+    main()
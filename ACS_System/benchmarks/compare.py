@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Сравнение результатов benchmarks/run.py двух коммитов
+
+    python benchmarks/compare.py results/base.json results/HEAD.json --metric p95_ms --threshold 10
+
+Код возврата 1, если хотя бы один замер стал медленнее больше чем на
+threshold процентов (для ops_per_sec - если упала пропускная способность).
+"""
+
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = {'ops_per_sec'}
+
+
+def load(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: dict, new: dict, metric: str, threshold: float) -> list:
+    """Строки сравнения: (замер, было, стало, изменение %, регрессия)"""
+    rows = []
+    for name in sorted(set(base['results']) | set(new['results'])):
+        old_value = base['results'].get(name, {}).get(metric)
+        new_value = new['results'].get(name, {}).get(metric)
+        if old_value is None or new_value is None:
+            rows.append((name, old_value, new_value, None, False))
+            continue
+
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        rows.append((name, old_value, new_value, change, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение результатов замеров")
+    parser.add_argument("base", help="результаты базового коммита")
+    parser.add_argument("new", help="результаты проверяемого коммита")
+    parser.add_argument("--metric", default="p50_ms", help="p50_ms, p95_ms, p99_ms, mean_ms, ops_per_sec")
+    parser.add_argument("--threshold", type=float, default=10.0, help="допустимое ухудшение, %%")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    if base.get('params') != new.get('params'):
+        print("⚠️  Параметры запусков различаются, сравнение может быть некорректным")
+
+    print(f"{base.get('commit')} -> {new.get('commit')}, метрика {args.metric}, порог {args.threshold}%\n")
+    print(f"{'замер':<26} {'было':>12} {'стало':>12} {'изменение':>10}")
+
+    regressions = 0
+    for name, old_value, new_value, change, regression in compare(base, new, args.metric, args.threshold):
+        if change is None:
+            print(f"{name:<26} {str(old_value if old_value is not None else '-'):>12} "
+                  f"{str(new_value if new_value is not None else '-'):>12}")
+            continue
+        mark = "  ❌" if regression else ""
+        print(f"{name:<26} {old_value:>12.4f} {new_value:>12.4f} {change:>+9.1f}%{mark}")
+        regressions += regression
+
+    if regressions:
+        print(f"\n❌ Регрессий: {regressions}")
+        sys.exit(1)
+    print("\n✅ Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
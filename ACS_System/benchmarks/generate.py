@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Генерация синтетических данных для замеров
+
+    python benchmarks/generate.py workspace /tmp/bench/workspace --folders 8 --files 1000 --size lognormal:4k:1.0 --users 500
+    python benchmarks/generate.py users /tmp/bench/users.json --count 100000
+
+Распределение размеров файлов:
+    4k                  - фиксированный размер
+    uniform:100:64k     - равномерно в диапазоне
+    lognormal:4k:1.0    - логнормальное с медианой 4k и sigma 1.0
+
+Пароль синтетических пользователей равен BENCH_PASSWORD. По умолчанию
+у всех один хэш (вычисляется один раз), поэтому файл на миллионы
+пользователей создается за секунды; --unique-hashes хэширует каждого.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.passwords import DEFAULT_SCHEME, hash_password
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+BENCH_PASSWORD = "bench"
+DEFAULT_FOLDERS = ("system", "backups", "logs", "reports", "design", "code", "analytics", "temp", "shared")
+DEFAULT_ROLES = ("sysadmin", "admin", "manager", "designer", "developer", "analyst", "guest")
+SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 * 1024}
+FILE_EXTENSIONS = (".txt", ".csv", ".json", ".md", ".log")
+
+
+def parse_size(value: str) -> int:
+    """Размер с суффиксом: 512, 4k, 2m"""
+    value = value.strip().lower()
+    unit = value[-1] if value and value[-1] in SIZE_UNITS else ''
+    return int(float(value[:len(value) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def size_distribution(spec: str, rng: random.Random) -> Callable[[], int]:
+    """Генератор размеров файлов по описанию распределения"""
+    kind, _, params = spec.partition(":")
+    if not params:
+        size = parse_size(kind)
+        return lambda: size
+
+    args = params.split(":")
+    if kind == "uniform":
+        low, high = parse_size(args[0]), parse_size(args[1])
+        return lambda: rng.randint(low, high)
+    if kind == "lognormal":
+        median, sigma = parse_size(args[0]), float(args[1]) if len(args) > 1 else 1.0
+        mu = math.log(max(median, 1))
+        return lambda: max(0, int(rng.lognormvariate(mu, sigma)))
+    raise ValueError(f"Неизвестное распределение размеров: {spec}")
+
+
+def _content(size: int, rng: random.Random) -> bytes:
+    """Текстовое содержимое заданного размера (строки по 64 байта)"""
+    line = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(63)) + "\n"
+    data = line.encode('ascii') * (size // 64 + 1)
+    return data[:size]
+
+
+def generate_workspace(root: str, folders: Sequence[str] = DEFAULT_FOLDERS, files_per_folder: int = 100,
+                       size: str = "4k", user_dirs: int = 0, files_per_user: int = 1,
+                       seed: int = 42) -> Dict[str, int]:
+    """
+    Синтетический workspace: папки ролей по files_per_folder файлов и
+    user_dirs личных папок user_benchNNNNNN. Возвращает число файлов и байт.
+    """
+    rng = random.Random(seed)
+    next_size = size_distribution(size, rng)
+    # Содержимое режется из одного буфера, чтобы генерация не зависела от CPU
+    buffer = _content(1024 * 1024, rng)
+
+    files = 0
+    total = 0
+
+    def write(folder: Path, count: int):
+        nonlocal files, total
+        folder.mkdir(parents=True, exist_ok=True)
+        for number in range(count):
+            file_size = next_size()
+            data = buffer * (file_size // len(buffer)) + buffer[:file_size % len(buffer)]
+            name = f"file_{number:06d}{FILE_EXTENSIONS[number % len(FILE_EXTENSIONS)]}"
+            with open(folder / name, 'wb') as f:
+                f.write(data)
+            files += 1
+            total += file_size
+
+    root_path = Path(root)
+    for folder in folders:
+        write(root_path / folder, files_per_folder)
+    for number in range(user_dirs):
+        write(root_path / f"user_{bench_username(number)}", files_per_user)
+
+    return {'files': files, 'bytes': total}
+
+
+def folder_names(count: int) -> list:
+    """Имена папок ролей: стандартные, затем folder_NN"""
+    return [DEFAULT_FOLDERS[i] if i < len(DEFAULT_FOLDERS) else f"folder_{i:02d}" for i in range(count)]
+
+
+def bench_username(number: int) -> str:
+    return f"bench{number:06d}"
+
+
+def iter_users(count: int, roles: Sequence[str] = DEFAULT_ROLES, scheme: str = DEFAULT_SCHEME,
+               unique_hashes: bool = False, seed: int = 42) -> Iterator[dict]:
+    """Записи синтетических пользователей со случайными ролями"""
+    rng = random.Random(seed)
+    shared_hash = None if unique_hashes else hash_password(BENCH_PASSWORD, scheme)
+    for number in range(count):
+        yield {
+            'username': bench_username(number),
+            'password_hash': shared_hash or hash_password(BENCH_PASSWORD, scheme),
+            'role': rng.choice(roles),
+        }
+
+
+def generate_users(path: str, count: int, roles: Sequence[str] = DEFAULT_ROLES, scheme: str = DEFAULT_SCHEME,
+                   unique_hashes: bool = False, seed: int = 42) -> int:
+    """Файл users.json на count пользователей (пишется потоком)"""
+    def chunks() -> Iterator[str]:
+        yield "["
+        for number, record in enumerate(iter_users(count, roles, scheme, unique_hashes, seed)):
+            yield "\n  " if number == 0 else ",\n  "
+            yield json.dumps(record)
+        yield "\n]\n"
+
+    atomic_write(path, chunks(), durability=DURABILITY_NONE)
+    return count
+
+
+def write_config(path: str, workspace_root: str, users_file: str, state_dir: str,
+                 folders: Sequence[str] = DEFAULT_FOLDERS, roles: Optional[Dict[str, dict]] = None) -> str:
+    """
+    config.yaml для замеров: все пути абсолютные, журнал аудита и
+    профилирование отключены. По умолчанию всем ролям доступно все.
+    """
+    if roles is None:
+        roles = {role: {'permissions': ["READ", "WRITE", "DELETE", "LIST"], 'folders': list(folders)}
+                 for role in DEFAULT_ROLES}
+
+    config = {
+        'system': {
+            'workspace_root': os.path.abspath(workspace_root),
+            'log_level': "ERROR",
+            'index_file': os.path.join(os.path.abspath(state_dir), "workspace_index.json"),
+            'stats_file': os.path.join(os.path.abspath(state_dir), "workspace_stats.json"),
+            'write_durability': "none",
+            'audit': {'enabled': False},
+            'metrics': {'enabled': True, 'file': None},
+            'profiling': {'enabled': False},
+            'user_storage': {'backend': "json", 'users_file': os.path.abspath(users_file)},
+        },
+        'roles': roles,
+    }
+    # JSON - подмножество YAML: PyYAML для генерации не нужен
+    atomic_write(path, json.dumps(config, indent=2, ensure_ascii=False), durability=DURABILITY_NONE)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных для замеров")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    workspace = commands.add_parser("workspace", help="синтетический workspace")
+    workspace.add_argument("root")
+    workspace.add_argument("--folders", type=int, default=len(DEFAULT_FOLDERS), help="папок ролей")
+    workspace.add_argument("--files", type=int, default=100, help="файлов в папке")
+    workspace.add_argument("--size", default="4k", help="распределение размеров файлов")
+    workspace.add_argument("--users", type=int, default=0, help="личных папок user_*")
+    workspace.add_argument("--user-files", type=int, default=1, help="файлов в личной папке")
+    workspace.add_argument("--seed", type=int, default=42)
+
+    users = commands.add_parser("users", help="синтетический users.json")
+    users.add_argument("path")
+    users.add_argument("--count", type=int, default=1000)
+    users.add_argument("--scheme", default=DEFAULT_SCHEME)
+    users.add_argument("--unique-hashes", action="store_true", help="отдельный хэш для каждого пользователя")
+    users.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.command == "workspace":
+        result = generate_workspace(args.root, folder_names(args.folders), args.files, args.size, args.users, args.user_files, args.seed)
+        print(f"✅ {args.root}: файлов {result['files']}, {result['bytes'] / 1024 / 1024:.1f} МиБ")
+    else:
+        generate_users(args.path, args.count, scheme=args.scheme, unique_hashes=args.unique_hashes, seed=args.seed)
+        print(f"✅ {args.path}: пользователей {args.count} (пароль {BENCH_PASSWORD!r})")
+
+
+if __name__ == "__main__":
+    main()
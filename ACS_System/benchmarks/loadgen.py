@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный генератор: N одновременных виртуальных пользователей
+
+    python benchmarks/loadgen.py --users 50 --duration 60 --workload mixed
+    python benchmarks/loadgen.py --users 20 --workload workload.json --json results/load.json
+    python benchmarks/loadgen.py --replay audit --speed 10
+    python benchmarks/loadgen.py --users 50 --workload-from-audit audit
+
+Виртуальные пользователи - потоки, каждый со своей сессией и
+FileOperations поверх общих AccessController и WorkspaceIndex, как в
+server.py. Пользователи выбираются случайно из users.json, поэтому
+смесь ролей повторяет реальную; сначала каждый входит через
+Authenticator (пароль --password), затем выполняет операции сценария
+с паузами "на обдумывание". При неудачном входе (в том числе повторном)
+виртуальный пользователь останавливается: операции без сессии не
+выполняются.
+
+Сценарий - встроенный (WORKLOADS) или JSON-файл:
+
+    {"mix": {"list": 30, "read": 45, "edit": 10, "create": 10, "delete": 5},
+     "think_time": 0.5, "login_every": 0, "file_size": "4k", "page_size": 50}
+
+mix - относительные доли операций, think_time - средняя пауза между
+операциями (экспоненциальное распределение), login_every - повторный
+вход каждые N операций. Правка и удаление затрагивают только файлы,
+созданные самим виртуальным пользователем в его личной папке.
+
+--replay воспроизводит записи журнала аудита (utils/audit.py): у каждого
+пользователя журнала свой поток, интервалы между операциями сохраняются
+(с ускорением --speed), недостающие файлы создаются перед запуском.
+Воспроизведение пишет и удаляет файлы по путям журнала - запускайте его
+на синтетическом workspace (по умолчанию) или на копии.
+
+Без --config данные генерируются во временной папке (benchmarks/generate.py)
+с ролями из config.yaml проекта.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from benchmarks import generate
+from benchmarks.run import NullLogger, git_commit
+from core.acl import AccessController
+from core.auth import Authenticator
+from core.models import User, UserSession
+from core.passwords import PasswordVerifier
+from storage.config_manager import ConfigManager
+from storage.user_repository import open_user_repository
+from utils import audit
+from utils.file_operations import FileOperations
+from utils.metrics import MetricsRegistry
+from utils.workspace_index import WorkspaceIndex
+
+OPERATIONS = ("login", "list", "read", "edit", "create", "delete")
+
+WORKLOADS = {
+    'browse': {'mix': {'list': 40, 'read': 60}, 'think_time': 0.5},
+    'mixed': {'mix': {'list': 30, 'read': 45, 'edit': 10, 'create': 10, 'delete': 5}, 'think_time': 0.5},
+    'write-heavy': {'mix': {'list': 10, 'read': 20, 'edit': 30, 'create': 30, 'delete': 10}, 'think_time': 0.2},
+    'login-storm': {'mix': {'list': 100}, 'think_time': 0.1, 'login_every': 1},
+}
+LIST_PAGES = 4
+WORKLOAD_DEFAULTS = {'think_time': 0.5, 'login_every': 0, 'file_size': "4k", 'page_size': 50}
+
+# Операции журнала аудита -> операции генератора
+AUDIT_OPERATIONS = {'LOGIN': "login", 'LIST': "list", 'READ': "read", 'WRITE': "edit", 'DELETE': "delete"}
+
+
+def load_workload(spec: str) -> dict:
+    """Сценарий: имя встроенного или путь к JSON-файлу"""
+    if spec in WORKLOADS:
+        workload = dict(WORKLOADS[spec])
+    else:
+        with open(spec, 'r', encoding='utf-8') as f:
+            workload = json.load(f)
+    return normalize_workload(workload)
+
+
+def normalize_workload(workload: dict) -> dict:
+    """Значения по умолчанию и проверка долей операций"""
+    workload = {**WORKLOAD_DEFAULTS, **workload}
+    mix = {op: float(weight) for op, weight in (workload.get('mix') or {}).items() if float(weight) > 0}
+    unknown = [op for op in mix if op not in OPERATIONS]
+    if unknown:
+        raise ValueError(f"Неизвестные операции сценария: {', '.join(unknown)}")
+    if not mix:
+        raise ValueError("В сценарии нет операций (mix)")
+    workload['mix'] = mix
+    return workload
+
+
+def workload_from_audit(records: Iterable[dict]) -> dict:
+    """
+    Сценарий по записанному журналу аудита: доли операций и медианная
+    пауза между операциями одного пользователя.
+    """
+    mix: Counter = Counter()
+    last_seen: Dict[str, float] = {}
+    gaps: List[float] = []
+    for record in records:
+        op = AUDIT_OPERATIONS.get(record.get('op'))
+        if op is None:
+            continue
+        mix[op] += 1
+        user, timestamp = record.get('u'), record.get('t', 0)
+        if user in last_seen and timestamp >= last_seen[user]:
+            gaps.append(timestamp - last_seen[user])
+        last_seen[user] = timestamp
+
+    # Отдельный вход - начало сессии, а не доля операций
+    mix.pop("login", None)
+    think_time = sorted(gaps)[len(gaps) // 2] if gaps else WORKLOAD_DEFAULTS['think_time']
+    return normalize_workload({'mix': dict(mix), 'think_time': round(think_time, 3)})
+
+
+class LoadStats:
+    """Задержки и исходы операций всех виртуальных пользователей"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+
+    def observe(self, op: str, seconds: float, outcome: str):
+        self.registry.observe('loadgen_seconds', seconds, op=op)
+        self.registry.inc('loadgen_operations', op=op, outcome=outcome)
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        """Сводка по операциям: пропускная способность и перцентили (мс)"""
+        outcomes: Dict[str, Counter] = defaultdict(Counter)
+        for _, labels, counter in self.registry.counters():
+            labels = dict(labels)
+            outcomes[labels['op']][labels['outcome']] += counter.value
+
+        results = {}
+        for _, labels, histogram in self.registry.histograms():
+            op = dict(labels)['op']
+            results[op] = {
+                'count': histogram.count,
+                'ops_per_sec': round(histogram.count / elapsed, 1) if elapsed else None,
+                'mean_ms': round(histogram.mean() * 1000, 3),
+                'p50_ms': round(histogram.quantile(0.50) * 1000, 3),
+                'p95_ms': round(histogram.quantile(0.95) * 1000, 3),
+                'p99_ms': round(histogram.quantile(0.99) * 1000, 3),
+                'max_ms': round(histogram.max * 1000, 3),
+                'outcomes': dict(outcomes[op]),
+            }
+        return results
+
+
+class LoadTarget:
+    """Общие компоненты системы, к которым обращаются виртуальные пользователи"""
+
+    def __init__(self, config_manager, password: str, logger):
+        self.config = config_manager
+        self.password = password
+        self.logger = logger
+        self.workspace_root = config_manager.get_workspace_root()
+        self.acl = AccessController(config_manager, logger)
+        self.index = WorkspaceIndex(self.workspace_root, config_manager.get_index_file(), logger).load()
+        self.user_repo = open_user_repository(config_manager, logger)
+
+        password_config = config_manager.get_password_config()
+        self.verifier = PasswordVerifier(password_config['workers'], password_config['max_pending'],
+                                         scheme=password_config['scheme'])
+        self.auth = Authenticator(self.user_repo, logger, self.verifier)
+
+    def sample_users(self, count: int, rng: random.Random) -> List[User]:
+        """Случайные пользователи из хранилища (смесь ролей как в users.json)"""
+        users = list(self.user_repo.iter_users())
+        if not users:
+            raise ValueError("В хранилище нет пользователей")
+        if count <= len(users):
+            return rng.sample(users, count)
+        return [rng.choice(users) for _ in range(count)]
+
+    def file_operations(self, user: User) -> FileOperations:
+        return FileOperations(self.config, self.acl, UserSession(user=user), self.logger, workspace_index=self.index)
+
+    def close(self):
+        self.verifier.close()
+        self.index.close()
+        self.user_repo.close()
+
+
+class VirtualUser:
+    """Виртуальный пользователь: вход и операции сценария в отдельном потоке"""
+
+    def __init__(self, number: int, user: User, target: LoadTarget, workload: dict, stats: LoadStats,
+                 stop: threading.Event, max_ops: Optional[int], seed: int):
+        self.number = number
+        self.user = user
+        self.target = target
+        self.workload = workload
+        self.stats = stats
+        self.stop = stop
+        self.max_ops = max_ops
+        self.rng = random.Random(seed + number)
+        self.content = "x" * generate.parse_size(str(workload['file_size']))
+        self.folder = os.path.join(target.workspace_root, f"user_{user.username}")
+        self.created: List[str] = []
+        self.visible: List[str] = []
+        self.ops: Optional[FileOperations] = None
+        self._counter = 0
+        self._choices = list(workload['mix'])
+        self._weights = [workload['mix'][op] for op in self._choices]
+
+    def run(self):
+        if self.timed("login", self.login) != "ok":
+            return
+        self.timed("list", self.op_list)
+        done = 0
+        while not self.stop.is_set() and (self.max_ops is None or done < self.max_ops):
+            login_every = self.workload['login_every']
+            if login_every and done and done % login_every == 0:
+                if self.timed("login", self.login) != "ok":
+                    break
+
+            op = self.rng.choices(self._choices, self._weights)[0]
+            self.timed(op, getattr(self, f"op_{op}"))
+            done += 1
+
+            think_time = self.workload['think_time']
+            if think_time > 0:
+                self.stop.wait(self.rng.expovariate(1 / think_time))
+        self.cleanup()
+
+    def timed(self, op: str, action) -> str:
+        started = time.perf_counter()
+        try:
+            outcome = action() or "ok"
+        except PermissionError:
+            outcome = "denied"
+        except Exception as e:
+            outcome = "error"
+            self.target.logger.debug("Ошибка операции {} пользователя {}: {}", op, self.user.username, e)
+        self.stats.observe(op, time.perf_counter() - started, outcome)
+        return outcome
+
+    def login(self) -> str:
+        user = self.target.auth.authenticate(self.user.username, self.target.password)
+        if user is None:
+            return "denied"
+        if self.ops is None:
+            self.ops = self.target.file_operations(user)
+        return "ok"
+
+    def op_list(self):
+        # Чаще всего просматриваются первые страницы
+        page_size = self.workload['page_size']
+        page, _ = self.ops.list_files_page(page_size=page_size, offset=page_size * self.rng.randrange(LIST_PAGES))
+        if page:
+            self.visible = [entry['path'] for entry in page] + self.created
+
+    def op_read(self):
+        paths = self.visible or self.created
+        if not paths:
+            return self.op_list()
+        self.ops.read_file(self.rng.choice(paths))
+
+    def op_edit(self):
+        if not self.created:
+            return self.op_create()
+        path = self.rng.choice(self.created)
+        self.ops.read_file(path)
+        self.ops.write_file(path, self.content)
+
+    def op_create(self):
+        self._counter += 1
+        path = os.path.join(self.folder, f"loadgen_{self.number:04d}_{self._counter:06d}.txt")
+        self.ops.write_file(path, self.content)
+        self.created.append(path)
+
+    def op_delete(self):
+        if not self.created:
+            return self.op_create()
+        path = self.created.pop(self.rng.randrange(len(self.created)))
+        self.ops.remove_file(path)
+
+    def cleanup(self):
+        """Удаление созданных файлов без замера"""
+        for path in self.created:
+            try:
+                self.ops.remove_file(path)
+            except (OSError, PermissionError):
+                pass
+        self.created.clear()
+
+
+class ReplayUser:
+    """Воспроизведение записей журнала аудита одного пользователя"""
+
+    def __init__(self, records: List[dict], target: LoadTarget, stats: LoadStats, stop: threading.Event,
+                 started: float, first_timestamp: float, speed: float, content: str):
+        self.records = records
+        self.target = target
+        self.stats = stats
+        self.stop = stop
+        self.started = started
+        self.first_timestamp = first_timestamp
+        self.speed = speed
+        self.content = content
+        first = records[0]
+        self.user = User(username=first.get('u') or "unknown", password_hash="", role=first.get('r') or "")
+        self.ops = target.file_operations(self.user)
+
+    def run(self):
+        for record in self.records:
+            delay = (record['t'] - self.first_timestamp) / self.speed - (time.perf_counter() - self.started)
+            if delay > 0 and self.stop.wait(delay):
+                return
+            if self.stop.is_set():
+                return
+
+            op = AUDIT_OPERATIONS[record['op']]
+            started = time.perf_counter()
+            try:
+                outcome = self.execute(record) or "ok"
+            except PermissionError:
+                outcome = "denied"
+            except Exception as e:
+                outcome = "error"
+                self.target.logger.debug("Ошибка воспроизведения {}: {}", record, e)
+            self.stats.observe(op, time.perf_counter() - started, outcome)
+
+    def execute(self, record: dict):
+        op = record['op']
+        path = os.path.join(self.target.workspace_root, *record['p'].split("/")) if record.get('p') else None
+        if op == "LOGIN":
+            user = self.target.auth.authenticate(self.user.username, self.target.password)
+            return "ok" if user is not None else "denied"
+        if op == "LIST":
+            self.ops.list_files_page()
+        elif op == "READ":
+            self.ops.read_file(path)
+        elif op == "WRITE":
+            self.ops.write_file(path, self.content)
+        elif op == "DELETE":
+            self.ops.remove_file(path)
+
+
+def prepare_replay(records: List[dict], workspace_root: str, content: str) -> int:
+    """Создание файлов, которые журнал читает или удаляет, но которых нет в workspace"""
+    created = 0
+    for path in {record['p'] for record in records if record['op'] in ("READ", "DELETE") and record.get('p')}:
+        filepath = os.path.join(workspace_root, *path.split("/"))
+        if not os.path.exists(filepath):
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(content)
+            created += 1
+    return created
+
+
+def run_threads(workers: list, duration: Optional[float], stop: threading.Event) -> float:
+    """Запуск потоков и ожидание завершения; возвращает длительность, секунд"""
+    threads = [threading.Thread(target=worker.run, name=f"vu-{number}", daemon=True)
+               for number, worker in enumerate(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    deadline = started + duration if duration else None
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                # Ожидание короткими интервалами, чтобы Ctrl+C прерывал запуск
+                remaining = deadline - time.perf_counter() if deadline is not None else 1.0
+                if remaining <= 0:
+                    stop.set()
+                thread.join(min(max(remaining, 0.05), 1.0))
+    except KeyboardInterrupt:
+        print("\n⏹️  Остановка...", file=sys.stderr)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return time.perf_counter() - started
+
+
+def synthetic_config(base_dir: str, args) -> str:
+    """Синтетические workspace, users.json и config.yaml с ролями проекта"""
+    project_config = ConfigManager(str(PROJECT_DIR / "config.yaml"), use_cache=False)
+    roles = {role: {'permissions': list(project_config.get_role_permissions(role)),
+                    'folders': list(project_config.get_role_folders(role))}
+             for role in project_config.get_roles_config()}
+    folders = sorted({folder for role in roles.values() for folder in role['folders']}) or list(generate.DEFAULT_FOLDERS)
+
+    workspace_root = os.path.join(base_dir, "workspace")
+    users_file = os.path.join(base_dir, "users.json")
+    generate.generate_workspace(workspace_root, folders, args.files, args.size, 0, 0, args.seed)
+    generate.generate_users(users_file, args.population, roles=list(roles) or generate.DEFAULT_ROLES,
+                            scheme=args.scheme, seed=args.seed)
+    return generate.write_config(os.path.join(base_dir, "config.yaml"), workspace_root, users_file, base_dir,
+                                 folders, roles or None)
+
+
+def print_report(results: Dict[str, dict], elapsed: float):
+    total = sum(result['count'] for result in results.values())
+    print(f"\nДлительность {elapsed:.1f} с, операций {total} ({total / elapsed:.1f} оп/с)\n")
+    print(f"{'операция':<10} {'кол-во':>8} {'оп/с':>9} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'макс мс':>9}  исходы")
+    for op in sorted(results, key=lambda op: OPERATIONS.index(op) if op in OPERATIONS else len(OPERATIONS)):
+        result = results[op]
+        outcomes = ", ".join(f"{name} {count:g}" for name, count in sorted(result['outcomes'].items()))
+        print(f"{op:<10} {result['count']:>8} {result['ops_per_sec']:>9.1f} {result['p50_ms']:>9.3f} "
+              f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['max_ms']:>9.3f}  {outcomes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный генератор виртуальных пользователей")
+    parser.add_argument("--config", help="config.yaml системы (по умолчанию синтетические данные)")
+    parser.add_argument("--users", type=int, default=10, help="одновременных виртуальных пользователей")
+    parser.add_argument("--workload", default="mixed", help=f"{', '.join(WORKLOADS)} или JSON-файл")
+    parser.add_argument("--workload-from-audit", metavar="DIR", help="сценарий по долям операций журнала аудита")
+    parser.add_argument("--replay", metavar="DIR", help="воспроизвести журнал аудита")
+    parser.add_argument("--since", type=float, help="начало интервала журнала (unix-время)")
+    parser.add_argument("--until", type=float, help="конец интервала журнала (unix-время)")
+    parser.add_argument("--speed", type=float, default=1.0, help="ускорение воспроизведения")
+    parser.add_argument("--duration", type=float, default=30.0, help="длительность, секунд (0 - без ограничения)")
+    parser.add_argument("--ops", type=int, help="операций на виртуального пользователя")
+    parser.add_argument("--think-time", type=float, help="переопределить паузу сценария, секунд")
+    parser.add_argument("--password", default=generate.BENCH_PASSWORD, help="пароль входа виртуальных пользователей")
+    parser.add_argument("--population", type=int, default=1000, help="синтетических пользователей в users.json")
+    parser.add_argument("--files", type=int, default=200, help="синтетических файлов в папке")
+    parser.add_argument("--size", default="lognormal:4k:1.0", help="распределение размеров синтетических файлов")
+    parser.add_argument("--scheme", default="scrypt", help="схема хэшей синтетических пользователей")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    base_dir = None
+    if args.config:
+        config_file = args.config
+    else:
+        base_dir = tempfile.mkdtemp(prefix="acs-load-")
+        print(f"📦 Генерация данных в {base_dir}...", file=sys.stderr)
+        config_file = synthetic_config(base_dir, args)
+
+    logger = NullLogger()
+    target = LoadTarget(ConfigManager(config_file, use_cache=False), args.password, logger)
+    stats = LoadStats()
+    stop = threading.Event()
+
+    try:
+        if args.replay:
+            records = [record for record in audit.query(args.replay, since=args.since, until=args.until)
+                       if record.get('op') in AUDIT_OPERATIONS]
+            if not records:
+                print("❌ В журнале нет записей для воспроизведения")
+                sys.exit(1)
+
+            content = "x" * generate.parse_size(WORKLOAD_DEFAULTS['file_size'])
+            created = prepare_replay(records, target.workspace_root, content)
+            target.index.refresh()
+
+            by_user: Dict[str, List[dict]] = defaultdict(list)
+            for record in records:
+                by_user[record.get('u') or ""].append(record)
+            first_timestamp = min(record['t'] for record in records)
+            print(f"▶️  Воспроизведение {len(records)} записей, пользователей {len(by_user)}, "
+                  f"создано файлов {created}, ускорение {args.speed}", file=sys.stderr)
+
+            started = time.perf_counter()
+            workers = [ReplayUser(sorted(user_records, key=lambda r: r['t']), target, stats, stop,
+                                  started, first_timestamp, args.speed, content)
+                       for user_records in by_user.values()]
+            workload = {'replay': os.path.abspath(args.replay), 'records': len(records), 'speed': args.speed}
+            roles = Counter(worker.user.role for worker in workers)
+            elapsed = run_threads(workers, args.duration or None, stop)
+        else:
+            if args.workload_from_audit:
+                workload = workload_from_audit(audit.query(args.workload_from_audit,
+                                                           since=args.since, until=args.until))
+            else:
+                workload = load_workload(args.workload)
+            if args.think_time is not None:
+                workload['think_time'] = args.think_time
+
+            rng = random.Random(args.seed)
+            users = target.sample_users(args.users, rng)
+            roles = Counter(user.role for user in users)
+            print(f"▶️  Виртуальных пользователей {len(users)} "
+                  f"({', '.join(f'{role} {count}' for role, count in roles.most_common())}), "
+                  f"сценарий {json.dumps(workload, ensure_ascii=False)}", file=sys.stderr)
+
+            workers = [VirtualUser(number, user, target, workload, stats, stop, args.ops, args.seed)
+                       for number, user in enumerate(users)]
+            elapsed = run_threads(workers, args.duration or None, stop)
+    finally:
+        target.close()
+        if base_dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    results = stats.report(elapsed)
+    print_report(results, elapsed)
+
+    if args.json:
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'cpu_count': os.cpu_count(),
+            'users': len(workers),
+            'roles': dict(roles),
+            'workload': workload,
+            'duration': round(elapsed, 2),
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Результаты сохранены: {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Набор замеров горячих путей
+
+    python benchmarks/run.py --json results/HEAD.json
+    python benchmarks/run.py --only acl,read,write --files 2000 --iterations 1000
+    python benchmarks/compare.py results/base.json results/HEAD.json
+
+Для каждого запуска во временной папке создаются синтетический
+workspace (папки ролей × файлы заданного распределения размеров, личные
+папки user_*) и users.json, затем замеряются:
+
+    acl        - AccessController.check_permission (разрешения и отказы)
+    auth       - загрузка пользователей, поиск и Authenticator.authenticate
+    list       - построение индекса и страницы FileOperations.list_files_page
+    read       - FileOperations.read_file случайных файлов
+    write      - FileOperations.write_file новых файлов
+    delete     - FileOperations.remove_file
+    provision  - WorkspaceProvisioner: первая подготовка и повторная без изменений
+    startup    - время до приглашения main.py (benchmarks/startup.py)
+
+Результаты - JSON с параметрами запуска, коммитом и перцентилями задержек
+по каждому замеру; файлы разных коммитов сравнивает compare.py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from benchmarks import generate
+from core.acl import AccessController
+from core.auth import Authenticator
+from core.models import User, UserSession
+from core.passwords import PasswordVerifier
+from storage.config_manager import ConfigManager
+from storage.user_repository import UserRepository
+from utils.file_operations import FileOperations
+from utils.provisioning import WorkspaceProvisioner
+from utils.workspace_index import WorkspaceIndex
+
+RESULTS_VERSION = 1
+BENCHMARKS = ("acl", "auth", "list", "read", "write", "delete", "provision", "startup")
+
+
+class NullLogger:
+    """Логгер без вывода: замеряется код, а не обработчики loguru"""
+
+    def __getattr__(self, name):
+        return self._discard
+
+    def _discard(self, *args, **kwargs):
+        pass
+
+
+def summarize(samples: List[float], batch: int = 1) -> dict:
+    """Сводка задержек (samples - секунды на пачку из batch операций)"""
+    per_op = sorted(sample / batch for sample in samples)
+    count = len(per_op) * batch
+    total = sum(samples)
+
+    def percentile(q: float) -> float:
+        return per_op[min(len(per_op) - 1, int(q * len(per_op)))] * 1000
+
+    return {
+        'count': count,
+        'ops_per_sec': round(count / total, 1) if total else None,
+        'mean_ms': round(statistics.fmean(per_op) * 1000, 4),
+        'min_ms': round(per_op[0] * 1000, 4),
+        'p50_ms': round(percentile(0.50), 4),
+        'p95_ms': round(percentile(0.95), 4),
+        'p99_ms': round(percentile(0.99), 4),
+        'max_ms': round(per_op[-1] * 1000, 4),
+    }
+
+
+def measure(operation: Callable[[int], object], iterations: int, batch: int = 1, warmup: int = 0) -> dict:
+    """
+    Замер операции: operation(номер) вызывается iterations раз. Быстрые
+    операции замеряются пачками по batch вызовов, чтобы время таймера
+    не исказило результат.
+    """
+    for number in range(warmup):
+        operation(number)
+
+    samples = []
+    for start in range(0, iterations, batch):
+        size = min(batch, iterations - start)
+        started = time.perf_counter()
+        for number in range(start, start + size):
+            operation(number)
+        samples.append((time.perf_counter() - started) / size * batch)
+    return summarize(samples, batch)
+
+
+def once(operation: Callable[[], object]) -> dict:
+    """Замер однократной операции"""
+    started = time.perf_counter()
+    operation()
+    return summarize([time.perf_counter() - started])
+
+
+class Environment:
+    """Синтетические данные одного запуска во временной папке"""
+
+    def __init__(self, base_dir: str, args):
+        self.base_dir = Path(base_dir)
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.folders = generate.folder_names(args.folders)
+        self.workspace_root = str(self.base_dir / "workspace")
+        self.users_file = str(self.base_dir / "users.json")
+        self.config_file = str(self.base_dir / "config.yaml")
+        self.logger = NullLogger()
+
+        started = time.perf_counter()
+        self.workspace = generate.generate_workspace(self.workspace_root, self.folders, args.files, args.size,
+                                                     args.user_dirs, 1, args.seed)
+        generate.generate_users(self.users_file, args.users, scheme=args.scheme, seed=args.seed)
+        generate.write_config(self.config_file, self.workspace_root, self.users_file, str(self.base_dir),
+                              self.folders)
+        self.generate_seconds = round(time.perf_counter() - started, 2)
+
+        self.config = ConfigManager(self.config_file, use_cache=False)
+        self._index: Optional[WorkspaceIndex] = None
+        self._files: Optional[List[str]] = None
+
+    def index(self) -> WorkspaceIndex:
+        if self._index is None:
+            self._index = WorkspaceIndex(self.workspace_root, self.config.get_index_file(), self.logger).load()
+        return self._index
+
+    def file_operations(self, role: str = "sysadmin") -> FileOperations:
+        session = UserSession(user=User(username=generate.bench_username(0), password_hash="", role=role))
+        acl = AccessController(self.config, self.logger)
+        return FileOperations(self.config, acl, session, self.logger, workspace_index=self.index())
+
+    def files(self) -> List[str]:
+        """Пути файлов папок ролей"""
+        if self._files is None:
+            self._files = [os.path.join(self.workspace_root, folder, name)
+                           for folder in self.folders for name in sorted(os.listdir(os.path.join(self.workspace_root, folder)))]
+        return self._files
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+
+
+def bench_acl(env: Environment) -> Dict[str, dict]:
+    acl = AccessController(env.config, env.logger)
+    roles = list(generate.DEFAULT_ROLES) + ["unknown"]
+    operations = ["READ", "WRITE", "DELETE", "LIST"]
+    folders = env.folders + ["missing"]
+    keys = [(env.rng.choice(roles), env.rng.choice(operations),
+             os.path.join(env.workspace_root, env.rng.choice(folders), "file.txt"))
+            for _ in range(1024)]
+
+    return {
+        'acl.check': measure(lambda n: acl.check_permission(*keys[n % len(keys)]),
+                             env.args.iterations * 10, batch=100, warmup=len(keys)),
+        'acl.check_operation': measure(lambda n: acl.check_permission(keys[n % len(keys)][0], "LIST"),
+                                       env.args.iterations * 10, batch=100),
+    }
+
+
+def bench_auth(env: Environment) -> Dict[str, dict]:
+    results = {}
+    repository = None
+
+    def load():
+        nonlocal repository
+        repository = UserRepository(env.logger, env.users_file)
+
+    results['auth.load_users'] = once(load)
+
+    names = [generate.bench_username(env.rng.randrange(env.args.users)) for _ in range(1024)]
+    results['auth.get_user'] = measure(lambda n: repository.get_user(names[n % len(names)]),
+                                       env.args.iterations * 10, batch=100)
+
+    password_config = env.config.get_password_config()
+    verifier = PasswordVerifier(password_config['workers'], password_config['max_pending'],
+                                scheme=password_config['scheme'])
+    auth = Authenticator(repository, env.logger, verifier)
+    try:
+        results['auth.authenticate'] = measure(
+            lambda n: auth.authenticate(names[n % len(names)], generate.BENCH_PASSWORD),
+            env.args.auth_iterations, warmup=1)
+        results['auth.reject_unknown'] = measure(lambda n: auth.authenticate(f"missing{n}", "x"),
+                                                 env.args.iterations, batch=10)
+    finally:
+        verifier.close()
+    return results
+
+
+def bench_list(env: Environment) -> Dict[str, dict]:
+    def build():
+        WorkspaceIndex(env.workspace_root, os.path.join(env.base_dir, "cold_index.json"), env.logger).load().close()
+
+    results = {'list.index_build': once(build)}
+    ops = env.file_operations()
+    results['list.page'] = measure(lambda n: ops.list_files_page(page_size=100, offset=(n * 100) % max(len(env.files()), 1)),
+                                   env.args.iterations, warmup=2)
+    results['list.top_size'] = measure(lambda n: ops.top_files(k=10), max(env.args.iterations // 10, 1))
+    return results
+
+
+def bench_read(env: Environment) -> Dict[str, dict]:
+    ops = env.file_operations()
+    files = env.files()
+    picks = [env.rng.choice(files) for _ in range(env.args.iterations)]
+    total = sum(os.path.getsize(path) for path in picks)
+
+    result = measure(lambda n: ops.read_file(picks[n]), len(picks), warmup=2)
+    result['bytes'] = total
+    return {'read.file': result}
+
+
+def bench_write(env: Environment) -> Dict[str, dict]:
+    ops = env.file_operations()
+    content = "x" * generate.parse_size(env.args.write_size)
+    folder = os.path.join(env.workspace_root, "temp")
+    os.makedirs(folder, exist_ok=True)
+    env.written = [os.path.join(folder, f"bench_write_{n:06d}.txt") for n in range(env.args.iterations)]
+
+    return {
+        'write.create': measure(lambda n: ops.write_file(env.written[n], content), len(env.written)),
+        'write.overwrite': measure(lambda n: ops.write_file(env.written[n], content), len(env.written)),
+        'write.append': measure(lambda n: ops.write_file(env.written[n], "y\n", 'a'), len(env.written)),
+    }
+
+
+def bench_delete(env: Environment) -> Dict[str, dict]:
+    ops = env.file_operations()
+    paths = getattr(env, 'written', None)
+    if not paths:
+        folder = os.path.join(env.workspace_root, "temp")
+        os.makedirs(folder, exist_ok=True)
+        paths = [os.path.join(folder, f"bench_delete_{n:06d}.txt") for n in range(env.args.iterations)]
+        for path in paths:
+            ops.write_file(path, "x")
+    return {'delete.remove': measure(lambda n: ops.remove_file(paths[n]), len(paths))}
+
+
+def bench_provision(env: Environment) -> Dict[str, dict]:
+    root = env.base_dir / "provision"
+    roles = generate.DEFAULT_ROLES
+    users = [(generate.bench_username(n), roles[n % len(roles)]) for n in range(env.args.users)]
+    provisioner = WorkspaceProvisioner(str(root / "workspace"), str(root / "manifest.json"))
+    sample_files = {"shared": [("welcome.txt", "Добро пожаловать\n")]}
+
+    def run(stamp):
+        return provisioner.provision(env.folders, sample_files, lambda: users, stamp,
+                                     lambda name, role: [("readme.txt", f"{name} {role}\n")])
+
+    return {
+        'provision.initial': once(lambda: run([1])),
+        'provision.unchanged': measure(lambda n: run([1]), max(env.args.iterations // 10, 1)),
+        'provision.users_changed': once(lambda: run([2])),
+    }
+
+
+def bench_startup(env: Environment) -> Dict[str, dict]:
+    from benchmarks import startup
+
+    samples = [startup.time_to_prompt() for _ in range(env.args.startup_runs)]
+    startup.config_load_time(True)
+    return {
+        'startup.time_to_prompt': summarize(samples),
+        'startup.config_yaml': summarize([startup.config_load_time(False) for _ in range(env.args.startup_runs)]),
+        'startup.config_cache': summarize([startup.config_load_time(True) for _ in range(env.args.startup_runs)]),
+    }
+
+
+SUITES = {
+    'acl': bench_acl,
+    'auth': bench_auth,
+    'list': bench_list,
+    'read': bench_read,
+    'write': bench_write,
+    'delete': bench_delete,
+    'provision': bench_provision,
+    'startup': bench_startup,
+}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return result.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры горячих путей на синтетических данных")
+    parser.add_argument("--only", help=f"замеры через запятую ({','.join(BENCHMARKS)})")
+    parser.add_argument("--skip", help="пропустить замеры через запятую")
+    parser.add_argument("--folders", type=int, default=9, help="папок ролей")
+    parser.add_argument("--files", type=int, default=200, help="файлов в папке")
+    parser.add_argument("--size", default="lognormal:4k:1.0", help="распределение размеров файлов")
+    parser.add_argument("--user-dirs", type=int, default=100, help="личных папок user_*")
+    parser.add_argument("--users", type=int, default=1000, help="пользователей в users.json")
+    parser.add_argument("--scheme", default="scrypt", help="схема хэшей синтетических пользователей")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--auth-iterations", type=int, default=10, help="входов (KDF - десятки мс)")
+    parser.add_argument("--write-size", default="4k")
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", help="папка для данных (по умолчанию временная, удаляется)")
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    skipped = {name.strip() for name in args.skip.split(",")} if args.skip else set()
+    unknown = [name for name in selected + list(skipped) if name not in SUITES]
+    if unknown:
+        parser.error(f"неизвестные замеры: {', '.join(unknown)}")
+    selected = [name for name in selected if name not in skipped]
+
+    base_dir = args.dir or tempfile.mkdtemp(prefix="acs-bench-")
+    os.makedirs(base_dir, exist_ok=True)
+    try:
+        print(f"📦 Генерация данных в {base_dir}...", file=sys.stderr)
+        env = Environment(base_dir, args)
+        print(f"   файлов {env.workspace['files']}, пользователей {args.users} "
+              f"({env.generate_seconds} с)", file=sys.stderr)
+
+        results = {}
+        for name in selected:
+            print(f"⏱️  {name}...", file=sys.stderr)
+            results.update(SUITES[name](env))
+        env.close()
+    finally:
+        if not args.dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    print(f"\n{'замер':<26} {'операций':>9} {'оп/с':>10} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9}")
+    for name, result in results.items():
+        ops_per_sec = f"{result['ops_per_sec']:.1f}" if result['ops_per_sec'] else "-"
+        print(f"{name:<26} {result['count']:>9} {ops_per_sec:>10} {result['p50_ms']:>9.3f} "
+              f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+
+    if args.json:
+        report = {
+            'version': RESULTS_VERSION,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': {key: value for key, value in vars(args).items() if key not in ('json', 'dir', 'only', 'skip')},
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Результаты сохранены: {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
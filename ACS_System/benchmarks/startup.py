@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Замер времени запуска
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --top 20 --json startup.json
+
+Измеряется:
+  - время до первого приглашения (строка "Логин" в выводе main.py);
+  - стоимость импорта модулей main.py (python -X importtime);
+  - загрузка config.yaml с разбором YAML и из кэша.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROMPT = "Логин".encode('utf-8')
+
+CONFIG_LOAD_CODE = (
+    "import time; t = time.perf_counter(); "
+    "from storage.config_manager import ConfigManager; ConfigManager(use_cache={use_cache}); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def time_to_prompt(timeout: float = 30.0) -> float:
+    """Время от запуска main.py до приглашения ввода логина, секунд"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "main.py"], cwd=PROJECT_DIR,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        output = b""
+        while PROMPT not in output:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("main.py завершился до приглашения ввода")
+            output += chunk
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("Приглашение ввода не появилось")
+        return time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+
+
+def import_costs(module: str = "main") -> list:
+    """Стоимость импорта модулей: (модуль, собственное время мкс, суммарное мкс)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+    costs = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        costs.append((name.strip(), int(self_us), int(cumulative_us)))
+    return costs
+
+
+def config_load_time(use_cache: bool) -> float:
+    """Загрузка конфигурации в отдельном процессе (без уже импортированных модулей)"""
+    result = subprocess.run(
+        [sys.executable, "-c", CONFIG_LOAD_CODE.format(use_cache=use_cache)],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip())
+
+
+def summarize(samples: list) -> dict:
+    return {
+        'min_ms': round(min(samples) * 1000, 2),
+        'median_ms': round(statistics.median(samples) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер времени запуска системы")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="модулей в отчете об импорте")
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    prompt = summarize([time_to_prompt() for _ in range(args.runs)])
+
+    config_load_time(True)  # создание кэша
+    config = {
+        'yaml': summarize([config_load_time(False) for _ in range(args.runs)]),
+        'cache': summarize([config_load_time(True) for _ in range(args.runs)]),
+    }
+
+    costs = import_costs()
+    top = sorted(costs, key=lambda item: item[2], reverse=True)[:args.top]
+
+    print(f"⏱️  До приглашения ввода: {prompt['median_ms']} мс "
+          f"(мин {prompt['min_ms']}, макс {prompt['max_ms']}, запусков {args.runs})")
+    print(f"⚙️  config.yaml: YAML {config['yaml']['median_ms']} мс, кэш {config['cache']['median_ms']} мс")
+    print(f"\n📦 Импорт main (всего модулей: {len(costs)}):")
+    print(f"{'суммарно, мс':>13} {'собств., мс':>12}  модуль")
+    for name, self_us, cumulative_us in top:
+        print(f"{cumulative_us / 1000:13.2f} {self_us / 1000:12.2f}  {name}")
+
+    if args.json:
+        report = {
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'time_to_prompt': prompt,
+            'config_load': config,
+            'imports': [
+                {'module': name, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                for name, self_us, cumulative_us in costs
+            ],
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Результаты сохранены: {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
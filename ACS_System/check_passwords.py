@@ -1,10 +1,46 @@
 #!/usr/bin/env python3
 """
 Проверка паролей в users.json
+
+    python check_passwords.py                       # пароль = логин для всех
+    python check_passwords.py --audit               # аудит, отчет audit_report.json
+    python check_passwords.py --audit --db users.db --wordlist weak.txt
+
+Аудит читает пользователей потоком (без загрузки всего файла) и проверяет
+хэши пачками в пуле процессов. Находит устаревшие (MD5), нераспознанные и
+поврежденные хэши, хэши с устаревшими параметрами, слабые пароли (логин или пароль из
+словаря), повторяющиеся хэши и логины, неизвестные роли. Повторы ищутся
+во временной базе SQLite на диске, поэтому память не растет с числом
+пользователей.
 """
 
+import argparse
 import json
-import hashlib
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from core.passwords import DEFAULT_SCHEME, SCHEME_MD5, hash_params, identify, needs_rehash, verify_password
+from storage.json_stream import iter_json_array
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+AUDIT_CHUNK_SIZE = 200
+MAX_SAMPLES = 100
+DEFAULT_REPORT = "audit_report.json"
+
+ISSUE_LEGACY = "legacy_hash"
+ISSUE_UNKNOWN_FORMAT = "unknown_hash_format"
+ISSUE_MALFORMED = "malformed_hash"
+ISSUE_OUTDATED = "outdated_parameters"
+ISSUE_WEAK = "weak_password"
+ISSUE_DUPLICATE_HASH = "duplicate_hash"
+ISSUE_DUPLICATE_USERNAME = "duplicate_username"
+ISSUE_UNKNOWN_ROLE = "unknown_role"
 
 
 def check_all_passwords():
@@ -21,13 +57,13 @@ def check_all_passwords():
         stored_hash = user['password_hash']
 
         # Пароль должен совпадать с логином
-        expected_hash = hashlib.md5(username.encode()).hexdigest()
+        scheme = identify(stored_hash) or "неизвестный формат"
 
-        if stored_hash == expected_hash:
-            print(f"✅ {username:12} - OK (пароль: {username})")
+        if verify_password(username, stored_hash):
+            print(f"✅ {username:12} - OK (пароль: {username}, {scheme})")
         else:
             print(f"❌ {username:12} - ОШИБКА!")
-            print(f"   Ожидался: {expected_hash}")
+            print(f"   Формат:   {scheme}")
             print(f"   В файле:  {stored_hash}")
             all_correct = False
 
@@ -38,5 +74,188 @@ def check_all_passwords():
         print("❌ Есть ошибки в паролях!")
 
 
+
+def iter_users(users_file: str = None, db_file: str = None) -> Iterator[Tuple[str, str, str]]:
+    """Пользователи (логин, хэш, роль) из users.json или базы SQLite, по одному"""
+    if db_file:
+        conn = sqlite3.connect(db_file)
+        try:
+            yield from conn.execute("SELECT username, password_hash, role FROM users")
+        finally:
+            conn.close()
+        return
+
+    with open(users_file, 'r', encoding='utf-8') as f:
+        for user in iter_json_array(f):
+            yield user.get('username', ""), user.get('password_hash', ""), user.get('role', "")
+
+
+def audit_chunk(chunk: List[Tuple[str, str]], wordlist: Tuple[str, ...], scheme: str) -> dict:
+    """Проверка пачки хэшей (выполняется в процессе пула)"""
+    issues: Dict[str, List[str]] = {}
+    schemes = Counter()
+
+    for username, stored_hash in chunk:
+        found = []
+        detected = identify(stored_hash)
+        schemes[detected or "unknown"] += 1
+
+        if detected is None:
+            found.append(ISSUE_UNKNOWN_FORMAT)
+        else:
+            if detected == SCHEME_MD5:
+                found.append(ISSUE_LEGACY)
+            else:
+                try:
+                    hash_params(stored_hash)
+                except ValueError:
+                    # Поврежденный хэш: проверять пароль по нему бессмысленно
+                    issues.setdefault(ISSUE_MALFORMED, []).append(username)
+                    continue
+                if needs_rehash(stored_hash, scheme):
+                    found.append(ISSUE_OUTDATED)
+
+            if any(verify_password(candidate, stored_hash) for candidate in (username,) + wordlist):
+                found.append(ISSUE_WEAK)
+
+        for issue in found:
+            issues.setdefault(issue, []).append(username)
+
+    return {'issues': issues, 'schemes': schemes}
+
+
+class AuditReport:
+    """Накопление результатов аудита с ограниченным числом примеров"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.users = 0
+        self.schemes = Counter()
+        self.counts = Counter()
+        self.samples: Dict[str, list] = {}
+
+    def add(self, issue: str, samples: list, count: int = None):
+        self.counts[issue] += len(samples) if count is None else count
+        bucket = self.samples.setdefault(issue, [])
+        bucket.extend(samples[:MAX_SAMPLES - len(bucket)])
+
+    def merge(self, result: dict):
+        self.schemes.update(result['schemes'])
+        for issue, usernames in result['issues'].items():
+            self.add(issue, usernames)
+
+    def to_dict(self, seconds: float) -> dict:
+        return {
+            'source': self.source,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(seconds, 2),
+            'users': self.users,
+            'schemes': dict(self.schemes),
+            'issues': {
+                issue: {'count': self.counts[issue], 'samples': self.samples.get(issue, [])}
+                for issue in sorted(self.counts)
+            },
+        }
+
+
+def find_duplicates(db: sqlite3.Connection, report: AuditReport):
+    """Повторяющиеся хэши и логины по временной таблице"""
+    queries = (
+        (ISSUE_DUPLICATE_HASH, "SELECT password_hash, COUNT(*), GROUP_CONCAT(username, ',') "
+                               "FROM audit GROUP BY password_hash HAVING COUNT(*) > 1"),
+        (ISSUE_DUPLICATE_USERNAME, "SELECT username, COUNT(*), username "
+                                   "FROM audit GROUP BY username HAVING COUNT(*) > 1"),
+    )
+    for issue, query in queries:
+        for _, count, usernames in db.execute(query):
+            report.add(issue, [usernames.split(',')[:10] if issue == ISSUE_DUPLICATE_HASH else usernames], count)
+
+
+def run_audit(users: Iterator[Tuple[str, str, str]], roles: frozenset, source: str,
+              wordlist: Tuple[str, ...] = (), scheme: str = DEFAULT_SCHEME, workers: int = None) -> dict:
+    """Аудит пользователей; возвращает отчет"""
+    started = time.perf_counter()
+    report = AuditReport(source)
+    workers = workers or os.cpu_count() or 1
+
+    # Временная база на диске: поиск повторов без хранения всех хэшей в памяти
+    db = sqlite3.connect("")
+    db.execute("CREATE TABLE audit (username TEXT, password_hash TEXT)")
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        chunk = []
+        for username, stored_hash, role in users:
+            report.users += 1
+            if role not in roles:
+                report.add(ISSUE_UNKNOWN_ROLE, [f"{username} ({role})"])
+            chunk.append((username, stored_hash))
+
+            if len(chunk) >= AUDIT_CHUNK_SIZE:
+                db.executemany("INSERT INTO audit VALUES (?, ?)", chunk)
+                pending.append(executor.submit(audit_chunk, chunk, wordlist, scheme))
+                chunk = []
+                while len(pending) >= workers * 2:
+                    report.merge(pending.popleft().result())
+                print(f"\r🔍 Проверено: {report.users}", end="", file=sys.stderr)
+
+        if chunk:
+            db.executemany("INSERT INTO audit VALUES (?, ?)", chunk)
+            pending.append(executor.submit(audit_chunk, chunk, wordlist, scheme))
+        while pending:
+            report.merge(pending.popleft().result())
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    print(file=sys.stderr)
+
+    find_duplicates(db, report)
+    db.close()
+    return report.to_dict(time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка и аудит паролей пользователей")
+    parser.add_argument("--audit", action="store_true", help="аудит с отчетом в JSON")
+    parser.add_argument("--users", default="users.json", help="файл пользователей JSON")
+    parser.add_argument("--db", help="база SQLite вместо users.json")
+    parser.add_argument("--config", default="config.yaml", help="конфигурация (роли, схема хэширования)")
+    parser.add_argument("--wordlist", help="словарь слабых паролей (по одному в строке)")
+    parser.add_argument("--workers", type=int, help="процессов для проверки")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="файл отчета")
+    args = parser.parse_args()
+
+    if not args.audit:
+        check_all_passwords()
+        return
+
+    from storage.config_manager import ConfigManager
+    config = ConfigManager(args.config)
+    roles = frozenset(config.snapshot.roles)
+
+    wordlist = ()
+    if args.wordlist:
+        with open(args.wordlist, 'r', encoding='utf-8') as f:
+            wordlist = tuple(line.strip() for line in f if line.strip())
+
+    source = args.db or args.users
+    report = run_audit(iter_users(args.users, args.db), roles, source, wordlist,
+                       config.get_password_config()['scheme'], args.workers)
+    atomic_write(args.report, json.dumps(report, indent=2, ensure_ascii=False), durability=DURABILITY_NONE)
+
+    print(f"Аудит паролей: {source} ({report['users']} пользователей, {report['seconds']} с)")
+    print("-" * 60)
+    for scheme, count in sorted(report['schemes'].items()):
+        print(f"  {scheme:16} {count}")
+    print("-" * 60)
+    if not report['issues']:
+        print("✅ Проблем не найдено")
+    for issue, data in report['issues'].items():
+        print(f"⚠️ {issue:22} {data['count']}")
+    print(f"\n📄 Отчет: {os.path.abspath(args.report)}")
+
+
 if __name__ == "__main__":
-    check_all_passwords()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Локальный клиент серверного режима (для проверки и автоматизации)
+
+Примеры:
+    python client.py -u admin -p admin list
+    python client.py -u admin -p admin read shared/welcome.txt
+    python client.py -u admin -p admin write reports/note.txt "Текст"
+    python client.py -u admin -p admin delete reports/note.txt
+    python client.py -u admin -p admin search '"отчет за месяц" прибыл*'
+    python client.py -u admin -p admin stats
+"""
+
+import argparse
+import json
+import socket
+import sys
+from typing import Optional
+
+# Совпадают с настройками по умолчанию server.py (клиент не импортирует сервер)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ServerError(Exception):
+    """Ошибка, возвращенная сервером"""
+
+
+class ACSClient:
+    """Синхронный клиент протокола JSON по строкам"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 unix_path: Optional[str] = None, timeout: float = 30.0, token: Optional[str] = None):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.sock.makefile('rwb')
+        self._next_id = 0
+        # Токен сессии подставляется во все запросы после входа
+        self.token = token
+
+    def call(self, op: str, **params):
+        """Отправка запроса и ожидание ответа"""
+        self._next_id += 1
+        request = dict(params, id=self._next_id, op=op)
+        if self.token and 'token' not in request:
+            request['token'] = self.token
+        self.stream.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+        self.stream.flush()
+
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise ServerError(response.get('error'))
+        return response.get('result')
+
+    def login(self, username: str, password: str) -> dict:
+        result = self.call('login', username=username, password=password)
+        self.token = result['token']
+        return result
+
+    def logout(self):
+        result = self.call('logout')
+        self.token = None
+        return result
+
+    def list(self, **params) -> dict:
+        return self.call('list', **params)
+
+    def read(self, path: str, offset: int = 0, length: Optional[int] = None) -> str:
+        params = {'path': path, 'offset': offset}
+        if length is not None:
+            params['length'] = length
+        return self.call('read', **params)['content']
+
+    def write(self, path: str, content: str, mode: str = 'w') -> dict:
+        return self.call('write', path=path, content=content, mode=mode)
+
+    def delete(self, path: str) -> dict:
+        return self.call('delete', path=path)
+
+    def search(self, query: str, limit: Optional[int] = None) -> list:
+        params = {'query': query}
+        if limit is not None:
+            params['limit'] = limit
+        return self.call('search', **params)['hits']
+
+    def stats(self) -> dict:
+        return self.call('stats')
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Клиент серверного режима ACS")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="путь к Unix socket")
+    parser.add_argument("-u", "--username", required=True)
+    parser.add_argument("-p", "--password", required=True)
+    parser.add_argument("command", choices=["list", "read", "write", "delete", "search", "stats"])
+    parser.add_argument("args", nargs="*")
+    args = parser.parse_args()
+
+    try:
+        with ACSClient(args.host, args.port, args.unix) as client:
+            user = client.login(args.username, args.password)
+            print(f"✅ {user['username']} ({user['role']})", file=sys.stderr)
+
+            if args.command == "list":
+                cursor = None
+                while True:
+                    page = client.list(cursor=cursor) if cursor else client.list()
+                    for file in page['files']:
+                        print(f"{file['path']}\t{file['size']}")
+                    cursor = page['next']
+                    if not cursor:
+                        break
+            elif args.command == "read":
+                print(client.read(args.args[0]), end="")
+            elif args.command == "write":
+                content = args.args[1] if len(args.args) > 1 else sys.stdin.read()
+                client.write(args.args[0], content)
+                print(f"✅ Записан: {args.args[0]}", file=sys.stderr)
+            elif args.command == "delete":
+                client.delete(args.args[0])
+                print(f"✅ Удален: {args.args[0]}", file=sys.stderr)
+            elif args.command == "search":
+                for hit in client.search(" ".join(args.args)):
+                    print(f"{hit['path']}\t{hit['score']}\t{hit['snippet'] or ''}")
+            elif args.command == "stats":
+                from utils.metrics import format_summary
+                summary = client.stats()
+                print(f"Время работы сервера: {summary['uptime']} с")
+                print("\n".join(format_summary(summary)))
+
+    except (ServerError, OSError, IndexError) as e:
+        print(f"❌ Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
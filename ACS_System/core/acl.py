@@ -1,30 +1,121 @@
 """
 Контроль доступа - параметризованная версия
+
+Конфигурация ролей компилируется при загрузке в неизменяемую таблицу
+решений: битовые маски прав, множества папок и интернированные
+идентификаторы операций. Решения по ключу (роль, операция, папка)
+кэшируются, поэтому проверка прав сводится к поиску в словаре.
 """
 
 import os
-from pathlib import Path
-from typing import List
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
 import constants as const
+from utils.logger import rate_limited
+from utils.metrics import get_registry
+
+# Интернированные идентификаторы операций (битовые флаги)
+OP_READ = 1
+OP_WRITE = 2
+OP_DELETE = 4
+OP_LIST = 8
+OP_CONFIG = 16
+
+OPERATION_IDS = MappingProxyType({
+    name: bit
+    for base, bit in (("READ", OP_READ), ("WRITE", OP_WRITE), ("DELETE", OP_DELETE),
+                      ("LIST", OP_LIST), ("CONFIG", OP_CONFIG))
+    for name in (base, base.lower())
+})
+
+# Максимальное число закэшированных решений
+DECISION_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class DecisionTable:
+    """Скомпилированная таблица прав ролей"""
+    masks: Mapping[str, int]
+    folders: Mapping[str, frozenset]
+    folder_order: Mapping[str, Tuple[str, ...]]
+
+
+def compile_roles(roles_config: dict) -> DecisionTable:
+    """Компиляция конфигурации ролей в таблицу решений"""
+    masks = {}
+    folders = {}
+    folder_order = {}
+
+    for role, role_config in (roles_config or {}).items():
+        # Поддерживаем краткую форму "РОЛЬ: [права]" и полную с папками
+        if isinstance(role_config, Mapping):
+            permissions = role_config.get('permissions', []) or []
+            role_folders = role_config.get('folders', []) or []
+        else:
+            permissions = role_config or []
+            role_folders = []
+
+        mask = 0
+        for permission in permissions:
+            mask |= OPERATION_IDS.get(str(permission).upper(), 0)
+
+        role = str(role)
+        masks[role] = mask
+        folder_order[role] = tuple(str(folder) for folder in role_folders)
+        folders[role] = frozenset(folder_order[role])
+
+    return DecisionTable(
+        masks=MappingProxyType(masks),
+        folders=MappingProxyType(folders),
+        folder_order=MappingProxyType(folder_order)
+    )
+
 
 class AccessController:
     """Контроллер доступа на основе ролей"""
 
     def __init__(self, config_manager, logger):
         self.config = config_manager
-        self.logger = logger
-        self.workspace_root = config_manager.get_workspace_root()
-        self.roles_config = config_manager.get_roles_config()
+        self.logger = rate_limited(logger)
+        self.metrics = get_registry()
+        self.reload()
 
-    def check_permission(self, user_role: str, operation: str, filepath: str = None) -> bool:
-        """Проверка прав доступа"""
+        # Таблица перекомпилируется при каждой перезагрузке конфигурации
+        config_manager.subscribe(self._on_config_reload)
 
-        # Получаем права для роли из конфигурации
-        role_config = self.roles_config.get(user_role, {})
-        permissions = role_config.get('permissions', [])
+    def reload(self):
+        """Перекомпиляция таблицы решений после изменения конфигурации"""
+        snapshot = self.config.snapshot
+        self.config_version = snapshot.version
+        self.workspace_root = snapshot.workspace_root
+        self.roles_config = self.config.get_roles_config()
+        self._root_prefix = os.path.join(self.workspace_root, "")
+        self._table = compile_roles(self.roles_config)
 
-        if operation not in permissions:
-            self.logger.warning(f"Роль {user_role} не имеет права {operation}")
+        # Новый кэш решений: старые решения не переживают смену конфигурации
+        self._decide = lru_cache(maxsize=DECISION_CACHE_SIZE)(self._evaluate)
+
+    def _on_config_reload(self, snapshot):
+        self.reload()
+        self.logger.info("Таблица прав перекомпилирована (версия конфигурации {})", snapshot.version)
+
+    def check_permission(self, user_role: str, operation: str, filepath: str = None) -> bool:
+        """Проверка прав доступа"""
+        started = time.perf_counter()
+        allowed = self._check(user_role, operation, filepath)
+        self.metrics.observe('acs_acl_check_seconds', time.perf_counter() - started,
+                             operation=operation, role=user_role, outcome="allow" if allowed else "deny")
+        return allowed
+
+    def _check(self, user_role: str, operation: str, filepath: Optional[str]) -> bool:
+        # Проверка права на операцию по битовой маске роли
+        if not self._table.masks.get(user_role, 0) & OPERATION_IDS.get(operation, 0):
+            # При потоке отказов сообщения по одной паре (роль, операция) подавляются
+            self.logger.limited('warning', ('acl_denied', user_role, operation),
+                                "Роль {} не имеет права {}", user_role, operation)
             return False
 
         # Если файл не указан - проверяем только операцию
@@ -36,31 +127,32 @@ class AccessController:
 
     def _check_file_access(self, user_role: str, operation: str, filepath: str) -> bool:
         """Проверка доступа к файлу"""
-
-        try:
-            # Приводим путь к относительному относительно workspace
-            rel_path = Path(filepath).relative_to(self.workspace_root)
-        except ValueError:
+        folder = self._top_folder(filepath)
+        if folder is None:
             # Файл вне workspace - доступ запрещен
             return False
 
-        parts = rel_path.parts
+        return self._decide(user_role, operation, folder)
 
-        # Личная папка пользователя (определяется по имени файла в main.py)
-        if parts[0].startswith("user_"):
-            # Валидация происходит в основном коде
-            return True
+    def _top_folder(self, filepath: str) -> Optional[str]:
+        """Папка верхнего уровня workspace, в которой находится файл"""
+        path = os.path.normpath(filepath)
+        if not path.startswith(self._root_prefix):
+            return None
 
-        # Проверяем доступ к системным папкам
-        if len(parts) > 0:
-            folder = parts[0]
-            role_folders = self.config.get_role_folders(user_role)
+        folder = path[len(self._root_prefix):].partition(os.sep)[0]
+        return folder or None
 
-            if folder in role_folders:
-                return True
+    def _evaluate(self, user_role: str, operation: str, folder: str) -> bool:
+        """Вычисление решения для (роль, операция, папка)"""
 
-        return False
+        # Личная папка: владельца проверяют FileOperations и main.py - у роли нет имени пользователя
+        if folder.startswith("user_"):
+            return True
+
+        # Проверяем доступ к системным папкам
+        return folder in self._table.folders.get(user_role, ())
 
     def get_accessible_folders(self, user_role: str) -> List[str]:
         """Получение доступных папок для роли"""
-        return self.config.get_role_folders(user_role)
\ No newline at end of file
+        return list(self._table.folder_order.get(user_role, ()))
@@ -0,0 +1,21 @@
+"""
+Асинхронный фасад над Authenticator
+"""
+
+from typing import Optional
+from core.models import User
+from utils.async_executor import OperationLimiter, get_shared_executor, run_blocking
+
+
+class AsyncAuthenticator:
+    """Асинхронная аутентификация: проверка пароля выполняется в общем пуле потоков"""
+
+    def __init__(self, authenticator, limiter: Optional[OperationLimiter] = None, executor=None):
+        self.auth = authenticator
+        self.limiter = limiter or OperationLimiter()
+        self.executor = executor or get_shared_executor()
+
+    async def authenticate(self, username: str, password: str) -> Optional[User]:
+        """Аутентификация пользователя"""
+        return await run_blocking(self.limiter, 'auth', self.executor,
+                                  self.auth.authenticate, username, password)
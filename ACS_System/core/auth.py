@@ -1,39 +1,70 @@
-import hashlib
+import time
 from typing import Optional
+from core import passwords
 from core.models import User
+from utils import audit
+from utils.logger import rate_limited
+from utils.metrics import get_registry
 
 class Authenticator:
-    """Аутентификация с проверкой MD5 хэшей"""
+    """Аутентификация с проверкой хэшей паролей (KDF с солью, MD5 для совместимости)"""
 
-    def __init__(self, user_repository, logger):
+    def __init__(self, user_repository, logger, verifier: Optional[passwords.PasswordVerifier] = None,
+                 audit_log: Optional[audit.AuditLog] = None):
         self.user_repo = user_repository
-        self.logger = logger
+        self.logger = rate_limited(logger)
+        self.verifier = verifier or passwords.get_default_verifier()
+        self.audit = audit_log
+        self.metrics = get_registry()
 
     def hash_password(self, password: str) -> str:
-        """Хэширование пароля MD5"""
-        return hashlib.md5(password.encode('utf-8')).hexdigest()
+        """Хэширование пароля"""
+        return self.verifier.hash(password)
 
     def authenticate(self, username: str, password: str) -> Optional[User]:
         """Аутентификация пользователя"""
+        started = time.perf_counter()
         try:
-            self.logger.debug(f"Аутентификация пользователя: {username}")
+            self.logger.debug("Аутентификация пользователя: {}", username)
 
             # Получаем пользователя
             user = self.user_repo.get_user(username)
             if not user:
-                self.logger.warning(f"Пользователь не найден: {username}")
+                self._record(username, None, audit.DENY, started)
+                self.logger.limited('warning', 'auth_unknown_user', "Пользователь не найден: {}", username)
                 return None
 
-            # Хэшируем введенный пароль и сравниваем
-            password_hash = self.hash_password(password)
-
-            if user.password_hash == password_hash:
-                self.logger.info(f"Успешная аутентификация: {username}")
+            # Проверяем пароль по сохраненному хэшу
+            if self.verifier.verify(password, user.password_hash):
+                self._record(username, user.role, audit.ALLOW, started)
+                self.logger.info("Успешная аутентификация: {}", username)
+                self._upgrade_hash(user, password)
                 return user
             else:
-                self.logger.warning(f"Неверный пароль для пользователя: {username}")
+                self._record(username, user.role, audit.DENY, started)
+                self.logger.limited('warning', ('auth_bad_password', username),
+                                    "Неверный пароль для пользователя: {}", username)
                 return None
 
         except Exception as e:
+            self._record(username, None, audit.ERROR, started)
             self.logger.error(f"Ошибка аутентификации: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _record(self, username: str, role: Optional[str], decision: str, started: float):
+        """Попытка входа в метрики и журнал аудита (если он подключен)"""
+        latency = time.perf_counter() - started
+        self.metrics.observe('acs_auth_seconds', latency, role=role or "", outcome=decision)
+        if self.audit is not None:
+            self.audit.record(username, role, "LOGIN", None, decision, latency)
+
+    def _upgrade_hash(self, user: User, password: str):
+        """Прозрачное перехэширование устаревшего хэша после успешного входа"""
+        if not self.verifier.needs_rehash(user.password_hash):
+            return
+
+        try:
+            self.user_repo.update_password_hash(user.username, self.verifier.hash(password))
+            self.logger.info("Хэш пароля обновлен: {}", user.username)
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления хэша пароля {user.username}: {e}")
@@ -3,7 +3,7 @@
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 from datetime import datetime
 
 
@@ -24,6 +24,11 @@ class UserSession:
     """Сессия пользователя"""
     user: User
     login_time: Optional[str] = None
+    token: Optional[str] = None
+    last_access: float = 0.0
+    # Кэш данных роли (заполняется хранилищем сессий)
+    role_permissions: Optional[frozenset] = None
+    role_folders: Optional[tuple] = None
 
     def __post_init__(self):
         self.login_time = datetime.now().isoformat()
@@ -34,4 +39,43 @@ class FileObject:
     """Объект файла для контроля доступа"""
     path: str
     owner: Optional[str] = None
-    permissions: Optional[str] = None
\ No newline at end of file
+    permissions: Optional[str] = None
+
+
+@dataclass(slots=True)
+class FileMetadata:
+    """Метаданные файла в индексе workspace"""
+    name: str
+    folder: str
+    size: int
+    mtime: float
+    owner: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """Результат полнотекстового поиска"""
+    folder: str
+    name: str
+    score: float
+    snippet: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """Результат операции над одним файлом в пакете"""
+    path: str
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class UserChanges:
+    """Изменения в списке пользователей после перезагрузки"""
+    added: tuple = ()
+    removed: tuple = ()
+    changed: tuple = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
@@ -0,0 +1,207 @@
+"""
+Хэширование и проверка паролей
+
+Формат хэша содержит алгоритм и параметры:
+    $scrypt$ln=14,r=8,p=1$<соль>$<хэш>
+    $pbkdf2-sha256$i=260000$<соль>$<хэш>
+Устаревшие MD5-хэши (32 hex-символа без соли) проверяются для
+совместимости и перехэшируются при успешном входе.
+
+Проверка KDF занимает миллисекунды, поэтому PasswordVerifier выполняет ее
+в пуле процессов с ограниченной очередью.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+SCHEME_SCRYPT = "scrypt"
+SCHEME_PBKDF2 = "pbkdf2-sha256"
+SCHEME_MD5 = "md5"
+
+DEFAULT_SCHEME = SCHEME_SCRYPT
+SCRYPT_PARAMS = {'ln': 14, 'r': 8, 'p': 1}
+PBKDF2_PARAMS = {'i': 260000}
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+_MD5_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def _format_params(params: Dict[str, int]) -> str:
+    return ",".join(f"{name}={value}" for name, value in params.items())
+
+
+def _parse_params(text: str) -> Dict[str, int]:
+    return {name: int(value) for name, value in (item.split('=', 1) for item in text.split(','))}
+
+
+def _derive(scheme: str, password: str, salt: bytes, params: Dict[str, int]) -> bytes:
+    """Вычисление ключа по схеме и параметрам"""
+    secret = password.encode('utf-8')
+    if scheme == SCHEME_SCRYPT:
+        n = 1 << params['ln']
+        return hashlib.scrypt(secret, salt=salt, n=n, r=params['r'], p=params['p'],
+                              maxmem=256 * n * params['r'] * params['p'], dklen=HASH_SIZE)
+    if scheme == SCHEME_PBKDF2:
+        return hashlib.pbkdf2_hmac('sha256', secret, salt, params['i'], dklen=HASH_SIZE)
+    raise ValueError(f"Неизвестная схема хэширования: {scheme}")
+
+
+def hash_password(password: str, scheme: str = DEFAULT_SCHEME) -> str:
+    """Хэширование пароля с солью"""
+    if scheme == SCHEME_SCRYPT:
+        params = SCRYPT_PARAMS
+    elif scheme == SCHEME_PBKDF2:
+        params = PBKDF2_PARAMS
+    else:
+        raise ValueError(f"Неизвестная схема хэширования: {scheme}")
+
+    salt = os.urandom(SALT_SIZE)
+    derived = _derive(scheme, password, salt, params)
+    return f"${scheme}${_format_params(params)}${_b64encode(salt)}${_b64encode(derived)}"
+
+
+def identify(stored_hash: str) -> Optional[str]:
+    """Схема, которой получен хэш (None - формат не распознан)"""
+    if _MD5_PATTERN.match(stored_hash or ""):
+        return SCHEME_MD5
+    parts = (stored_hash or "").split('$')
+    if len(parts) == 5 and parts[0] == "" and parts[1] in (SCHEME_SCRYPT, SCHEME_PBKDF2):
+        return parts[1]
+    return None
+
+
+def is_legacy(stored_hash: str) -> bool:
+    """Устаревший хэш без соли"""
+    return identify(stored_hash) == SCHEME_MD5
+
+
+def hash_params(stored_hash: str) -> Dict[str, int]:
+    """Параметры хэша scrypt/PBKDF2; ValueError - хэш поврежден или формат не распознан"""
+    scheme = identify(stored_hash)
+    if scheme not in (SCHEME_SCRYPT, SCHEME_PBKDF2):
+        raise ValueError("Хэш не содержит параметров KDF")
+
+    _, _, params_text, salt_text, hash_text = stored_hash.split('$')
+    try:
+        params = _parse_params(params_text)
+    except ValueError:
+        raise ValueError(f"Поврежденные параметры хэша: {params_text}") from None
+
+    expected = SCRYPT_PARAMS if scheme == SCHEME_SCRYPT else PBKDF2_PARAMS
+    if params.keys() != expected.keys():
+        raise ValueError(f"Поврежденные параметры хэша: {params_text}")
+    _b64decode(salt_text)
+    _b64decode(hash_text)
+    return params
+
+
+def needs_rehash(stored_hash: str, scheme: str = DEFAULT_SCHEME) -> bool:
+    """Нужно ли перехэшировать пароль (устаревшая схема, параметры или поврежденный хэш)"""
+    if identify(stored_hash) != scheme:
+        return True
+    try:
+        params = hash_params(stored_hash)
+    except ValueError:
+        return True
+    expected = SCRYPT_PARAMS if scheme == SCHEME_SCRYPT else PBKDF2_PARAMS
+    return params != expected
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    """Проверка пароля по хэшу любого поддерживаемого формата"""
+    scheme = identify(stored_hash)
+
+    if scheme == SCHEME_MD5:
+        candidate = hashlib.md5(password.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(candidate, stored_hash)
+
+    if scheme is None:
+        return False
+
+    try:
+        _, _, params_text, salt_text, hash_text = stored_hash.split('$')
+        derived = _derive(scheme, password, _b64decode(salt_text), _parse_params(params_text))
+        return hmac.compare_digest(derived, _b64decode(hash_text))
+    except (ValueError, KeyError):
+        return False
+
+
+class VerifierBusyError(RuntimeError):
+    """Очередь проверки паролей переполнена"""
+
+
+class PasswordVerifier:
+    """Проверка и хэширование паролей в пуле процессов с ограниченной очередью"""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64,
+                 queue_timeout: float = 5.0, scheme: str = DEFAULT_SCHEME):
+        self.workers = workers
+        self.scheme = scheme
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # multiprocessing импортируется только при первой проверке через пул
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _submit(self, func, *args):
+        """Выполнение в пуле процессов; ожидание места в очереди ограничено"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise VerifierBusyError("Очередь проверки паролей переполнена")
+        try:
+            return self._get_pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        """Проверка пароля; устаревшие хэши проверяются без пула"""
+        if identify(stored_hash) in (SCHEME_MD5, None):
+            return verify_password(password, stored_hash)
+        return self._submit(verify_password, password, stored_hash)
+
+    def hash(self, password: str) -> str:
+        """Хэширование пароля в пуле процессов"""
+        return self._submit(hash_password, password, self.scheme)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return needs_rehash(stored_hash, self.scheme)
+
+    def close(self):
+        """Остановка пула процессов"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+_default_verifier: Optional[PasswordVerifier] = None
+_default_lock = threading.Lock()
+
+
+def get_default_verifier() -> PasswordVerifier:
+    """Общий проверяющий по умолчанию"""
+    global _default_verifier
+    with _default_lock:
+        if _default_verifier is None:
+            _default_verifier = PasswordVerifier()
+        return _default_verifier
@@ -0,0 +1,168 @@
+"""
+Хранилище сессий с токенами
+
+Токен - непрозрачная случайная строка, по которой за O(1) находится
+UserSession. Срок жизни скользящий: каждое обращение продлевает сессию.
+Просроченные сессии удаляются лениво при обращении и периодически;
+при превышении лимита вытесняется давно не использовавшаяся сессия.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from core.models import User, UserChanges, UserSession
+
+DEFAULT_TTL = 30 * 60
+DEFAULT_MAX_SESSIONS = 10000
+
+
+class SessionStore:
+    """Хранилище сессий: токен -> UserSession"""
+
+    def __init__(self, config_manager, logger, ttl: float = DEFAULT_TTL,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.config = config_manager
+        self.logger = logger
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+
+        # Порядок ключей - порядок последнего обращения (в начале самые старые)
+        self._sessions: "OrderedDict[str, UserSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[UserSession], None]] = []
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+        # Кэш данных ролей в сессиях обновляется при перезагрузке конфигурации
+        config_manager.subscribe(lambda snapshot: self.refresh_role_data())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def subscribe(self, callback: Callable[[UserSession], None]):
+        """Подписка на завершение сессий (выход, истечение срока, вытеснение)"""
+        self._listeners.append(callback)
+
+    def _notify(self, sessions: List[UserSession]):
+        for session in sessions:
+            for callback in self._listeners:
+                try:
+                    callback(session)
+                except Exception as e:
+                    self.logger.error(f"Ошибка обработчика сессий: {e}")
+
+    def _fill_role_data(self, session: UserSession):
+        """Кэширование данных роли в сессии"""
+        policy = self.config.snapshot.roles.get(session.user.role)
+        session.role_permissions = policy.permission_set if policy else frozenset()
+        session.role_folders = policy.folders if policy else ()
+
+    def create(self, user: User) -> UserSession:
+        """Создание сессии для аутентифицированного пользователя"""
+        session = UserSession(user=user, token=secrets.token_urlsafe(32), last_access=time.monotonic())
+        self._fill_role_data(session)
+
+        evicted = []
+        with self._lock:
+            self._sessions[session.token] = session
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1])
+
+        if evicted:
+            self.logger.warning(f"Превышен лимит сессий, вытеснено: {len(evicted)}")
+            self._notify(evicted)
+        return session
+
+    def get(self, token: str) -> Optional[UserSession]:
+        """Сессия по токену; обращение продлевает срок жизни"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+
+            if now - session.last_access > self.ttl:
+                # Ленивое удаление просроченной сессии
+                del self._sessions[token]
+                expired = session
+                session = None
+            else:
+                session.last_access = now
+                self._sessions.move_to_end(token)
+                expired = None
+
+        if expired is not None:
+            self._notify([expired])
+        return session
+
+    def revoke(self, token: str) -> bool:
+        """Завершение сессии (выход из системы)"""
+        with self._lock:
+            session = self._sessions.pop(token, None)
+
+        if session is None:
+            return False
+        self._notify([session])
+        return True
+
+    def revoke_user(self, username: str) -> int:
+        """Завершение всех сессий пользователя"""
+        with self._lock:
+            tokens = [token for token, session in self._sessions.items() if session.user.username == username]
+            sessions = [self._sessions.pop(token) for token in tokens]
+
+        self._notify(sessions)
+        return len(sessions)
+
+    def invalidate_users(self, changes: UserChanges) -> int:
+        """Завершение сессий удаленных и измененных пользователей (смена роли или пароля)"""
+        revoked = 0
+        for username in changes.removed + changes.changed:
+            revoked += self.revoke_user(username)
+
+        if revoked:
+            self.logger.info(f"Завершено сессий после изменения пользователей: {revoked}")
+        return revoked
+
+    def refresh_role_data(self):
+        """Обновление кэша данных ролей во всех сессиях (после смены конфигурации)"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            self._fill_role_data(session)
+
+    def evict_expired(self) -> int:
+        """Удаление просроченных сессий; возвращает их количество"""
+        deadline = time.monotonic() - self.ttl
+        expired = []
+        with self._lock:
+            # Сессии упорядочены по последнему обращению - достаточно пройти с начала
+            while self._sessions:
+                token, session = next(iter(self._sessions.items()))
+                if session.last_access >= deadline:
+                    break
+                del self._sessions[token]
+                expired.append(session)
+
+        if expired:
+            self.logger.info(f"Удалено просроченных сессий: {len(expired)}")
+            self._notify(expired)
+        return len(expired)
+
+    def start_sweeper(self, interval: float = 60.0):
+        """Периодическое удаление просроченных сессий в фоновом потоке"""
+        if self._sweeper is not None:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                self.evict_expired()
+
+        self._sweeper = threading.Thread(target=worker, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self):
+        """Остановка фонового потока"""
+        self._stop.set()
@@ -1,47 +1,40 @@
 #!/usr/bin/env python3
 """
-Создание правильного users.json с MD5 хэшами
+Создание правильного users.json с хэшами паролей (scrypt с солью)
+
+Тонкая обертка над import_users.py: семь учетных записей по умолчанию,
+пароль совпадает с логином, существующий файл заменяется.
 """
 
-import json
-import hashlib
+from import_users import JSONSink, run_import
+from storage.config_manager import ConfigManager
 
-# Пользователи с их ролями
+# Пользователи с их ролями (имена ролей как в config.yaml)
 users_data = [
-    {"username": "sysadmin", "role": "SYSADMIN"},
-    {"username": "admin", "role": "ADMIN"},
-    {"username": "manager", "role": "MANAGER"},
-    {"username": "designer", "role": "DESIGNER"},
-    {"username": "developer", "role": "DEVELOPER"},
-    {"username": "analyst", "role": "ANALYST"},
-    {"username": "guest", "role": "GUEST"}
+    {"username": "sysadmin", "role": "sysadmin"},
+    {"username": "admin", "role": "admin"},
+    {"username": "manager", "role": "manager"},
+    {"username": "designer", "role": "designer"},
+    {"username": "developer", "role": "developer"},
+    {"username": "analyst", "role": "analyst"},
+    {"username": "guest", "role": "guest"}
 ]
 
-# Создаем полные записи с MD5 хэшами
-final_users = []
-for user in users_data:
-    username = user["username"]
-    # Пароль = логин, хэшируем в MD5
-    password_hash = hashlib.md5(username.encode('utf-8')).hexdigest()
-
-    final_users.append({
-        "username": username,
-        "password_hash": password_hash,
-        "role": user["role"]
-    })
+if __name__ == "__main__":
+    config = ConfigManager()
+    roles = frozenset(config.snapshot.roles)
 
-# Сохраняем в файл
-with open('users.json', 'w', encoding='utf-8') as f:
-    json.dump(final_users, f, indent=2, ensure_ascii=False)
+    # Пароль = логин
+    records = (dict(user, password=user["username"]) for user in users_data)
+    result = run_import(records, JSONSink('users.json', replace=True), roles,
+                        scheme=config.get_password_config()['scheme'], progress=False)
 
-print("✅ users.json создан с правильными MD5 хэшами!")
-print("\nЛогины и пароли (пароль совпадает с логином):")
-print("-" * 50)
-for user in final_users:
-    print(f"  {user['username']:12} / {user['username']:12}")
-    print(f"    Хэш MD5: {user['password_hash']}")
-    print()
+    print(f"✅ users.json создан с хэшами паролей! (пользователей: {result['imported']})")
+    print("\nЛогины и пароли (пароль совпадает с логином):")
+    print("-" * 50)
+    for user in users_data:
+        print(f"  {user['username']:12} / {user['username']:12} ({user['role']})")
 
-print("\nПример для входа:")
-print("  Логин: manager")
-print("  Пароль: manager")
\ No newline at end of file
+    print("\nПример для входа:")
+    print("  Логин: manager")
+    print("  Пароль: manager")
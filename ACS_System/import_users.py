@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Массовый импорт пользователей из CSV, JSONL или JSON
+
+Примеры:
+    python import_users.py users.csv
+    python import_users.py users.jsonl --output sqlite --workers 8
+    python import_users.py users.csv --resume
+
+Поля записи: username, role и password (открытый пароль, хэшируется)
+или password_hash (готовый хэш). Роли проверяются по config.yaml.
+
+Записи читаются потоком и хэшируются пачками в пуле процессов. В базу
+SQLite пачки пишутся отдельными транзакциями; для users.json записи
+накапливаются во временном файле, который в конце атомарно собирается с
+существующими пользователями. После каждой пачки сохраняется контрольная
+точка, и прерванный импорт продолжается с --resume.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from core.models import User
+from core.passwords import DEFAULT_SCHEME, hash_password, identify
+from storage.config_manager import ConfigManager
+from storage.json_stream import iter_json_array
+from utils.file_streams import DURABILITY_FILE, atomic_write
+
+CHUNK_SIZE = 100
+MAX_ERRORS_SHOWN = 20
+
+# (username, password, password_hash, role)
+Record = Tuple[str, Optional[str], Optional[str], str]
+
+
+class MalformedRecord:
+    """Строка входного файла, которую не удалось разобрать"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    """Записи входного файла по одной (неразобранные строки JSONL - MalformedRecord)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        elif fmt == 'jsonl':
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    # Ошибка одной строки не прерывает импорт: запись считается ошибочной
+                    yield MalformedRecord(f"некорректный JSON: {e}")
+        else:
+            yield from iter_json_array(f)
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    return {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(suffix, 'json')
+
+
+def validate(data, roles: frozenset) -> Tuple[Optional[Record], Optional[str]]:
+    """Проверка записи: (запись, None) или (None, описание ошибки)"""
+    if isinstance(data, MalformedRecord):
+        return None, data.error
+    if not isinstance(data, dict):
+        return None, "запись должна быть объектом"
+
+    username = str(data.get('username') or "").strip()
+    role = str(data.get('role') or "").strip()
+    password = data.get('password') or None
+    password_hash = data.get('password_hash') or None
+
+    if not username:
+        return None, "не указан username"
+    if role not in roles:
+        return None, f"{username}: неизвестная роль {role!r}"
+    if password is None and password_hash is None:
+        return None, f"{username}: не указан password или password_hash"
+    if password_hash is not None and identify(password_hash) is None:
+        return None, f"{username}: неизвестный формат password_hash"
+    return (username, password, password_hash, role), None
+
+
+def hash_chunk(records: List[Record], scheme: str) -> List[Tuple[str, str, str]]:
+    """Хэширование пачки записей (выполняется в процессе пула)"""
+    return [
+        (username, password_hash or hash_password(str(password), scheme), role)
+        for username, password, password_hash, role in records
+    ]
+
+
+class Checkpoint:
+    """Контрольная точка: сколько входных записей уже импортировано"""
+
+    def __init__(self, path: str, source: str, output: str):
+        self.path = Path(path)
+        st = os.stat(source)
+        # Продолжать можно только тот же входной файл в тот же приемник
+        self.key = [os.path.abspath(source), st.st_size, st.st_mtime_ns, output]
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if data.get('key') == self.key else {}
+
+    def save(self, consumed: int, position: Optional[int]):
+        state = {'key': self.key, 'consumed': consumed, 'position': position}
+        atomic_write(str(self.path), json.dumps(state), durability=DURABILITY_FILE)
+
+    def remove(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteSink:
+    """Запись в базу SQLite: одна транзакция на пачку"""
+
+    def __init__(self, db_file: str):
+        from storage.sqlite_user_repository import SQLiteUserRepository
+        self.repo = SQLiteUserRepository(db_file=db_file)
+        self.target = db_file
+
+    def open(self, position: Optional[int]):
+        pass
+
+    def write(self, rows: List[Tuple[str, str, str]]) -> int:
+        users = (User(username=username, password_hash=password_hash, role=role)
+                 for username, password_hash, role in rows)
+        return self.repo.import_users(users, batch_size=len(rows) or 1)
+
+    def position(self) -> Optional[int]:
+        return None
+
+    def finish(self):
+        self.repo.close()
+
+
+class JSONSink:
+    """
+    Запись в users.json. Импортированные записи дописываются во временный
+    файл (JSON по строкам), в конце файл пользователей атомарно собирается
+    из существующих и новых записей. Повторы ищутся по именам во временной
+    базе SQLite на диске, поэтому память не растет с числом записей.
+    """
+
+    def __init__(self, users_file: str, replace: bool = False):
+        self.users_file = users_file
+        self.partial_file = f"{users_file}.import"
+        self.replace = replace
+        self.target = users_file
+        self._partial = None
+        # Временная база на диске: имена импортированных пользователей
+        self._imported = sqlite3.connect("")
+        self._imported.execute("CREATE TABLE imported (username TEXT PRIMARY KEY)")
+
+    def _add_imported(self, username: str) -> bool:
+        """Запомнить имя; False - пользователь уже импортирован"""
+        return self._imported.execute("INSERT OR IGNORE INTO imported VALUES (?)", (username,)).rowcount == 1
+
+    def _is_imported(self, username: str) -> bool:
+        return self._imported.execute("SELECT 1 FROM imported WHERE username = ?", (username,)).fetchone() is not None
+
+    def open(self, position: Optional[int]):
+        if position is None:
+            self._partial = open(self.partial_file, 'wb')
+            return
+
+        # Продолжение: записи после контрольной точки отбрасываются
+        with open(self.partial_file, 'r+b') as f:
+            f.truncate(position)
+            f.seek(0)
+            for line in f:
+                self._add_imported(json.loads(line)['username'])
+        self._partial = open(self.partial_file, 'ab')
+
+    def write(self, rows: List[Tuple[str, str, str]]) -> int:
+        written = 0
+        for username, password_hash, role in rows:
+            if not self._add_imported(username):
+                continue
+            record = {'username': username, 'password_hash': password_hash, 'role': role}
+            self._partial.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+            written += 1
+
+        self._partial.flush()
+        os.fsync(self._partial.fileno())
+        return written
+
+    def position(self) -> Optional[int]:
+        return self._partial.tell()
+
+    def _iter_output(self) -> Iterator[str]:
+        """Содержимое нового users.json: существующие записи, затем новые"""
+        yield "["
+        first = True
+
+        if not self.replace and os.path.exists(self.users_file):
+            with open(self.users_file, 'r', encoding='utf-8') as f:
+                for record in iter_json_array(f):
+                    if self._is_imported(record.get('username')):
+                        continue
+                    yield ("\n  " if first else ",\n  ") + json.dumps(record, ensure_ascii=False)
+                    first = False
+
+        with open(self.partial_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield ("\n  " if first else ",\n  ") + line.rstrip("\n")
+                first = False
+
+        yield "\n]\n"
+
+    def finish(self):
+        self._partial.close()
+        atomic_write(self.users_file, self._iter_output(), durability=DURABILITY_FILE)
+        os.unlink(self.partial_file)
+        self._imported.close()
+
+
+def run_import(records: Iterable, sink, roles: frozenset, workers: Optional[int] = None,
+               scheme: str = DEFAULT_SCHEME, checkpoint: Optional[Checkpoint] = None,
+               resume: bool = False, progress: bool = True) -> dict:
+    """Импорт записей в приемник; возвращает итоговую статистику"""
+    state = checkpoint.load() if (checkpoint and resume) else {}
+    skip = state.get('consumed', 0)
+    sink.open(state.get('position') if state else None)
+
+    consumed = skip
+    imported = 0
+    errors: List[str] = []
+    error_count = 0
+    started = time.perf_counter()
+
+    def chunks() -> Iterator[Tuple[List[Record], int]]:
+        """Пачки проверенных записей и число прочитанных входных записей"""
+        nonlocal error_count
+        chunk, read = [], 0
+        for number, data in enumerate(records, 1):
+            if number <= skip:
+                continue
+            read += 1
+            record, error = validate(data, roles)
+            if error:
+                error_count += 1
+                if len(errors) < MAX_ERRORS_SHOWN:
+                    errors.append(f"запись {number}: {error}")
+            else:
+                chunk.append(record)
+
+            if len(chunk) >= CHUNK_SIZE:
+                yield chunk, read
+                chunk, read = [], 0
+        if chunk or read:
+            yield chunk, read
+
+    def complete(future, read):
+        nonlocal consumed, imported
+        imported += sink.write(future.result())
+        consumed += read
+        if checkpoint:
+            checkpoint.save(consumed, sink.position())
+        if progress:
+            print(f"\r📥 Импортировано: {imported} (прочитано {consumed}, ошибок {error_count})",
+                  end="", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Пачки завершаются по порядку: контрольная точка всегда соответствует префиксу входа
+        pending = deque()
+        max_pending = workers * 2
+
+        for chunk, read in chunks():
+            pending.append((executor.submit(hash_chunk, chunk, scheme), read))
+            if len(pending) >= max_pending:
+                complete(*pending.popleft())
+
+        while pending:
+            complete(*pending.popleft())
+    except BaseException:
+        # При прерывании не ждем оставшиеся пачки - их повторит --resume
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    sink.finish()
+    if checkpoint:
+        checkpoint.remove()
+    if progress:
+        print(file=sys.stderr)
+
+    return {
+        'imported': imported,
+        'read': consumed,
+        'errors': error_count,
+        'error_samples': errors,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт пользователей")
+    parser.add_argument("input", help="файл CSV, JSONL или JSON-массив")
+    parser.add_argument("--format", choices=["csv", "jsonl", "json"], help="формат (по расширению файла)")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--output", choices=["json", "sqlite"], help="приемник (по умолчанию из config.yaml)")
+    parser.add_argument("--users", help="файл пользователей JSON")
+    parser.add_argument("--db", help="файл базы SQLite")
+    parser.add_argument("--replace", action="store_true", help="заменить существующих пользователей (только json)")
+    parser.add_argument("--workers", type=int, help="процессов для хэширования")
+    parser.add_argument("--scheme", help="схема хэширования (по умолчанию из config.yaml)")
+    parser.add_argument("--checkpoint", help="файл контрольной точки (по умолчанию <вход>.checkpoint)")
+    parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    storage = config.get_user_storage_config()
+    output = args.output or storage['backend']
+    scheme = args.scheme or config.get_password_config()['scheme']
+    roles = frozenset(config.snapshot.roles)
+
+    if output == 'sqlite':
+        if args.replace:
+            print("❌ --replace поддерживается только для users.json")
+            sys.exit(1)
+        sink = SQLiteSink(args.db or storage['users_db'])
+    else:
+        sink = JSONSink(args.users or storage['users_file'], args.replace)
+
+    try:
+        checkpoint = Checkpoint(args.checkpoint or f"{args.input}.checkpoint", args.input, sink.target)
+        records = read_records(args.input, args.format or detect_format(args.input))
+        result = run_import(records, sink, roles, args.workers, scheme, checkpoint, args.resume)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Ошибка импорта: {e}")
+        print("   Повторите запуск с --resume, чтобы продолжить с контрольной точки")
+        sys.exit(1)
+
+    print(f"✅ Импортировано: {result['imported']} из {result['read']} записей за {result['seconds']} с")
+    print(f"   Приемник: {sink.target}")
+    if result['errors']:
+        print(f"⚠️ Пропущено записей с ошибками: {result['errors']}")
+        for error in result['error_samples']:
+            print(f"   - {error}")
+
+
+if __name__ == "__main__":
+    main()
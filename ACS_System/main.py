@@ -7,13 +7,38 @@
 import os
 import sys
 import json
-import hashlib
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
+from core.passwords import hash_password, needs_rehash, verify_password
+from storage.config_manager import ConfigManager
+from storage.user_repository import open_user_repository
+from utils.file_streams import DURABILITY_FILE, atomic_write, iter_lines
+from utils.listing import iter_sorted, take_page
+from utils.metrics import format_summary, get_registry
+from utils.provisioning import WorkspaceProvisioner
+from utils.search import SearchIndex
+from utils.workspace_index import WorkspaceIndex
+from utils.workspace_stats import WorkspaceStats
+
 # ========== КОНФИГУРАЦИЯ ==========
-USERS_FILE = "users.json"
+CONFIG_FILE = "config.yaml"  # system.user_storage: users.json или база SQLite (migrate_users.py)
+LOGIN_USERS_SHOWN = 20
 WORKSPACE_ROOT = "workspace"
+INDEX_FILE = "workspace_index.json"
+STATS_FILE = "workspace_stats.json"
+STATS_EXPORT_FILE = "workspace_stats_export.json"
+METRICS_FILE = "metrics.prom"
+SEARCH_INDEX_FILE = "search_index.json"
+SEARCH_RESULTS = 20
+PROVISION_MANIFEST = "workspace_manifest.json"
+PROVISION_WORKERS = 8
+PROVISION_PROGRESS_MIN = 1000
+PAGE_SIZE = 20
+PAGE_LINES = 40
+WRITE_DURABILITY = DURABILITY_FILE
 
 # Папки для каждой роли
 ROLE_FOLDERS = {
@@ -26,6 +51,36 @@ ROLE_FOLDERS = {
     "guest": ["shared"]
 }
 
+# Тестовые файлы системных папок
+SAMPLE_FILES = {
+    "reports": [
+        ("monthly_report.txt", "Отчет за месяц\nПрибыль: 1,500,000 руб.\n"),
+        ("sales.csv", "Дата,Товар,Количество,Сумма\n2024-01-15,Товар А,100,500000\n")
+    ],
+    "design": [
+        ("prototype.fig", "Прототип сайта компании\n"),
+        ("styles.css", "/* Основные стили */\nbody { font-family: Arial; }\n")
+    ],
+    "code": [
+        ("main.py", "#!/usr/bin/env python3\nprint('Hello ACS System!')\n"),
+        ("config.json", '{"version": "1.0", "debug": true}\n')
+    ],
+    "shared": [
+        ("welcome.txt", "Добро пожаловать в общую папку!\n"),
+        ("contacts.txt", "IT поддержка: 1111\nБухгалтерия: 2222\n")
+    ]
+}
+
+# Названия пунктов меню для метрик
+MENU_ACTIONS = {
+    "1": "show_files", "2": "read_file", "3": "edit_file", "4": "create_file",
+    "5": "delete_file", "6": "system_info", "7": "logout", "8": "export_stats",
+    "9": "metrics", "10": "search", "0": "exit",
+}
+
+# Роли, которым доступны метрики и статистика всего workspace (как stats сервера)
+STATS_ROLES = ("sysadmin", "admin")
+
 # Права для каждой роли
 ROLE_PERMISSIONS = {
     "sysadmin": ["read", "write", "delete", "list"],
@@ -50,95 +105,172 @@ class User:
 class ACSystem:
     def __init__(self):
         self.current_user = None
+        self.index = None
+        self.stats = None
+        self.search = None
+        self.metrics = get_registry()
+        self.config = ConfigManager(CONFIG_FILE)
         self.load_users()
+
+    def prepare_workspace(self):
+        """Подготовка workspace после входа (не задерживает приглашение)"""
+        # Отметка пользователей проверяется при каждом входе: новые получат папки
         self.setup_workspace()
+        if self.index is not None:
+            return
+
+        # Индекс файлов и статистика, которая ведется по его событиям
+        self.index = WorkspaceIndex(WORKSPACE_ROOT, INDEX_FILE)
+        self.stats = WorkspaceStats(STATS_FILE).load()
+        self.stats.attach(self.index)
+        # Поиск получает события индекса; очередь файлов разбирается в фоновом потоке
+        self.search = SearchIndex(WORKSPACE_ROOT, SEARCH_INDEX_FILE).load()
+        self.search.attach(self.index)
+        self.index.load()
+        self.stats.verify(self.index)
+        self.search.sync(self.index)
+        self.search.start_sync(self.index, 0)
+        self.stats.start_reconciliation(self.index, self.config.get_stats_reconcile_interval())
 
     def load_users(self):
-        """Загрузка пользователей из JSON"""
+        """Загрузка пользователей из JSON или открытие базы SQLite (system.user_storage)"""
+        self.users = {}
+        self.user_db = None
+        self.users_state = None
+        storage = self.config.get_user_storage_config()
+        self.users_file = storage['users_file']
+        self.users_db_file = storage['users_db']
         try:
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
+            if storage['backend'] != 'json':
+                # Пользователи читаются из базы по требованию
+                self.user_db = open_user_repository(self.config, None)
+                print(f"✅ База пользователей: {self.users_db_file} ({self.user_db.count()} пользователей)")
+                return
 
-            self.users = {}
-            for user_data in users_data:
+            self.users_state = self.users_file_state()
+            self.users = self.read_users()
+            print(f"✅ Загружено {len(self.users)} пользователей")
+        except Exception as e:
+            print(f"❌ Ошибка загрузки пользователей: {e}")
+            sys.exit(1)
+
+    def users_file_state(self):
+        """Время модификации и размер users.json"""
+        st = os.stat(self.users_file)
+        return st.st_mtime_ns, st.st_size
+
+    def read_users(self):
+        """Чтение users.json; неизмененные записи переиспользуются"""
+        with open(self.users_file, 'r', encoding='utf-8') as f:
+            users_data = json.load(f)
+
+        users = {}
+        for user_data in users_data:
+            user = self.users.get(user_data['username'])
+            if (user is None or user.password_hash != user_data['password_hash']
+                    or user.role != user_data['role']):
                 user = User(
                     username=user_data['username'],
                     password_hash=user_data['password_hash'],
                     role=user_data['role']
                 )
-                self.users[user.username] = user
+            users[user.username] = user
+        return users
 
-            print(f"✅ Загружено {len(self.users)} пользователей")
-        except Exception as e:
-            print(f"❌ Ошибка загрузки users.json: {e}")
-            sys.exit(1)
+    def reload_users(self):
+        """Перечитывание users.json, если файл изменился после загрузки"""
+        if self.user_db is not None:
+            self.user_db.reload()
+            return
 
-    def setup_workspace(self):
-        """Настройка рабочей директории"""
-        os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+        try:
+            state = self.users_file_state()
+            if state == self.users_state:
+                return
+
+            users = self.read_users()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Не удалось перечитать {self.users_file}: {e}")
+            return
+
+        added = len(users.keys() - self.users.keys())
+        removed = len(self.users.keys() - users.keys())
+        # Новый словарь подменяет старый целиком
+        self.users = users
+        self.users_state = state
+        print(f"🔄 Пользователи обновлены (добавлено: {added}, удалено: {removed})")
+
+    def get_user(self, username):
+        """Пользователь по имени"""
+        if self.user_db is not None:
+            return self.user_db.get_user(username)
+        return self.users.get(username)
+
+    def iter_users(self):
+        """Перебор всех пользователей"""
+        if self.user_db is not None:
+            return self.user_db.iter_users()
+        return iter(list(self.users.values()))
+
+    def count_users(self):
+        if self.user_db is not None:
+            return self.user_db.count()
+        return len(self.users)
+
+    def users_stamp(self):
+        """Отметка источника пользователей: время модификации и размер файлов"""
+        paths = [self.users_db_file, self.users_db_file + "-wal"] if self.user_db is not None else [self.users_file]
+        stamp = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stamp.append([st.st_mtime_ns, st.st_size])
+            except FileNotFoundError:
+                stamp.append(None)
+        return stamp
 
-        # Создаем системные папки
+    def setup_workspace(self):
+        """Настройка рабочей директории (пропускается, если ничего не изменилось)"""
         all_folders = set()
         for folders in ROLE_FOLDERS.values():
             all_folders.update(folders)
 
-        for folder in all_folders:
-            os.makedirs(f"{WORKSPACE_ROOT}/{folder}", exist_ok=True)
-
-        # Создаем личные папки
-        for username in self.users.keys():
-            os.makedirs(f"{WORKSPACE_ROOT}/user_{username}", exist_ok=True)
-
-        # Создаем тестовые файлы
-        self.create_sample_files()
-
-    def create_sample_files(self):
-        """Создание тестовых файлов"""
-        sample_files = {
-            "reports": [
-                ("monthly_report.txt", "Отчет за месяц\nПрибыль: 1,500,000 руб.\n"),
-                ("sales.csv", "Дата,Товар,Количество,Сумма\n2024-01-15,Товар А,100,500000\n")
-            ],
-            "design": [
-                ("prototype.fig", "Прототип сайта компании\n"),
-                ("styles.css", "/* Основные стили */\nbody { font-family: Arial; }\n")
-            ],
-            "code": [
-                ("main.py", "#!/usr/bin/env python3\nprint('Hello ACS System!')\n"),
-                ("config.json", '{"version": "1.0", "debug": true}\n')
-            ],
-            "shared": [
-                ("welcome.txt", "Добро пожаловать в общую папку!\n"),
-                ("contacts.txt", "IT поддержка: 1111\nБухгалтерия: 2222\n")
-            ]
-        }
-
-        for folder, files in sample_files.items():
-            for filename, content in files:
-                filepath = f"{WORKSPACE_ROOT}/{folder}/{filename}"
-                if not os.path.exists(filepath):
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        f.write(content)
-
-        # Создаем личные файлы для пользователей
-        for username in self.users.keys():
-            filepath = f"{WORKSPACE_ROOT}/user_{username}/readme.txt"
-            if not os.path.exists(filepath):
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(f"Личная папка пользователя {username}\n")
-                    f.write(f"Роль: {self.users[username].role}\n")
-                    f.write("Здесь вы можете создавать свои файлы.\n")
+        def report(done, total):
+            if total >= PROVISION_PROGRESS_MIN:
+                print(f"\r📁 Подготовка личных папок: {done}/{total}", end="" if done < total else "\n")
+
+        provisioner = WorkspaceProvisioner(WORKSPACE_ROOT, PROVISION_MANIFEST, PROVISION_WORKERS, report)
+        provisioner.provision(
+            all_folders,
+            SAMPLE_FILES,
+            users=lambda: ((user.username, user.role) for user in self.iter_users()),
+            users_stamp=self.users_stamp(),
+            user_files=self.personal_files,
+        )
+
+    @staticmethod
+    def personal_files(username, role):
+        """Файлы личной папки нового пользователя"""
+        return [("readme.txt",
+                 f"Личная папка пользователя {username}\n"
+                 f"Роль: {role}\n"
+                 "Здесь вы можете создавать свои файлы.\n")]
 
     def login(self):
         """Вход в систему"""
+        self.reload_users()
+
         print("\n" + "=" * 60)
         print("СИСТЕМА УПРАВЛЕНИЯ ДОСТУПОМ".center(60))
         print("=" * 60)
 
         print("\n👥 ДОСТУПНЫЕ ПОЛЬЗОВАТЕЛИ (пароль = логин):")
         print("-" * 50)
-        for username, user in self.users.items():
-            print(f"  {username:12} - {user.role}")
+        for user in islice(self.iter_users(), LOGIN_USERS_SHOWN):
+            print(f"  {user.username:12} - {user.role}")
+        total = self.count_users()
+        if total > LOGIN_USERS_SHOWN:
+            print(f"  ... и еще {total - LOGIN_USERS_SHOWN}")
         print("-" * 50)
 
         attempts = 3
@@ -147,13 +279,15 @@ class ACSystem:
             username = input("👤 Логин: ").strip()
             password = input("🔒 Пароль: ").strip()
 
-            if username in self.users:
-                user = self.users[username]
-                # Проверяем пароль (MD5 хэш)
-                input_hash = hashlib.md5(password.encode()).hexdigest()
-
-                if input_hash == user.password_hash:
+            started = time.perf_counter()
+            user = self.get_user(username)
+            verified = user is not None and verify_password(password, user.password_hash)
+            self.metrics.observe('acs_auth_seconds', time.perf_counter() - started,
+                                 role=user.role if user else "", outcome="allow" if verified else "deny")
+            if user is not None:
+                if verified:
                     self.current_user = user
+                    self.upgrade_password_hash(user, password)
                     print(f"\n✅ УСПЕШНЫЙ ВХОД!")
                     print(f"   Пользователь: {username}")
                     print(f"   Роль: {user.role}")
@@ -168,6 +302,31 @@ class ACSystem:
         print("\n🚫 Доступ запрещен!")
         return False
 
+    def upgrade_password_hash(self, user, password):
+        """Перехэширование устаревшего MD5-хэша после успешного входа"""
+        if not needs_rehash(user.password_hash):
+            return
+
+        try:
+            password_hash = hash_password(password)
+            if self.user_db is not None:
+                self.user_db.update_password_hash(user.username, password_hash)
+                return
+
+            user.password_hash = password_hash
+            self.save_users()
+        except Exception as e:
+            print(f"⚠️ Не удалось обновить хэш пароля: {e}")
+
+    def save_users(self):
+        """Сохранение пользователей в JSON (атомарная замена файла)"""
+        users_data = [
+            {'username': user.username, 'password_hash': user.password_hash, 'role': user.role}
+            for user in self.users.values()
+        ]
+        atomic_write(self.users_file, json.dumps(users_data, indent=2, ensure_ascii=False))
+        self.users_state = self.users_file_state()
+
     def can_do(self, action):
         """Проверка прав"""
         return action in ROLE_PERMISSIONS.get(self.current_user.role, [])
@@ -176,64 +335,68 @@ class ACSystem:
         """Получить список доступных файлов"""
         files = []
 
-        # Личная папка
-        user_folder = f"{WORKSPACE_ROOT}/user_{self.current_user.username}"
-        if os.path.exists(user_folder):
-            for filename in os.listdir(user_folder):
-                filepath = os.path.join(user_folder, filename)
-                if os.path.isfile(filepath):
-                    files.append({
-                        'path': filepath,
-                        'name': filename,
-                        'folder': f"user_{self.current_user.username}",
-                        'type': 'personal'
-                    })
-
-        # Системные папки
-        folders = ROLE_FOLDERS.get(self.current_user.role, [])
-        for folder in folders:
-            folder_path = f"{WORKSPACE_ROOT}/{folder}"
-            if os.path.exists(folder_path):
-                for filename in os.listdir(folder_path):
-                    filepath = os.path.join(folder_path, filename)
-                    if os.path.isfile(filepath):
-                        files.append({
-                            'path': filepath,
-                            'name': filename,
-                            'folder': folder,
-                            'type': 'system'
-                        })
+        # Личная папка и системные папки
+        for folder in self.get_accessible_folders():
+            for entry in self.index.iter_folder(folder):
+                files.append(self._entry_to_file(entry))
 
         return files
 
+    def get_accessible_folders(self):
+        """Папки пользователя: личная и системные по роли"""
+        folders = [f"user_{self.current_user.username}"] + ROLE_FOLDERS.get(self.current_user.role, [])
+
+        # Индекс пересканирует только папки с изменившимся mtime
+        self.index.refresh(folders)
+        return folders
+
+    def _entry_to_file(self, entry):
+        """Запись индекса в формате списка файлов"""
+        return {
+            'path': os.path.join(WORKSPACE_ROOT, entry.folder, entry.name),
+            'name': entry.name,
+            'folder': entry.folder,
+            'size': entry.size,
+            'type': 'personal' if entry.folder.startswith("user_") else 'system'
+        }
+
     def show_files(self):
-        """Показать доступные файлы"""
+        """Показать доступные файлы (постранично)"""
         if not self.can_do("list"):
             print("❌ Нет прав на просмотр файлов")
             return []
 
-        files = self.get_accessible_files()
+        folders = self.get_accessible_folders()
+        total = sum(self.index.count(folder) for folder in folders)
 
-        if not files:
+        if not total:
             print("\n📭 Нет доступных файлов")
             return []
 
-        print(f"\n📁 ДОСТУПНЫЕ ФАЙЛЫ ({len(files)} шт.):")
+        print(f"\n📁 ДОСТУПНЫЕ ФАЙЛЫ ({total} шт.):")
         print("-" * 60)
 
-        # Группируем по папкам
-        folders = {}
-        for file in files:
-            folder = file['folder']
-            if folder not in folders:
-                folders[folder] = []
-            folders[folder].append(file)
+        # Страницы продолжаются от ключа (папка, имя) по упорядоченным снимкам индекса
+        files = []
+        current_folder = None
+        last_key = None
+        while True:
+            page, last_key = take_page(iter_sorted(self.index, folders, 'folder', after=last_key),
+                                       PAGE_SIZE, sort_by='folder')
 
-        for folder, folder_files in folders.items():
-            print(f"\n📂 {folder}/:")
-            for i, file in enumerate(folder_files, 1):
-                size = os.path.getsize(file['path'])
-                print(f"  {i:2}. 📄 {file['name']} ({size} байт)")
+            for entry in page:
+                if entry.folder != current_folder:
+                    current_folder = entry.folder
+                    print(f"\n📂 {current_folder}/:")
+                files.append(self._entry_to_file(entry))
+                print(f"  {len(files):2}. 📄 {entry.name} ({entry.size} байт)")
+
+            if last_key is None:
+                break
+
+            answer = input(f"\n↵ Enter - следующая страница, q - достаточно ({len(files)}/{total}): ")
+            if answer.strip().lower() == "q":
+                break
 
         return files
 
@@ -257,12 +420,9 @@ class ACSystem:
             if 0 <= index < len(files):
                 file = files[index]
 
-                with open(file['path'], 'r', encoding='utf-8') as f:
-                    content = f.read()
-
                 print(f"\n📖 СОДЕРЖИМОЕ: {file['folder']}/{file['name']}")
                 print("=" * 60)
-                print(content)
+                self.view_file(file['path'])
                 print("=" * 60)
             else:
                 print("❌ Неверный номер файла")
@@ -270,6 +430,64 @@ class ACSystem:
         except Exception as e:
             print(f"❌ Ошибка: {e}")
 
+    def view_file(self, path):
+        """Постраничный вывод файла без загрузки целиком"""
+        lines = iter_lines(path)
+        page = list(islice(lines, PAGE_LINES))
+        shown = 0
+
+        while page:
+            for line in page:
+                print(line.rstrip("\r\n"))
+            shown += len(page)
+
+            page = list(islice(lines, PAGE_LINES))
+            if page:
+                answer = input(f"-- Enter - далее, q - закрыть (строк: {shown}) -- ")
+                if answer.strip().lower() == "q":
+                    break
+
+    def search_files(self):
+        """Полнотекстовый поиск по доступным файлам"""
+        if not self.can_do("read"):
+            print("❌ Нет прав на чтение")
+            return
+
+        print('\n🔍 Слова через пробел, "фраза в кавычках", префикс*')
+        query = input("Запрос: ").strip()
+        if not query:
+            return
+
+        # Только папки роли и личная папка; обновление индекса дает события поиску
+        folders = self.get_accessible_folders()
+        if self.search.pending() > SEARCH_RESULTS:
+            print(f"⏳ Индексирование файлов: {self.search.pending()}, результаты могут быть неполными")
+        hits = self.search.search(query, folders, SEARCH_RESULTS)
+
+        if not hits:
+            print("\n📭 Ничего не найдено")
+            return
+
+        print(f"\n🔍 НАЙДЕНО ({len(hits)}):")
+        print("-" * 60)
+        for i, hit in enumerate(hits, 1):
+            print(f"{i:2}. 📄 {hit.folder}/{hit.name}")
+            if hit.snippet:
+                print(f"      {hit.snippet}")
+
+        choice = input(f"\nОткрыть файл (1-{len(hits)}, Enter - назад): ").strip()
+        if not choice:
+            return
+        if not choice.isdigit() or not 1 <= int(choice) <= len(hits):
+            print("❌ Неверный номер файла")
+            return
+
+        hit = hits[int(choice) - 1]
+        print(f"\n📖 СОДЕРЖИМОЕ: {hit.folder}/{hit.name}")
+        print("=" * 60)
+        self.view_file(os.path.join(WORKSPACE_ROOT, hit.folder, hit.name))
+        print("=" * 60)
+
     def edit_file(self):
         """Редактирование файла"""
         if not self.can_do("write"):
@@ -339,9 +557,9 @@ class ACSystem:
                     print("❌ Содержимое не может быть пустым")
                     return
 
-                # Сохраняем
-                with open(file['path'], 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                # Сохраняем (атомарная подмена файла)
+                atomic_write(file['path'], new_content, WRITE_DURABILITY)
+                self.index.update_file(file['path'])
 
                 print(f"\n✅ Файл успешно отредактирован!")
 
@@ -425,9 +643,9 @@ class ACSystem:
                     content += f"Пользователь: {self.current_user.username}\n"
                     content += f"Роль: {self.current_user.role}\n"
 
-                # Создаем файл
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                # Создаем файл (атомарная подмена файла)
+                atomic_write(filepath, content, WRITE_DURABILITY)
+                self.index.update_file(filepath, owner=self.current_user.username)
 
                 print(f"\n✅ Файл успешно создан!")
                 print(f"   Путь: {os.path.relpath(filepath, WORKSPACE_ROOT)}")
@@ -482,6 +700,7 @@ class ACSystem:
 
                 if confirm == "УДАЛИТЬ":
                     os.remove(file['path'])
+                    self.index.remove_file(file['path'])
                     print(f"\n✅ Файл успешно удален!")
                 else:
                     print("❌ Удаление отменено")
@@ -506,6 +725,9 @@ class ACSystem:
         print("5. 🗑️  Удалить файл")
         print("6. ℹ️  Информация о системе")
         print("7. 👋 Выйти из системы")
+        print("8. 📊 Экспорт статистики (JSON)")
+        print("9. 📈 Метрики производительности")
+        print("10. 🔍 Поиск по файлам")
         print("0. ❌ Завершить программу")
 
     def show_system_info(self):
@@ -525,25 +747,63 @@ class ACSystem:
         for folder in ROLE_FOLDERS.get(self.current_user.role, []):
             print(f"  • {folder}/")
 
-        # Статистика
-        total_files = 0
-        for root, dirs, files in os.walk(WORKSPACE_ROOT):
-            total_files += len(files)
+        # Статистика (счетчики ведутся инкрементально)
+        total = self.stats.total()
+        personal = self.stats.users.get(self.current_user.username)
 
-        print(f"\n📊 Всего файлов в системе: {total_files}")
+        print(f"\n📊 Всего файлов в системе: {total.files}")
+        print(f"📦 Общий объем: {total.bytes} байт")
+        if personal is not None:
+            print(f"🗂️  Ваших файлов: {personal.files} ({personal.bytes} байт)")
         print(f"💾 Рабочая директория: {WORKSPACE_ROOT}/")
         print("=" * 60)
 
+    def show_metrics(self):
+        """Задержки операций и объем ввода-вывода за время работы"""
+        if self.current_user.role not in STATS_ROLES:
+            print("❌ Метрики доступны только администраторам")
+            return
+
+        summary = self.metrics.summary()
+        print(f"\n{'=' * 60}")
+        print(f"📈 МЕТРИКИ (за {summary['uptime']} с)")
+        print("=" * 60)
+        for line in format_summary(summary):
+            print(line)
+
+        try:
+            self.metrics.write_prometheus(METRICS_FILE)
+            print(f"\n💾 Формат Prometheus: {os.path.abspath(METRICS_FILE)}")
+        except OSError as e:
+            print(f"❌ Ошибка записи метрик: {e}")
+
+    def export_stats(self):
+        """Экспорт статистики workspace в JSON (не администраторам - только по своим папкам)"""
+        folders = users = None
+        if self.current_user.role not in STATS_ROLES:
+            folders = self.get_accessible_folders()
+            users = [self.current_user.username]
+
+        try:
+            path = self.stats.export_json(STATS_EXPORT_FILE, folders, users)
+            print(f"\n✅ Статистика сохранена: {path}")
+        except OSError as e:
+            print(f"❌ Ошибка: {e}")
+
     def run(self):
         """Запуск системы"""
         if not self.login():
             return
 
+        self.prepare_workspace()
+
         while True:
             try:
                 self.show_menu()
-                choice = input("\nВыберите действие (0-7): ").strip()
+                choice = input("\nВыберите действие (0-10): ").strip()
 
+                # Только счетчик: обработчики ждут ввода пользователя, их время не показательно
+                self.metrics.inc('acs_menu_actions_total', action=MENU_ACTIONS.get(choice, "invalid"))
                 if choice == "1":
                     self.show_files()
                 elif choice == "2":
@@ -560,6 +820,12 @@ class ACSystem:
                     print(f"\n👋 Выход из системы...")
                     self.current_user = None
                     return True  # Вернуться к логину
+                elif choice == "8":
+                    self.export_stats()
+                elif choice == "9":
+                    self.show_metrics()
+                elif choice == "10":
+                    self.search_files()
                 elif choice == "0":
                     print(f"\n❌ Завершение работы...")
                     return False  # Завершить программу
@@ -594,6 +860,17 @@ def main():
             print(f"\n❌ Критическая ошибка: {e}")
             break
 
+    if system.index is not None:
+        system.index.close()
+        system.stats.close()
+        system.search.close()
+    if system.user_db is not None:
+        system.user_db.close()
+    try:
+        system.metrics.write_prometheus(METRICS_FILE)
+    except OSError:
+        pass
+
     print("\n✅ Работа системы завершена")
     print(f"📁 Все файлы сохранены в папке '{WORKSPACE_ROOT}/'")
     input("\n↵ Нажмите Enter для выхода...")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Перенос пользователей из users.json в базу SQLite
+
+Примеры:
+    python migrate_users.py
+    python migrate_users.py --users users.json --db users.db
+
+После переноса укажите в config.yaml:
+    user_storage:
+      backend: "sqlite"
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from core.models import User
+from storage.config_manager import ConfigManager
+from storage.sqlite_user_repository import IMPORT_BATCH_SIZE, SQLiteUserRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос пользователей из JSON в SQLite")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--users", help="файл пользователей JSON (по умолчанию из config.yaml)")
+    parser.add_argument("--db", help="файл базы SQLite (по умолчанию из config.yaml)")
+    parser.add_argument("--batch", type=int, default=IMPORT_BATCH_SIZE, help="пользователей в транзакции")
+    args = parser.parse_args()
+
+    storage = ConfigManager(args.config).get_user_storage_config()
+    users_file = args.users or storage['users_file']
+    db_file = args.db or storage['users_db']
+
+    try:
+        with open(users_file, 'r', encoding='utf-8') as f:
+            users_data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Ошибка чтения {users_file}: {e}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    repo = SQLiteUserRepository(db_file=db_file)
+    try:
+        users = (
+            User(username=item['username'], password_hash=item['password_hash'], role=item['role'])
+            for item in users_data
+        )
+        imported = repo.import_users(users, args.batch)
+        total = repo.count()
+    finally:
+        repo.close()
+
+    print(f"✅ Перенесено пользователей: {imported} за {time.perf_counter() - started:.2f} с")
+    print(f"   База: {db_file} (всего пользователей: {total})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Серверный режим системы управления доступом
+
+Один процесс обслуживает множество одновременных сессий по локальному
+сокету (TCP на loopback или Unix socket). Протокол - JSON по строкам:
+каждый запрос и ответ занимает одну строку.
+
+    запрос:  {"id": 1, "op": "login", "username": "admin", "password": "admin"}
+    ответ:   {"id": 1, "ok": true, "result": {...}}
+    ошибка:  {"id": 1, "ok": false, "error": "..."}
+
+Операции: login, logout, list, read, write, delete, search, stats, ping.
+stats (метрики процесса) доступна только ролям STATS_ROLES.
+login возвращает токен сессии; запросы с полем "token" могут приходить
+по любому подключению, без повторной аутентификации.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Optional
+
+from core.acl import AccessController
+from core.async_auth import AsyncAuthenticator
+from core.auth import Authenticator
+from core.models import UserSession
+from core.passwords import PasswordVerifier
+from core.sessions import SessionStore
+from storage.config_manager import ConfigManager
+from storage.user_repository import open_user_repository
+from utils.async_executor import OperationLimiter, get_shared_executor, shutdown_shared_executor
+from utils.async_file_operations import AsyncFileOperations
+from utils.audit import open_audit_log
+from utils.file_operations import FileOperations
+from utils.logger import setup_logger
+from utils.profiling import open_profiler
+from utils import metrics
+from utils.search import open_search_index
+from utils.workspace_index import WorkspaceIndex
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+DEFAULT_READ_LENGTH = 1024 * 1024
+STATS_ROLES = frozenset(("sysadmin", "admin"))
+
+
+class ProtocolError(Exception):
+    """Ошибка в запросе клиента"""
+
+
+class ClientSession:
+    """Состояние подключения клиента: последняя использованная сессия"""
+
+    def __init__(self):
+        self.session: Optional[UserSession] = None
+        self.files: Optional[AsyncFileOperations] = None
+
+
+class ACSServer:
+    """Сервер: общие Authenticator, AccessController и индекс для всех сессий"""
+
+    def __init__(self, config_manager, logger, users_file: Optional[str] = None):
+        self.config = config_manager
+        self.logger = logger
+
+        self.user_repo = open_user_repository(config_manager, logger, users_file)
+        self.audit = open_audit_log(config_manager, logger)
+        self.metrics = metrics.configure(config_manager)
+        self.profiler = open_profiler(config_manager, logger)
+        self.acl = AccessController(config_manager, logger)
+        self.index = WorkspaceIndex(config_manager.get_workspace_root(), config_manager.get_index_file(), logger).load()
+        self.search = open_search_index(config_manager, self.index, logger)
+
+        self.limiter = OperationLimiter(config_manager.get_async_limits())
+        self.executor = get_shared_executor(config_manager.get_executor_workers())
+        password_config = config_manager.get_password_config()
+        self.verifier = PasswordVerifier(password_config['workers'], password_config['max_pending'],
+                                         scheme=password_config['scheme'])
+        self.auth = AsyncAuthenticator(Authenticator(self.user_repo, logger, self.verifier, self.audit),
+                                       self.limiter, self.executor)
+        if self.profiler is not None:
+            self.profiler.instrument(self.user_repo)
+            self.profiler.instrument(self.acl)
+            self.profiler.instrument(self.auth.auth)
+
+        session_config = config_manager.get_session_config()
+        self.sessions = SessionStore(config_manager, logger, session_config['ttl'], session_config['max_sessions'])
+        self.sessions.start_sweeper(session_config['sweep_interval'])
+
+        # Изменения пользователей без перезапуска: сессии удаленных и измененных завершаются
+        self.user_repo.subscribe(self.sessions.invalidate_users)
+        self.user_repo.start_watching(config_manager.get_user_storage_config()['reload_interval'])
+        config_manager.start_watching(config_manager.get_reload_interval())
+
+        self.handlers = {
+            'ping': self.op_ping,
+            'login': self.op_login,
+            'logout': self.op_logout,
+            'list': self.op_list,
+            'read': self.op_read,
+            'write': self.op_write,
+            'delete': self.op_delete,
+            'search': self.op_search,
+            'stats': self.op_stats,
+        }
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[str] = None):
+        """Запуск сервера"""
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path, limit=MAX_REQUEST_SIZE)
+            self.logger.info(f"Сервер запущен: unix:{unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_REQUEST_SIZE)
+            self.logger.info(f"Сервер запущен: {host}:{port}")
+        return server
+
+    def close(self):
+        """Сохранение состояния и остановка пула"""
+        self.config.close()
+        self.sessions.close()
+        self.verifier.close()
+        self.index.close()
+        if self.search is not None:
+            self.search.close()
+        self.user_repo.close()
+        shutdown_shared_executor(wait=False)
+        if self.audit is not None:
+            self.audit.close()
+        self.metrics.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        metrics_file = self.config.get_metrics_config()['file']
+        if self.metrics.enabled and metrics_file:
+            self.metrics.write_prometheus(metrics_file)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обработка подключения: запросы выполняются по очереди"""
+        client = ClientSession()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(writer, {'id': None, 'ok': False, 'error': "Слишком большой запрос"})
+                    break
+
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                response = await self.process(client, line)
+                await self._send(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, response: dict):
+        writer.write(json.dumps(response, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n")
+        await writer.drain()
+
+    async def process(self, client: ClientSession, line: bytes) -> dict:
+        """Разбор и выполнение одного запроса"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("Запрос должен быть JSON-объектом")
+
+            request_id = request.get('id')
+            handler = self.handlers.get(request.get('op'))
+            if handler is None:
+                raise ProtocolError(f"Неизвестная операция: {request.get('op')}")
+
+            result = await handler(client, request)
+            return {'id': request_id, 'ok': True, 'result': result}
+
+        except (ProtocolError, PermissionError, FileNotFoundError, ValueError) as e:
+            return {'id': request_id, 'ok': False, 'error': str(e)}
+        except Exception as e:
+            self.logger.error(f"Ошибка обработки запроса: {e}")
+            return {'id': request_id, 'ok': False, 'error': "Системная ошибка"}
+
+    def _require_session(self, client: ClientSession, request: dict) -> AsyncFileOperations:
+        """Сессия запроса: по токену или последняя сессия подключения"""
+        token = request.get('token') or (client.session.token if client.session else None)
+        session = self.sessions.get(token) if isinstance(token, str) else None
+        if session is None:
+            client.session = None
+            client.files = None
+            raise ProtocolError("Требуется вход в систему")
+
+        if session is not client.session:
+            self._bind_session(client, session)
+        return client.files
+
+    def _bind_session(self, client: ClientSession, session: UserSession):
+        """Привязка сессии к подключению (файловые операции создаются один раз)"""
+        client.session = session
+        ops = FileOperations(self.config, self.acl, session, self.logger, workspace_index=self.index,
+                             audit_log=self.audit, search_index=self.search)
+        if self.profiler is not None:
+            # Профиль копится по пользователю и сохраняется при выходе
+            self.profiler.instrument(ops, f"session-{session.user.username}")
+        client.files = AsyncFileOperations(ops, self.limiter, self.executor)
+
+    @staticmethod
+    def _param(request: dict, name: str, kind=str, default=None, required: bool = False):
+        value = request.get(name, default)
+        if value is None:
+            if required:
+                raise ProtocolError(f"Не указан параметр: {name}")
+            return None
+        if not isinstance(value, kind) or isinstance(value, bool) and kind is not bool:
+            raise ProtocolError(f"Некорректный параметр: {name}")
+        return value
+
+    @classmethod
+    def _list_param(cls, request: dict, name: str) -> Optional[list]:
+        """Список строк (папки, расширения)"""
+        value = cls._param(request, name, list)
+        if value is not None and not all(isinstance(item, str) for item in value):
+            raise ProtocolError(f"Некорректный параметр: {name}")
+        return value
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.config.get_workspace_root())
+
+    async def op_ping(self, client: ClientSession, request: dict):
+        return "pong"
+
+    async def op_login(self, client: ClientSession, request: dict):
+        username = self._param(request, 'username', required=True)
+        password = self._param(request, 'password', required=True)
+
+        user = await self.auth.authenticate(username, password)
+        if user is None:
+            raise PermissionError("Неверное имя пользователя или пароль")
+
+        session = self.sessions.create(user)
+        self._bind_session(client, session)
+        return {'username': user.username, 'role': user.role, 'token': session.token}
+
+    async def op_logout(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        self.sessions.revoke(files.ops.session.token)
+        if self.profiler is not None:
+            self.profiler.dump(f"session-{files.ops.session.user.username}")
+        client.session = None
+        client.files = None
+        return True
+
+    async def op_list(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        folders = self._list_param(request, 'folders')
+        extensions = self._list_param(request, 'extensions')
+
+        page_size = self._param(request, 'page_size', int, 100)
+        offset = self._param(request, 'offset', int, 0)
+        if page_size < 1 or offset < 0:
+            raise ProtocolError("page_size должен быть не меньше 1, offset - не меньше 0")
+
+        page, next_token = await files.list_files_page(
+            page_size=min(page_size, 1000),
+            offset=offset,
+            token=self._param(request, 'cursor'),
+            sort_by=self._param(request, 'sort_by', str, 'name'),
+            descending=self._param(request, 'descending', bool, False),
+            folders=folders,
+            extensions=extensions,
+            min_size=self._param(request, 'min_size', int),
+            max_size=self._param(request, 'max_size', int),
+        )
+        for file in page:
+            file['path'] = self._relative(file['path'])
+        return {'files': page, 'next': next_token}
+
+    async def op_read(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        path = files.ops.resolve_path(self._param(request, 'path', required=True))
+        offset = self._param(request, 'offset', int, 0)
+        length = min(self._param(request, 'length', int, DEFAULT_READ_LENGTH), MAX_REQUEST_SIZE)
+
+        chunks = [chunk async for chunk in files.iter_read(path, offset, length)]
+        return {'path': self._relative(path), 'content': "".join(chunks)}
+
+    async def op_write(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        path = files.ops.resolve_path(self._param(request, 'path', required=True))
+        content = self._param(request, 'content', str, "")
+        mode = self._param(request, 'mode', str, 'w')
+        if mode not in ('w', 'a'):
+            raise ProtocolError("Режим записи должен быть 'w' или 'a'")
+
+        await files.write_file(path, content, mode)
+        return {'path': self._relative(path)}
+
+    async def op_delete(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        path = files.ops.resolve_path(self._param(request, 'path', required=True))
+        await files.delete_file(path)
+        return {'path': self._relative(path)}
+
+    async def op_search(self, client: ClientSession, request: dict):
+        files = self._require_session(client, request)
+        max_results = self.config.get_search_config()['max_results']
+        hits = await files.search(
+            self._param(request, 'query', required=True),
+            limit=min(self._param(request, 'limit', int, max_results), 1000),
+            folders=self._list_param(request, 'folders'),
+        )
+        for hit in hits:
+            hit['path'] = self._relative(hit['path'])
+        return {'hits': hits}
+
+    async def op_stats(self, client: ClientSession, request: dict):
+        self._require_session(client, request)
+        if client.session.user.role not in STATS_ROLES:
+            raise PermissionError("Метрики доступны только администраторам")
+        return self.metrics.summary()
+
+
+async def serve(args):
+    """Запуск сервера до прерывания"""
+    config = ConfigManager(args.config)
+    logger = setup_logger(config.get_log_config())
+
+    acs_server = ACSServer(config, logger, args.users)
+    server = await acs_server.start(args.host, args.port, args.unix)
+
+    print(f"🚀 Сервер ACS запущен ({'unix:' + args.unix if args.unix else f'{args.host}:{args.port}'})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        acs_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Серверный режим системы управления доступом")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="адрес (только loopback)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="путь к Unix socket вместо TCP")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--users", help="файл пользователей JSON (по умолчанию из config.yaml)")
+    args = parser.parse_args()
+
+    if not args.unix and args.host not in ("127.0.0.1", "::1", "localhost"):
+        print("❌ Сервер принимает подключения только на loopback-адресе")
+        sys.exit(1)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Сервер остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,387 @@
 """
 Менеджер конфигурации - чтение параметров из YAML
+
+Конфигурация загружается в неизменяемый снимок с номером версии и заранее
+вычисленными значениями (абсолютные пути, права и папки ролей). Геттеры
+читают текущий снимок; при изменении файла собирается новый снимок,
+который подменяет старый одним присваиванием, и подписчики получают
+оповещение.
+
+Разобранный YAML кэшируется в файле рядом с конфигурацией (pickle) с
+ключом по времени модификации и размеру: при неизмененном config.yaml
+PyYAML не импортируется вовсе.
 """
 
-import yaml
 import os
+import pickle
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Tuple
+from utils.file_streams import DURABILITY_NONE, DURABILITY_POLICIES, atomic_write
+
+CACHE_VERSION = 1
+KNOWN_PERMISSIONS = frozenset(("READ", "WRITE", "DELETE", "LIST", "CONFIG"))
+
+
+def _freeze(value):
+    """Неизменяемая копия разобранного YAML (словари и списки)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class RolePolicy:
+    """Права и папки роли"""
+    permissions: Tuple[str, ...]
+    permission_set: frozenset
+    folders: Tuple[str, ...]
+    folder_set: frozenset
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Неизменяемый снимок конфигурации"""
+    version: int
+    data: Mapping
+    workspace_root: str
+    index_file: str
+    stats_file: str
+    roles: Mapping[str, RolePolicy]
+    folder_names: Mapping[str, str]
+
 
 class ConfigManager:
     """Управление конфигурацией системы"""
 
-    def __init__(self, config_file: str = "config.yaml"):
+    def __init__(self, config_file: str = "config.yaml", use_cache: bool = True):
         self.config_file = Path(config_file)
-        self.config = self._load_config()
+        self.cache_file = self.config_file.with_name(f".{self.config_file.name}.cache")
+        self.use_cache = use_cache
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[ConfigSnapshot], None]] = []
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._file_state = self._stat()
+        self._failed_state: Optional[tuple] = None
+        self.snapshot = self._build_snapshot(self._load_config(self._file_state), version=1)
+
+    @property
+    def config(self) -> Mapping:
+        """Разобранная конфигурация текущего снимка (только чтение)"""
+        return self.snapshot.data
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
 
-    def _load_config(self) -> dict:
-        """Загрузка конфигурации из YAML"""
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load_config(self, state: Optional[tuple] = None) -> dict:
+        """Загрузка конфигурации из кэша или YAML"""
         try:
             if not self.config_file.exists():
                 raise FileNotFoundError(f"Конфигурационный файл {self.config_file} не найден")
 
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            key = (CACHE_VERSION, str(self.config_file.resolve()), state)
+            if self.use_cache and state is not None:
+                config = self._read_cache(key)
+                if config is not None:
+                    return config
+
+            config = self._parse_yaml()
 
+            if self.use_cache and state is not None:
+                self._write_cache(key, config)
             return config
 
         except Exception as e:
             print(f"Ошибка загрузки конфигурации: {e}")
             raise
 
+    def _parse_yaml(self) -> dict:
+        """Разбор YAML (C-загрузчик, если PyYAML собран с libyaml)"""
+        import yaml
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            return yaml.load(f, Loader=loader)
+
+    def _read_cache(self, key: tuple) -> Optional[dict]:
+        """Разобранная конфигурация из кэша, если ключ совпадает"""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached_key, config = pickle.load(f)
+        except Exception:
+            return None
+        return config if cached_key == key else None
+
+    def _write_cache(self, key: tuple, config: dict):
+        """Сохранение кэша; ошибки записи не мешают работе"""
+        try:
+            atomic_write(str(self.cache_file), pickle.dumps((key, config), pickle.HIGHEST_PROTOCOL),
+                         durability=DURABILITY_NONE)
+        except OSError:
+            pass
+
+    def _build_snapshot(self, config: Optional[dict], version: int) -> ConfigSnapshot:
+        """Проверка конфигурации и сборка снимка с вычисленными значениями"""
+        config = config or {}
+        self._validate(config)
+        data = _freeze(config)
+        system = data.get('system') or {}
+
+        roles = {}
+        for role, role_config in (data.get('roles') or {}).items():
+            # Краткая форма "РОЛЬ: [права]" и полная с папками
+            if isinstance(role_config, Mapping):
+                permissions = role_config.get('permissions') or ()
+                folders = role_config.get('folders') or ()
+            else:
+                permissions, folders = role_config or (), ()
+
+            roles[str(role)] = RolePolicy(
+                permissions=permissions,
+                permission_set=frozenset(str(permission).upper() for permission in permissions),
+                folders=tuple(str(folder) for folder in folders),
+                folder_set=frozenset(str(folder) for folder in folders),
+            )
+
+        return ConfigSnapshot(
+            version=version,
+            data=data,
+            workspace_root=self._resolve_path(system.get('workspace_root', './workspace')),
+            index_file=self._resolve_path(system.get('index_file', 'workspace_index.json')),
+            stats_file=self._resolve_path(system.get('stats_file', 'workspace_stats.json')),
+            roles=MappingProxyType(roles),
+            folder_names=data.get('folders') or MappingProxyType({}),
+        )
+
+    @staticmethod
+    def _validate(config: dict):
+        """Проверка структуры конфигурации; ошибки - ValueError"""
+        if not isinstance(config, dict):
+            raise ValueError("Конфигурация должна быть словарем")
+
+        for section in ('system', 'roles', 'folders'):
+            if not isinstance(config.get(section) or {}, dict):
+                raise ValueError(f"Раздел {section} должен быть словарем")
+
+        system = config.get('system') or {}
+        durability = system.get('write_durability', 'file')
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Неизвестная политика надежности записи: {durability}")
+
+        audit_durability = (system.get('audit') or {}).get('durability', 'file')
+        if audit_durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Неизвестная политика надежности журнала аудита: {audit_durability}")
+
+        for role, role_config in (config.get('roles') or {}).items():
+            if isinstance(role_config, dict):
+                permissions = role_config.get('permissions') or []
+                folders = role_config.get('folders') or []
+            else:
+                permissions, folders = role_config or [], []
+
+            if not isinstance(permissions, list) or not isinstance(folders, list):
+                raise ValueError(f"Права и папки роли {role} должны быть списками")
+
+            unknown = [p for p in permissions if str(p).upper() not in KNOWN_PERMISSIONS]
+            if unknown:
+                raise ValueError(f"Неизвестные права роли {role}: {unknown}")
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]):
+        """Подписка на перезагрузку конфигурации: callback(новый снимок)"""
+        self._listeners.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Перечитывание файла, если изменились время модификации или размер.
+        Некорректная конфигурация не применяется - остается прежний снимок.
+        """
+        with self._lock:
+            state = self._stat()
+            if state is None or (state in (self._file_state, self._failed_state) and not force):
+                return False
+
+            try:
+                snapshot = self._build_snapshot(self._load_config(state), self.snapshot.version + 1)
+            except Exception as e:
+                print(f"Конфигурация не применена: {e}")
+                self._failed_state = state
+                return False
+
+            self.snapshot = snapshot
+            self._file_state = state
+
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Ошибка обработчика конфигурации: {e}")
+        return True
+
+    def start_watching(self, interval: float = 5.0):
+        """Периодическая проверка файла конфигурации в фоновом потоке"""
+        if self._watcher is not None:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=worker, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def close(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+
+    def _resolve_path(self, path: str) -> str:
+        """Преобразование пути из конфигурации в абсолютный"""
+        if not os.path.isabs(path):
+            base_dir = Path(__file__).parent.parent
+            path = str(base_dir / path)
+
+        return os.path.normpath(path)
+
     def get_workspace_root(self) -> str:
         """Получение пути к рабочей директории"""
-        workspace_root = self.config.get('system', {}).get('workspace_root', './workspace')
+        return self.snapshot.workspace_root
 
-        # Преобразуем в абсолютный путь
-        if not os.path.isabs(workspace_root):
-            base_dir = Path(__file__).parent.parent
-            workspace_root = str(base_dir / workspace_root)
+    def get_index_file(self) -> str:
+        """Получение пути к файлу индекса workspace"""
+        return self.snapshot.index_file
+
+    def get_stats_file(self) -> str:
+        """Получение пути к файлу статистики workspace"""
+        return self.snapshot.stats_file
+
+    def get_stats_reconcile_interval(self) -> float:
+        """Получение интервала фоновой сверки статистики, секунд (0 - выключена)"""
+        return float(self.config.get('system', {}).get('stats_reconcile_interval', 0))
+
+    def get_write_durability(self) -> str:
+        """Получение политики надежности записи файлов (none / file / dir)"""
+        return self.config.get('system', {}).get('write_durability', 'file')
+
+    def get_batch_workers(self) -> int:
+        """Получение размера пула потоков для пакетных операций"""
+        return int(self.config.get('system', {}).get('batch_workers', 8))
+
+    def get_executor_workers(self) -> int:
+        """Получение размера общего пула потоков асинхронного фасада"""
+        return int(self.config.get('system', {}).get('executor_workers', 32))
+
+    def get_async_limits(self) -> dict:
+        """Получение ограничений параллелизма по типам операций"""
+        return dict(self.config.get('system', {}).get('async_limits', {}) or {})
+
+    def get_session_config(self) -> dict:
+        """Получение настроек хранилища сессий"""
+        sessions = self.config.get('system', {}).get('sessions', {}) or {}
+        return {
+            'ttl': float(sessions.get('ttl', 1800)),
+            'max_sessions': int(sessions.get('max_sessions', 10000)),
+            'sweep_interval': float(sessions.get('sweep_interval', 60)),
+        }
+
+    def get_password_config(self) -> dict:
+        """Получение настроек хэширования паролей"""
+        hashing = self.config.get('system', {}).get('password_hashing', {}) or {}
+        return {
+            'scheme': hashing.get('scheme', 'scrypt'),
+            'workers': hashing.get('workers'),
+            'max_pending': int(hashing.get('max_pending', 64)),
+        }
+
+    def get_user_storage_config(self) -> dict:
+        """Получение настроек хранилища пользователей"""
+        storage = self.config.get('system', {}).get('user_storage', {}) or {}
+        return {
+            'backend': storage.get('backend', 'json'),
+            'users_file': self._resolve_path(storage.get('users_file', 'users.json')),
+            'users_db': self._resolve_path(storage.get('users_db', 'users.db')),
+            'cache_size': int(storage.get('cache_size', 1024)),
+            'reload_interval': float(storage.get('reload_interval', 5)),
+        }
+
+    def get_audit_config(self) -> dict:
+        """Получение настроек журнала аудита"""
+        audit = self.config.get('system', {}).get('audit', {}) or {}
+        return {
+            'enabled': bool(audit.get('enabled', True)),
+            'directory': self._resolve_path(audit.get('directory', 'audit')),
+            'segment_size': int(float(audit.get('segment_size_mb', 16)) * 1024 * 1024),
+            'flush_interval': float(audit.get('flush_interval', 0.2)),
+            'batch_size': int(audit.get('batch_size', 1024)),
+            'max_queue': int(audit.get('max_queue', 65536)),
+            'durability': audit.get('durability', 'file'),
+        }
+
+    def get_metrics_config(self) -> dict:
+        """Получение настроек метрик производительности"""
+        metrics = self.config.get('system', {}).get('metrics', {}) or {}
+        metrics_file = metrics.get('file', 'metrics.prom')
+        return {
+            'enabled': bool(metrics.get('enabled', True)),
+            'file': self._resolve_path(metrics_file) if metrics_file else None,
+            'interval': float(metrics.get('interval', 15)),
+        }
+
+    def get_profiling_config(self) -> dict:
+        """Получение настроек профилирования (папка - относительно workspace)"""
+        profiling = self.config.get('system', {}).get('profiling', {}) or {}
+        return {
+            'enabled': bool(profiling.get('enabled', False)),
+            'directory': os.path.join(self.get_workspace_root(), profiling.get('directory', 'logs')),
+            'sample_rate': float(profiling.get('sample_rate', 0.01)),
+            'memory': bool(profiling.get('memory', False)),
+            'top': int(profiling.get('top', 25)),
+        }
+
+    def get_search_config(self) -> dict:
+        """Получение настроек полнотекстового поиска"""
+        search = self.config.get('system', {}).get('search', {}) or {}
+        return {
+            'enabled': bool(search.get('enabled', True)),
+            'index_file': self._resolve_path(search.get('index_file', 'search_index.json')),
+            'max_file_size': int(float(search.get('max_file_size_kb', 1024)) * 1024),
+            'sync_interval': float(search.get('sync_interval', 300)),
+            'max_results': int(search.get('max_results', 20)),
+        }
 
-        return os.path.normpath(workspace_root)
+    def get_reload_interval(self) -> float:
+        """Получение интервала проверки изменений config.yaml, секунд"""
+        return float(self.config.get('system', {}).get('config_reload_interval', 5))
 
     def get_log_config(self) -> dict:
         """Получение конфигурации логирования"""
         return self.config.get('system', {})
 
-    def get_roles_config(self) -> dict:
+    def get_roles_config(self) -> Mapping:
         """Получение конфигурации ролей"""
-        return self.config.get('roles', {})
+        return self.config.get('roles') or MappingProxyType({})
 
-    def get_folder_names(self) -> dict:
+    def get_folder_names(self) -> Mapping:
         """Получение названий папок"""
-        return self.config.get('folders', {})
+        return self.snapshot.folder_names
 
-    def get_role_permissions(self, role: str) -> list:
+    def get_role_permissions(self, role: str) -> tuple:
         """Получение прав для роли"""
-        role_config = self.config.get('roles', {}).get(role, {})
-        return role_config.get('permissions', [])
+        policy = self.snapshot.roles.get(role)
+        return policy.permissions if policy else ()
 
-    def get_role_folders(self, role: str) -> list:
+    def get_role_folders(self, role: str) -> tuple:
         """Получение папок для роли"""
-        role_config = self.config.get('roles', {}).get(role, {})
-        return role_config.get('folders', [])
\ No newline at end of file
+        policy = self.snapshot.roles.get(role)
+        return policy.folders if policy else ()
\ No newline at end of file
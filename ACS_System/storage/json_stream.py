@@ -0,0 +1,84 @@
+"""
+Потоковый разбор JSON-массива
+
+Файл вида [{...}, {...}, ...] читается порциями, элементы разбираются
+по одному через JSONDecoder.raw_decode, поэтому память не зависит от
+размера файла.
+"""
+
+import json
+from typing import Any, Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Элементы JSON-массива верхнего уровня из открытого текстового файла"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        """Дочитывание следующей порции; False - файл закончился"""
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Пропуск пробелов; False - данных больше нет"""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[position] != "[":
+        raise ValueError("Ожидался JSON-массив")
+    position += 1
+
+    expect_item = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Неожиданный конец JSON-массива")
+
+        char = buffer[position]
+        if char == "]":
+            return
+        if not expect_item:
+            if char != ",":
+                raise ValueError(f"Ожидалась запятая в позиции {position}")
+            position += 1
+            expect_item = True
+            continue
+
+        if char not in "{[\"":
+            # Число или литерал на границе порции мог быть обрезан: дочитываем до разделителя
+            while not any(delimiter in buffer[position:] for delimiter in ",]") and fill():
+                pass
+
+        # Элемент может не поместиться в буфер - дочитываем, пока не разберется
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise ValueError(f"Некорректный JSON в позиции {position}")
+                continue
+            break
+
+        position = end
+        expect_item = False
+        yield item
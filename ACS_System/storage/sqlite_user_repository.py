@@ -0,0 +1,214 @@
+"""
+Репозиторий пользователей на SQLite
+
+Пользователи не загружаются при запуске: запись читается по индексу
+username при первом обращении и попадает в небольшой LRU-кэш. Время
+запуска не зависит от количества пользователей. Изменения базы другими
+процессами обнаруживаются по PRAGMA data_version и сбрасывают кэш.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+from core import passwords
+from core.models import User, UserChanges
+
+DEFAULT_CACHE_SIZE = 1024
+IMPORT_BATCH_SIZE = 10000
+
+# Запросы - константы: sqlite3 кэширует подготовленные выражения по тексту
+SQL_CREATE = """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL
+    ) WITHOUT ROWID
+"""
+SQL_CREATE_ROLE_INDEX = "CREATE INDEX IF NOT EXISTS users_role ON users (role)"
+SQL_GET = "SELECT username, password_hash, role FROM users WHERE username = ?"
+SQL_ITER = "SELECT username, password_hash, role FROM users ORDER BY username"
+SQL_COUNT = "SELECT COUNT(*) FROM users"
+SQL_UPSERT = """
+    INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)
+    ON CONFLICT (username) DO UPDATE SET password_hash = excluded.password_hash, role = excluded.role
+"""
+SQL_UPDATE_HASH = "UPDATE users SET password_hash = ? WHERE username = ?"
+
+
+class SQLiteUserRepository:
+    """Хранилище данных пользователей в SQLite с LRU-кэшем"""
+
+    def __init__(self, logger=None, db_file: str = "users.db", cache_size: int = DEFAULT_CACHE_SIZE):
+        self.logger = logger
+        self.db_file = Path(db_file)
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, User]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[UserChanges], None]] = []
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._conn = self._connect()
+        self._data_version = self._get_data_version()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие базы и создание схемы"""
+        self._log('info', f"Открытие базы пользователей {self.db_file}")
+
+        # Соединение общее для потоков, обращения сериализуются через self._lock
+        conn = sqlite3.connect(str(self.db_file), check_same_thread=False, cached_statements=32)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(SQL_CREATE)
+            conn.execute(SQL_CREATE_ROLE_INDEX)
+        return conn
+
+    def get_user(self, username: str) -> Optional[User]:
+        """Получение пользователя по имени"""
+        with self._lock:
+            user = self._cache.get(username)
+            if user is not None:
+                self._cache.move_to_end(username)
+                return user
+
+            row = self._conn.execute(SQL_GET, (username,)).fetchone()
+            if row is None:
+                return None
+
+            user = User(username=row[0], password_hash=row[1], role=row[2])
+            self._cache[username] = user
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return user
+
+    def _get_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def subscribe(self, callback: Callable[[UserChanges], None]):
+        """Подписка на изменения пользователей, сделанные другими процессами"""
+        self._listeners.append(callback)
+
+    def reload(self, force: bool = False) -> UserChanges:
+        """
+        Проверка изменений базы другими процессами. Кэш сбрасывается; в
+        событии перечислены только пользователи, бывшие в кэше.
+        """
+        with self._lock:
+            version = self._get_data_version()
+            if version == self._data_version and not force:
+                return UserChanges()
+            self._data_version = version
+
+            removed, changed = [], []
+            for username, user in self._cache.items():
+                row = self._conn.execute(SQL_GET, (username,)).fetchone()
+                if row is None:
+                    removed.append(username)
+                elif row[1] != user.password_hash or row[2] != user.role:
+                    changed.append(username)
+            self._cache = OrderedDict()
+
+        changes = UserChanges(removed=tuple(removed), changed=tuple(changed))
+        if changes:
+            self._log('info', f"База пользователей изменена: удалено {len(removed)}, изменено {len(changed)}")
+            for callback in self._listeners:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    self._log('error', f"Ошибка обработчика изменений пользователей: {e}")
+        return changes
+
+    def start_watching(self, interval: float = 5.0):
+        """Периодическая проверка изменений базы в фоновом потоке"""
+        if self._watcher is not None:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=worker, name="users-watcher", daemon=True)
+        self._watcher.start()
+
+    def iter_users(self, batch_size: int = 1000) -> Iterator[User]:
+        """Перебор всех пользователей порциями (без загрузки базы в память)"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(SQL_ITER)
+            rows = cursor.fetchmany(batch_size)
+
+        while rows:
+            for username, password_hash, role in rows:
+                yield User(username=username, password_hash=password_hash, role=role)
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def get_all_users(self) -> List[User]:
+        """Получение всех пользователей"""
+        return list(self.iter_users())
+
+    def count(self) -> int:
+        """Количество пользователей"""
+        with self._lock:
+            return self._conn.execute(SQL_COUNT).fetchone()[0]
+
+    def verify_password(self, username: str, password: str) -> bool:
+        """Проверка пароля"""
+        user = self.get_user(username)
+        if not user:
+            return False
+
+        return passwords.verify_password(password, user.password_hash)
+
+    def update_password_hash(self, username: str, password_hash: str) -> bool:
+        """Замена хэша пароля"""
+        with self._lock:
+            with self._conn:
+                updated = self._conn.execute(SQL_UPDATE_HASH, (password_hash, username)).rowcount
+            if not updated:
+                return False
+
+            # Копия при записи: объект из кэша может быть у сессий и вызывающих
+            user = self._cache.get(username)
+            if user is not None:
+                self._cache[username] = replace(user, password_hash=password_hash)
+            return True
+
+    def import_users(self, users: Iterable[User], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """Добавление или замена пользователей пакетами (одна транзакция на пакет)"""
+        imported = 0
+        batch = []
+        for user in users:
+            batch.append((user.username, user.password_hash, user.role))
+            if len(batch) >= batch_size:
+                imported += self._write_batch(batch)
+                batch = []
+
+        if batch:
+            imported += self._write_batch(batch)
+
+        self._log('info', f"Импортировано пользователей: {imported}")
+        return imported
+
+    def _write_batch(self, batch: list) -> int:
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(SQL_UPSERT, batch)
+            for username, _, _ in batch:
+                self._cache.pop(username, None)
+        return len(batch)
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        self._stop.set()
+        with self._lock:
+            self._cache.clear()
+            self._conn.close()
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
@@ -1,12 +1,21 @@
 """
 Репозиторий пользователей - загрузка из JSON
+
+Файл пользователей перечитывается при изменении времени модификации или
+размера. Новый словарь пользователей собирается целиком и подменяет
+старый одним присваиванием: читатели не берут блокировок и не видят
+частично построенного словаря. Опубликованный словарь не изменяется.
 """
 
 import json
-import hashlib
+import os
+import threading
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional, List
-from core.models import User
+from typing import Callable, Dict, Iterator, Optional, List
+from core import passwords
+from core.models import User, UserChanges
+from utils.file_streams import atomic_write
 
 class UserRepository:
     """Хранилище данных пользователей"""
@@ -14,7 +23,25 @@ class UserRepository:
     def __init__(self, logger, users_file: str = "users.json"):
         self.logger = logger
         self.users_file = Path(users_file)
-        self.users = self._load_users()
+        self._write_lock = threading.Lock()
+        self._listeners: List[Callable[[UserChanges], None]] = []
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._file_state = self._stat()
+        self._failed_state: Optional[tuple] = None
+        self.users: Dict[str, User] = self._load_users()
+
+    def _stat(self) -> Optional[tuple]:
+        """Время модификации и размер файла пользователей"""
+        try:
+            st = os.stat(self.users_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read_users_file(self) -> list:
+        with open(self.users_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
 
     def _load_users(self) -> dict:
         """Загрузка пользователей из JSON файла"""
@@ -25,8 +52,7 @@ class UserRepository:
                 self.logger.error(f"Файл пользователей не найден: {self.users_file}")
                 raise FileNotFoundError(f"Файл пользователей не найден: {self.users_file}")
 
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
+            users_data = self._read_users_file()
 
             users = {}
             for user_data in users_data:
@@ -44,6 +70,82 @@ class UserRepository:
             self.logger.error(f"Ошибка загрузки пользователей: {e}")
             return {}
 
+    def subscribe(self, callback: Callable[[UserChanges], None]):
+        """Подписка на изменения списка пользователей после перезагрузки"""
+        self._listeners.append(callback)
+
+    def _notify(self, changes: UserChanges):
+        for callback in self._listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                self.logger.error(f"Ошибка обработчика изменений пользователей: {e}")
+
+    def reload(self, force: bool = False) -> UserChanges:
+        """
+        Перечитывание файла пользователей, если изменились время или размер.
+        Неизмененные записи переиспользуются, новый словарь подменяет старый.
+        """
+        with self._write_lock:
+            state = self._stat()
+            if state is None or (state in (self._file_state, self._failed_state) and not force):
+                return UserChanges()
+
+            try:
+                users_data = self._read_users_file()
+            except (OSError, ValueError) as e:
+                # Остаются прежние пользователи; файл перечитается после следующего изменения
+                self.logger.error(f"Ошибка перезагрузки пользователей: {e}")
+                self._failed_state = state
+                return UserChanges()
+
+            old_users = self.users
+            users = {}
+            changed = []
+            for user_data in users_data:
+                try:
+                    username = user_data['username']
+                    password_hash = user_data['password_hash']
+                    role = user_data['role']
+                except (KeyError, TypeError):
+                    self.logger.warning(f"Пропущена некорректная запись пользователя: {user_data}")
+                    continue
+
+                user = old_users.get(username)
+                if user is None or user.password_hash != password_hash or user.role != role:
+                    if user is not None:
+                        changed.append(username)
+                    user = User(username=username, password_hash=password_hash, role=role)
+                users[username] = user
+
+            changes = UserChanges(
+                added=tuple(name for name in users if name not in old_users),
+                removed=tuple(name for name in old_users if name not in users),
+                changed=tuple(changed),
+            )
+            self.users = users
+            self._file_state = state
+
+        if changes:
+            self.logger.info(
+                f"Пользователи перезагружены: добавлено {len(changes.added)}, "
+                f"удалено {len(changes.removed)}, изменено {len(changes.changed)}"
+            )
+            self._notify(changes)
+        return changes
+
+    def start_watching(self, interval: float = 5.0):
+        """Периодическая проверка файла пользователей в фоновом потоке"""
+        if self._watcher is not None:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=worker, name="users-watcher", daemon=True)
+        self._watcher.start()
+
     def get_user(self, username: str) -> Optional[User]:
         """Получение пользователя по имени"""
         return self.users.get(username)
@@ -52,12 +154,60 @@ class UserRepository:
         """Получение всех пользователей"""
         return list(self.users.values())
 
+    def iter_users(self) -> Iterator[User]:
+        """Перебор всех пользователей"""
+        # Опубликованный словарь не изменяется - итерация по нему безопасна
+        return iter(self.users.values())
+
+    def count(self) -> int:
+        """Количество пользователей"""
+        return len(self.users)
+
     def verify_password(self, username: str, password: str) -> bool:
         """Проверка пароля"""
         user = self.get_user(username)
         if not user:
             return False
 
-        # Хэшируем введенный пароль и сравниваем
-        password_hash = hashlib.md5(password.encode('utf-8')).hexdigest()
-        return user.password_hash == password_hash
\ No newline at end of file
+        return passwords.verify_password(password, user.password_hash)
+
+    def update_password_hash(self, username: str, password_hash: str) -> bool:
+        """Замена хэша пароля с сохранением файла пользователей"""
+        with self._write_lock:
+            user = self.get_user(username)
+            if not user:
+                return False
+
+            users = dict(self.users)
+            users[username] = replace(user, password_hash=password_hash)
+            self._save_users(users)
+            self.users = users
+            return True
+
+    def _save_users(self, users: Dict[str, User]):
+        """Атомарная перезапись файла пользователей"""
+        users_data = [
+            {'username': user.username, 'password_hash': user.password_hash, 'role': user.role}
+            for user in users.values()
+        ]
+        atomic_write(str(self.users_file), json.dumps(users_data, indent=2, ensure_ascii=False))
+        # Собственная запись не должна вызывать перезагрузку
+        self._file_state = self._stat()
+
+    def close(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+
+
+def open_user_repository(config_manager, logger, users_file: Optional[str] = None):
+    """Создание репозитория пользователей по настройкам (json / sqlite)"""
+    storage = config_manager.get_user_storage_config()
+
+    if storage['backend'] == 'sqlite':
+        # Импорт только при выборе этого хранилища
+        from storage.sqlite_user_repository import SQLiteUserRepository
+        return SQLiteUserRepository(logger, storage['users_db'], storage['cache_size'])
+
+    if storage['backend'] != 'json':
+        raise ValueError(f"Неизвестное хранилище пользователей: {storage['backend']}")
+    return UserRepository(logger, users_file or storage['users_file'])
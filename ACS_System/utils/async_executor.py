@@ -0,0 +1,69 @@
+"""
+Общий пул потоков и ограничения параллелизма для асинхронного фасада
+
+Блокирующие вызовы файловой системы и аутентификации выполняются в одном
+общем пуле потоков; число одновременных операций каждого типа
+ограничивается семафорами.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+DEFAULT_EXECUTOR_WORKERS = 32
+
+DEFAULT_LIMITS = {
+    'read': 64,
+    'write': 16,
+    'list': 32,
+    'delete': 16,
+    'auth': 32,
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_shared_executor(max_workers: int = DEFAULT_EXECUTOR_WORKERS) -> ThreadPoolExecutor:
+    """Общий пул потоков (создается при первом обращении)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="acs-io")
+        return _executor
+
+
+def shutdown_shared_executor(wait: bool = True):
+    """Остановка общего пула потоков"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+class OperationLimiter:
+    """Ограничение числа одновременных операций по типам"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, operation: str) -> asyncio.Semaphore:
+        """Семафор для типа операции"""
+        semaphore = self._semaphores.get(operation)
+        if semaphore is None:
+            limit = self.limits.get(operation, DEFAULT_EXECUTOR_WORKERS)
+            semaphore = self._semaphores.setdefault(operation, asyncio.Semaphore(limit))
+        return semaphore
+
+
+async def run_blocking(limiter: OperationLimiter, operation: str, executor: ThreadPoolExecutor,
+                       func: Callable, *args, **kwargs):
+    """Выполнение блокирующего вызова в пуле с учетом ограничения для типа операции"""
+    async with limiter.semaphore(operation):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
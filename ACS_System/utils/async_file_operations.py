@@ -0,0 +1,80 @@
+"""
+Асинхронный фасад над FileOperations
+
+Методы повторяют синхронный API и выполняют блокирующие вызовы в общем
+пуле потоков, поэтому проверки прав (AccessController) и записи в лог
+остаются прежними.
+"""
+
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from core.models import BatchResult
+from utils import file_streams
+from utils.async_executor import OperationLimiter, get_shared_executor, run_blocking
+
+_STREAM_END = object()
+
+
+class AsyncFileOperations:
+    """Асинхронные операции с файлами для одной сессии"""
+
+    def __init__(self, file_operations, limiter: Optional[OperationLimiter] = None, executor=None):
+        self.ops = file_operations
+        self.limiter = limiter or OperationLimiter()
+        self.executor = executor or get_shared_executor()
+
+    async def _run(self, operation: str, func, *args, **kwargs):
+        return await run_blocking(self.limiter, operation, self.executor, func, *args, **kwargs)
+
+    async def list_accessible_files(self) -> List[dict]:
+        """Список доступных файлов"""
+        return await self._run('list', self.ops.list_accessible_files)
+
+    async def list_files_page(self, **kwargs) -> Tuple[List[dict], Optional[str]]:
+        """Страница доступных файлов (параметры как у FileOperations.list_files_page)"""
+        return await self._run('list', self.ops.list_files_page, **kwargs)
+
+    async def search(self, query: str, limit: int = 20, folders: Optional[List[str]] = None) -> List[dict]:
+        """Полнотекстовый поиск по доступным файлам"""
+        return await self._run('read', self.ops.search, query, limit, folders)
+
+    async def read_file(self, filepath: str) -> str:
+        """Прочитать файл целиком"""
+        return await self._run('read', self.ops.read_file, filepath)
+
+    async def iter_read(self, filepath: str, offset: int = 0, length: Optional[int] = None,
+                        chunk_size: int = file_streams.DEFAULT_CHUNK_SIZE) -> AsyncIterator[str]:
+        """Потоковое чтение: каждая порция читается в пуле потоков"""
+        stream = await self._run('read', self.ops.read_stream, filepath, offset, length, chunk_size)
+        while True:
+            chunk = await self._run('read', next, stream, _STREAM_END)
+            if chunk is _STREAM_END:
+                return
+            yield chunk
+
+    async def tail(self, filepath: str, count: int = 10) -> List[str]:
+        """Последние строки файла"""
+        return await self._run('read', self.ops.tail, filepath, count)
+
+    async def write_file(self, filepath: str, content: file_streams.Content, mode: str = 'w') -> bool:
+        """Записать файл"""
+        return await self._run('write', self.ops.write_file, filepath, content, mode)
+
+    async def create_file(self, folder_path: str, filename: str, content: str = "") -> str:
+        """Создать файл"""
+        return await self._run('write', self.ops.create_file, folder_path, filename, content)
+
+    async def delete_file(self, filepath: str) -> bool:
+        """Удалить файл (без интерактивного подтверждения)"""
+        return await self._run('delete', self.ops.remove_file, filepath)
+
+    async def read_many(self, paths: Iterable[str]) -> List[BatchResult]:
+        """Пакетное чтение"""
+        return await self._run('read', self.ops.read_many, list(paths))
+
+    async def write_many(self, files, mode: str = 'w') -> List[BatchResult]:
+        """Пакетная запись"""
+        return await self._run('write', self.ops.write_many, files, mode)
+
+    async def delete_many(self, paths: Iterable[str]) -> List[BatchResult]:
+        """Пакетное удаление"""
+        return await self._run('delete', self.ops.delete_many, list(paths))
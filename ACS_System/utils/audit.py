@@ -0,0 +1,385 @@
+"""
+Журнал аудита доступа
+
+События доступа (вход, чтение, запись, удаление, просмотр списка) пишутся
+отдельно от технического лога компактными записями JSON по строкам:
+
+    {"t": 1760781600.123, "u": "manager", "r": "manager", "op": "READ",
+     "p": "reports/q3.txt", "d": "allow", "ms": 0.41}
+
+record() только ставит событие в очередь; фоновый поток забирает все
+накопившиеся записи и фиксирует их одной записью в файл с одним fsync
+(групповая фиксация). Файлы-сегменты audit-000001.jsonl сменяются по
+размеру. Для каждого сегмента в index.json хранятся границы времени,
+пользователи и папки верхнего уровня - по ним запросы пропускают
+сегменты, в которых заведомо нет подходящих записей.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from utils.file_streams import DURABILITY_DIR, DURABILITY_NONE, atomic_write
+
+INDEX_VERSION = 1
+INDEX_FILE = "index.json"
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.2
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_MAX_QUEUE = 65536
+INDEX_SAVE_INTERVAL = 5.0
+
+# Больше значений в индексе сегмента не храним: сегмент считается подходящим всем
+MAX_INDEXED_VALUES = 512
+
+# Решения
+ALLOW = "allow"
+DENY = "deny"
+ERROR = "error"
+
+
+class AuditLog:
+    """Асинхронная запись событий аудита в сегментированные JSONL-файлы"""
+
+    def __init__(self, directory: str, workspace_root: Optional[str] = None,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_queue: int = DEFAULT_MAX_QUEUE,
+                 durability: str = DURABILITY_NONE, logger=None):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.durability = durability
+        self.logger = logger
+        # Пути внутри workspace записываются относительными
+        self._root_prefix = os.path.join(os.path.abspath(workspace_root), "") if workspace_root else None
+
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index = load_index(self.directory)
+        self._last_index_save = time.monotonic()
+        self._segment = None
+        self._open_segment()
+
+        self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, user: Optional[str], role: Optional[str], op: str, path: Optional[str] = None,
+               decision: str = ALLOW, latency: Optional[float] = None) -> bool:
+        """
+        Постановка события в очередь без ожидания. latency - секунды.
+        При переполненной очереди событие отбрасывается и учитывается в dropped.
+        """
+        try:
+            self._queue.put_nowait((time.time(), user, role, op, path, decision, latency))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Ожидание записи всех поставленных в очередь событий"""
+        self._queue.join()
+
+    def close(self):
+        """Запись оставшихся событий и остановка фонового потока"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._writer.join()
+        if self.dropped:
+            self._log('warning', f"Журнал аудита: отброшено событий при переполнении очереди: {self.dropped}")
+
+    def _run(self):
+        """Фоновый поток: пачки из очереди фиксируются одной записью"""
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                self._save_index()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self._log('error', f"Ошибка записи журнала аудита: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        self._close_segment()
+        self._save_index(force=True)
+
+    def _write_batch(self, batch: List[tuple]):
+        records = [self._encode(event) for event in batch]
+        data = b"".join(line for line, _ in records)
+
+        if self._segment_bytes and self._segment_bytes + len(data) > self.segment_size:
+            self._roll_segment()
+
+        self._segment.write(data)
+        self._segment.flush()
+        if self.durability != DURABILITY_NONE:
+            os.fsync(self._segment.fileno())
+        self._segment_bytes += len(data)
+        self.written += len(records)
+
+        entry = self._entry
+        for _, record in records:
+            _index_record(entry, record)
+        entry['size'] = self._segment_bytes
+        self._save_index()
+
+    def _encode(self, event: tuple):
+        timestamp, user, role, op, path, decision, latency = event
+        record = {'t': round(timestamp, 3), 'u': user, 'r': role, 'op': op, 'd': decision}
+        if path is not None:
+            record['p'] = self._relative(path)
+        if latency is not None:
+            record['ms'] = round(latency * 1000, 3)
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        return line.encode('utf-8'), record
+
+    def _relative(self, path: str) -> str:
+        if self._root_prefix and path.startswith(self._root_prefix):
+            path = path[len(self._root_prefix):]
+        return path.replace(os.sep, "/")
+
+    def _open_segment(self):
+        """Продолжение последнего сегмента или создание нового"""
+        segments = list_segments(self.directory)
+        if not segments:
+            path = self.directory / segment_name(1)
+        elif segments[-1].stat().st_size < self.segment_size:
+            path = segments[-1]
+        else:
+            path = self.directory / segment_name(segment_number(segments[-1]) + 1)
+
+        self._segment = open(path, 'ab')
+        self._segment_bytes = self._segment.tell()
+        self._segment_path = path
+
+        entry = self._index['segments'].get(path.name)
+        if entry is None or entry.get('size') != self._segment_bytes:
+            # Индекс отстал (например, после аварийного завершения) - пересобираем по файлу
+            entry = scan_segment(path)
+        self._index['segments'][path.name] = entry
+        self._entry = entry
+
+        # Незавершенная строка после сбоя не должна склеиться со следующей записью
+        if self._segment_bytes:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._segment.write(b"\n")
+                    self._segment_bytes += 1
+                    entry['size'] = self._segment_bytes
+
+    def _roll_segment(self):
+        self._close_segment()
+        next_name = segment_name(segment_number(self._segment_path) + 1)
+        self._segment_path = self.directory / next_name
+        self._segment = open(self._segment_path, 'ab')
+        self._segment_bytes = 0
+        self._entry = _new_entry()
+        self._index['segments'][next_name] = self._entry
+        self._save_index(force=True)
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+            if self.durability == DURABILITY_DIR:
+                _fsync_dir(self.directory)
+
+    def _save_index(self, force: bool = False):
+        """Сохранение индекса не чаще INDEX_SAVE_INTERVAL (устаревший индекс лишь медленнее)"""
+        now = time.monotonic()
+        if not force and now - self._last_index_save < INDEX_SAVE_INTERVAL:
+            return
+        self._last_index_save = now
+        try:
+            atomic_write(str(self.directory / INDEX_FILE), json.dumps(_dump_index(self._index), ensure_ascii=False),
+                         durability=DURABILITY_NONE)
+        except OSError as e:
+            self._log('error', f"Ошибка сохранения индекса аудита: {e}")
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+
+def open_audit_log(config_manager, logger=None) -> Optional[AuditLog]:
+    """Журнал аудита по настройкам system.audit (None, если отключен)"""
+    config = config_manager.get_audit_config()
+    if not config['enabled']:
+        return None
+    return AuditLog(config['directory'], config_manager.get_workspace_root(), config['segment_size'],
+                    config['flush_interval'], config['batch_size'], config['max_queue'],
+                    config['durability'], logger)
+
+
+def segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def segment_number(path: Path) -> int:
+    return int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def list_segments(directory: Path) -> List[Path]:
+    """Сегменты журнала по возрастанию номера"""
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"), key=segment_number)
+
+
+def iter_segment(path: Path) -> Iterator[dict]:
+    """Записи сегмента; поврежденные строки пропускаются"""
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def scan_segment(path: Path) -> dict:
+    """Построение записи индекса по содержимому сегмента"""
+    entry = _new_entry()
+    for record in iter_segment(path):
+        _index_record(entry, record)
+    entry['size'] = path.stat().st_size
+    return entry
+
+
+def load_index(directory: Path) -> dict:
+    """Индекс сегментов (пустой, если отсутствует или поврежден)"""
+    try:
+        with open(Path(directory) / INDEX_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+
+    segments = {}
+    if data.get('version') == INDEX_VERSION:
+        for name, entry in data.get('segments', {}).items():
+            for key in ('users', 'folders'):
+                entry[key] = set(entry[key]) if entry.get(key) is not None else None
+            segments[name] = entry
+    return {'version': INDEX_VERSION, 'segments': segments}
+
+
+def query(directory: str, user: Optional[str] = None, since: Optional[float] = None,
+          until: Optional[float] = None, path: Optional[str] = None, op: Optional[str] = None,
+          decision: Optional[str] = None) -> Iterator[dict]:
+    """
+    Записи журнала по фильтрам: пользователь, интервал времени (unix-время),
+    путь (префикс пути относительно workspace), операция и решение.
+    Сегменты отбираются по индексу; сегменты с устаревшей записью индекса
+    (например, текущий) просматриваются целиком.
+    """
+    directory = Path(directory)
+    index = load_index(directory)['segments']
+    path = path.replace(os.sep, "/").strip("/") if path else None
+    folder = path.partition("/")[0] if path else None
+    op = op.upper() if op else None
+
+    for segment in list_segments(directory):
+        entry = index.get(segment.name)
+        if entry is not None and entry.get('size') == segment.stat().st_size:
+            if not _segment_matches(entry, user, since, until, folder):
+                continue
+
+        for record in iter_segment(segment):
+            timestamp = record.get('t', 0)
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp > until:
+                continue
+            if user is not None and record.get('u') != user:
+                continue
+            if op is not None and record.get('op') != op:
+                continue
+            if decision is not None and record.get('d') != decision:
+                continue
+            if path is not None:
+                record_path = record.get('p') or ""
+                if record_path != path and not record_path.startswith(path + "/"):
+                    continue
+            yield record
+
+
+def _segment_matches(entry: dict, user: Optional[str], since: Optional[float],
+                     until: Optional[float], folder: Optional[str]) -> bool:
+    if not entry.get('count'):
+        return False
+    if since is not None and entry['last'] < since:
+        return False
+    if until is not None and entry['first'] > until:
+        return False
+    if user is not None and entry['users'] is not None and user not in entry['users']:
+        return False
+    if folder is not None and entry['folders'] is not None and folder not in entry['folders']:
+        return False
+    return True
+
+
+def _new_entry() -> dict:
+    return {'count': 0, 'first': None, 'last': None, 'users': set(), 'folders': set(), 'size': 0}
+
+
+def _index_record(entry: dict, record: dict):
+    """Учет записи в индексе сегмента"""
+    timestamp = record.get('t', 0)
+    entry['count'] += 1
+    entry['first'] = timestamp if entry['first'] is None else min(entry['first'], timestamp)
+    entry['last'] = timestamp if entry['last'] is None else max(entry['last'], timestamp)
+    _index_value(entry, 'users', record.get('u'))
+    if record.get('p'):
+        _index_value(entry, 'folders', record['p'].partition("/")[0])
+
+
+def _index_value(entry: dict, key: str, value):
+    values = entry[key]
+    if values is None or value is None or value in values:
+        return
+    if len(values) >= MAX_INDEXED_VALUES:
+        entry[key] = None
+    else:
+        values.add(value)
+
+
+def _dump_index(index: dict) -> Dict:
+    segments = {}
+    for name, entry in index['segments'].items():
+        entry = dict(entry)
+        for key in ('users', 'folders'):
+            entry[key] = sorted(entry[key]) if entry[key] is not None else None
+        segments[name] = entry
+    return {'version': INDEX_VERSION, 'segments': segments}
+
+
+def _fsync_dir(directory: Path):
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
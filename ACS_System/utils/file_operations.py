@@ -3,115 +3,345 @@
 Включает создание, чтение, редактирование и удаление
 """
 
+import fnmatch
+import glob
 import os
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 import constants as const
+from core.models import BatchResult
+from utils import audit, file_streams, listing
+from utils.metrics import get_registry
+from utils.search import SearchIndex
+from utils.workspace_index import WorkspaceIndex
 
 class FileOperations:
     """Класс для безопасных операций с файлами"""
 
-    def __init__(self, config_manager, access_controller, user_session, logger):
+    def __init__(self, config_manager, access_controller, user_session, logger, workspace_index=None,
+                 audit_log: Optional[audit.AuditLog] = None, search_index: Optional[SearchIndex] = None):
         self.config = config_manager
         self.acl = access_controller
         self.session = user_session
         self.logger = logger
+        self.audit = audit_log
+        self.search_index = search_index
+        self.metrics = get_registry()
         self.workspace_root = config_manager.get_workspace_root()
+        self.durability = config_manager.get_write_durability()
+        self.batch_workers = config_manager.get_batch_workers()
+
+        # Индекс метаданных можно разделять между сессиями
+        if workspace_index is None:
+            workspace_index = WorkspaceIndex(self.workspace_root, config_manager.get_index_file(), logger).load()
+        self.index = workspace_index
+
+    def _role_folders(self):
+        """Папки роли: из кэша сессии, если он заполнен, иначе из конфигурации"""
+        if self.session.role_folders is not None:
+            return self.session.role_folders
+        return self.config.get_role_folders(self.session.user.role)
 
     def list_accessible_files(self) -> List[dict]:
         """Получить список доступных файлов"""
         accessible_files = []
 
         # Личная папка пользователя
-        user_folder = os.path.join(self.workspace_root, f"user_{self.session.user.username}")
-        if os.path.exists(user_folder):
-            accessible_files.extend(self._get_files_in_folder(user_folder, "Личная папка"))
+        user_folder = f"user_{self.session.user.username}"
+        role_folders = self._role_folders()
+
+        # Пересканируются только папки с изменившимся mtime
+        self.index.refresh([user_folder] + list(role_folders))
+
+        user_folder_path = os.path.join(self.workspace_root, user_folder)
+        accessible_files.extend(self._get_files_in_folder(user_folder_path, "Личная папка"))
 
         # Системные папки доступные пользователю
-        role_folders = self.config.get_role_folders(self.session.user.role)
+        folder_names = self.config.get_folder_names()
         for folder_name in role_folders:
             folder_path = os.path.join(self.workspace_root, folder_name)
-            if os.path.exists(folder_path):
-                folder_display = self.config.get_folder_names().get(folder_name, folder_name)
-                accessible_files.extend(self._get_files_in_folder(folder_path, folder_display))
+            folder_display = folder_names.get(folder_name, folder_name)
+            accessible_files.extend(self._get_files_in_folder(folder_path, folder_display))
 
         return accessible_files
 
     def _get_files_in_folder(self, folder_path: str, folder_name: str) -> List[dict]:
-        """Получить файлы в папке"""
-        files = []
-
+        """Получить файлы в папке (из индекса, без обращения к диску)"""
+        return [
+            self._entry_to_dict(entry, folder_name)
+            for entry in self.index.iter_folder(os.path.basename(folder_path))
+        ]
+
+    def _entry_to_dict(self, entry, folder_name: Optional[str] = None) -> dict:
+        """Представление записи индекса в виде словаря листинга"""
+        return {
+            'path': os.path.join(self.workspace_root, entry.folder, entry.name),
+            'name': entry.name,
+            'folder': folder_name or entry.folder,
+            'size': entry.size,
+            'mtime': entry.mtime,
+            'owner': entry.owner
+        }
+
+    def _accessible_folders(self, folders: Optional[Iterable[str]] = None) -> List[str]:
+        """Папки, доступные пользователю (с учетом фильтра по папкам)"""
+        accessible = [f"user_{self.session.user.username}"]
+        accessible.extend(self._role_folders())
+
+        if folders is not None:
+            requested = set(folders)
+            accessible = [folder for folder in accessible if folder in requested]
+
+        self.index.refresh(accessible)
+        return accessible
+
+    def _iter_entries(self, folders: List[str], extensions: Optional[Iterable[str]] = None,
+                      min_size: Optional[int] = None, max_size: Optional[int] = None):
+        """Поток записей индекса по папкам с фильтрами"""
+        for folder in folders:
+            yield from listing.filter_entries(self.index.iter_folder(folder), extensions, min_size, max_size)
+
+    def _iter_sorted_entries(self, folders: List[str], sort_by: str, descending: bool, after: Optional[tuple] = None,
+                             extensions: Optional[Iterable[str]] = None, min_size: Optional[int] = None,
+                             max_size: Optional[int] = None):
+        """Поток записей индекса по ключу сортировки с фильтрами"""
+        entries = listing.iter_sorted(self.index, folders, sort_by, descending, after)
+        return listing.filter_entries(entries, extensions, min_size, max_size)
+
+    def _record(self, operation: str, filepath: Optional[str], decision: str, started: float):
+        """Операция в метрики и журнал аудита (если он подключен)"""
+        latency = time.perf_counter() - started
+        user = self.session.user
+        self.metrics.observe('acs_file_op_seconds', latency, operation=operation, role=user.role, outcome=decision)
+        if self.audit is not None:
+            self.audit.record(user.username, user.role, operation, filepath, decision, latency)
+
+    def _count_bytes(self, direction: str, amount: int):
+        self.metrics.inc('acs_file_bytes_total', amount, direction=direction, role=self.session.user.role)
+
+    def _count_read(self, chunks: Iterator[Union[str, bytes]]) -> Iterator[Union[str, bytes]]:
+        """Подсчет прочитанных байт потока (один раз, по завершении)"""
+        total = 0
         try:
-            for filename in os.listdir(folder_path):
-                filepath = os.path.join(folder_path, filename)
-                if os.path.isfile(filepath):
-                    files.append({
-                        'path': filepath,
-                        'name': filename,
-                        'folder': folder_name,
-                        'size': os.path.getsize(filepath)
-                    })
-        except PermissionError:
-            self.logger.warning(f"Нет доступа к папке: {folder_path}")
+            for chunk in chunks:
+                total += _byte_size(chunk)
+                yield chunk
+        finally:
+            self._count_bytes("read", total)
+
+    def _check_permission(self, operation: str, filepath: Optional[str] = None):
+        """Проверка права на операцию; отказ записывается в журнал аудита"""
+        started = time.perf_counter()
+        if not self._allowed(operation, filepath):
+            self._record(operation, filepath, audit.DENY, started)
+            raise PermissionError(const.ERROR_PERMISSION_DENIED)
 
-        return files
+    def _allowed(self, operation: str, filepath: Optional[str] = None) -> bool:
+        """Права роли и владение личной папкой (AccessController пропускает любые user_*)"""
+        if filepath and self._is_foreign_personal(filepath):
+            return False
+        return self.acl.check_permission(self.session.user.role, operation, filepath)
+
+    def _is_foreign_personal(self, filepath: str) -> bool:
+        """Путь в чужой личной папке user_*"""
+        folder = self._top_folder(os.path.normpath(os.path.abspath(filepath)))
+        return folder is not None and folder.startswith("user_") and folder != f"user_{self.session.user.username}"
+
+    def _check_list(self):
+        """Проверка права на просмотр списка файлов"""
+        started = time.perf_counter()
+        self._check_permission("LIST")
+        self._record("LIST", None, audit.ALLOW, started)
+
+    def iter_files(self, folders: Optional[Iterable[str]] = None, extensions: Optional[Iterable[str]] = None,
+                   min_size: Optional[int] = None, max_size: Optional[int] = None) -> Iterator[dict]:
+        """Потоковый обход доступных файлов без сортировки"""
+        self._check_list()
+
+        for entry in self._iter_entries(self._accessible_folders(folders), extensions, min_size, max_size):
+            yield self._entry_to_dict(entry)
+
+    def list_files_page(self, page_size: int = 50, offset: int = 0, token: Optional[str] = None,
+                        sort_by: str = 'name', descending: bool = False,
+                        folders: Optional[Iterable[str]] = None, extensions: Optional[Iterable[str]] = None,
+                        min_size: Optional[int] = None, max_size: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Страница доступных файлов.
+        Возвращает (файлы, токен следующей страницы или None).
+        """
+        listing.check_page(page_size, offset)
+        self._check_list()
+
+        after = listing.decode_token(token, sort_by, descending) if token is not None else None
+        accessible = self._accessible_folders(folders)
+        entries = self._iter_sorted_entries(accessible, sort_by, descending, after, extensions, min_size, max_size)
+        page, last_key = listing.take_page(entries, page_size, sort_by, 0 if token is not None else offset)
+
+        next_token = listing.encode_token(sort_by, descending, last_key) if last_key is not None else None
+        return [self._entry_to_dict(entry) for entry in page], next_token
+
+    def iter_pages(self, page_size: int = 50, sort_by: str = 'name', descending: bool = False,
+                   folders: Optional[Iterable[str]] = None, extensions: Optional[Iterable[str]] = None,
+                   min_size: Optional[int] = None, max_size: Optional[int] = None) -> Iterator[List[dict]]:
+        """Генератор страниц доступных файлов (один проход по упорядоченным снимкам индекса)"""
+        listing.check_page(page_size)
+        self._check_list()
+
+        accessible = self._accessible_folders(folders)
+        entries = self._iter_sorted_entries(accessible, sort_by, descending, None, extensions, min_size, max_size)
+        for page in listing.paginate(entries, page_size):
+            yield [self._entry_to_dict(entry) for entry in page]
+
+    def top_files(self, k: int = 10, sort_by: str = 'size', descending: bool = True,
+                  folders: Optional[Iterable[str]] = None, extensions: Optional[Iterable[str]] = None,
+                  min_size: Optional[int] = None, max_size: Optional[int] = None) -> List[dict]:
+        """Первые k доступных файлов по ключу (например, самые большие)"""
+        self._check_list()
+
+        entries = self._iter_entries(self._accessible_folders(folders), extensions, min_size, max_size)
+        return [self._entry_to_dict(entry) for entry in listing.top_k(entries, k, sort_by, descending)]
+
+    def search(self, query: str, limit: int = 20, folders: Optional[Iterable[str]] = None) -> List[dict]:
+        """Полнотекстовый поиск по файлам папок, доступных роли для чтения"""
+        if self.search_index is None:
+            raise ValueError("Поиск не настроен")
+
+        started = time.perf_counter()
+        self._check_permission("READ")
+        role = self.session.user.role
+        readable = [folder for folder in self._accessible_folders(folders)
+                    if self.acl.check_permission(role, "READ", os.path.join(self.workspace_root, folder))]
+
+        hits = self.search_index.search(query, readable, limit)
+        self._record("SEARCH", None, audit.ALLOW, started)
+        return [{
+            'path': os.path.join(self.workspace_root, hit.folder, hit.name),
+            'name': hit.name,
+            'folder': hit.folder,
+            'score': hit.score,
+            'snippet': hit.snippet
+        } for hit in hits]
 
     def read_file(self, filepath: str) -> str:
         """Прочитать содержимое файла"""
-        if not self.acl.check_permission(self.session.user.role, "READ", filepath):
-            raise PermissionError(const.ERROR_PERMISSION_DENIED)
+        return "".join(self.read_stream(filepath))
 
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(const.ERROR_FILE_NOT_FOUND)
+    def _check_read(self, filepath: str):
+        """Проверка прав и наличия файла перед чтением (один раз на поток)"""
+        started = time.perf_counter()
+        self._check_permission("READ", filepath)
 
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+        if not os.path.isfile(filepath):
+            self._record("READ", filepath, audit.ERROR, started)
+            raise FileNotFoundError(const.ERROR_FILE_NOT_FOUND)
 
-            rel_path = os.path.relpath(filepath, self.workspace_root)
-            self.logger.info(f"Пользователь {self.session.user.username} прочитал файл: {rel_path}")
+        self._record("READ", filepath, audit.ALLOW, started)
 
-            return content
+        self.logger.info("Пользователь {} прочитал файл: {}", self.session.user.username,
+                         os.path.relpath(filepath, self.workspace_root))
 
+    def _decode_stream(self, chunks: Iterator[str]) -> Iterator[str]:
+        """Перевод ошибок декодирования в ошибку бинарного файла"""
+        try:
+            yield from chunks
         except UnicodeDecodeError:
             raise ValueError("Файл содержит бинарные данные")
 
-    def write_file(self, filepath: str, content: str, mode: str = 'w') -> bool:
-        """Записать или создать файл"""
-        if not self.acl.check_permission(self.session.user.role, "WRITE", filepath):
-            raise PermissionError(const.ERROR_PERMISSION_DENIED)
-
-        # Проверяем, можно ли писать в эту папку
-        folder_name = os.path.basename(os.path.dirname(filepath))
-        if not folder_name.startswith("user_"):  # Не личная папка
-            role_folders = self.config.get_role_folders(self.session.user.role)
-            if folder_name not in role_folders:
-                raise PermissionError(f"Нет прав на запись в папку '{folder_name}'")
-
-        # Создаем директорию если не существует
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    def read_stream(self, filepath: str, offset: int = 0, length: Optional[int] = None,
+                    chunk_size: int = file_streams.DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Потоковое чтение файла порциями текста.
+        offset/length задают диапазон в байтах, отрицательный offset - от конца файла.
+        """
+        self._check_read(filepath)
+        return self._count_read(self._decode_stream(file_streams.iter_text(filepath, offset, length, chunk_size)))
+
+    def read_bytes(self, filepath: str, offset: int = 0, length: Optional[int] = None,
+                   chunk_size: int = file_streams.DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Потоковое чтение диапазона байт файла"""
+        self._check_read(filepath)
+        return self._count_read(file_streams.iter_bytes(filepath, offset, length, chunk_size))
+
+    def read_lines(self, filepath: str, start: int = 0, count: Optional[int] = None) -> Iterator[str]:
+        """Потоковое чтение строк файла (start - номер первой строки с нуля)"""
+        self._check_read(filepath)
+        return self._count_read(self._decode_stream(file_streams.iter_lines(filepath, start, count)))
+
+    def head(self, filepath: str, count: int = 10) -> List[str]:
+        """Первые строки файла"""
+        return list(self.read_lines(filepath, 0, count))
+
+    def tail(self, filepath: str, count: int = 10) -> List[str]:
+        """Последние строки файла"""
+        self._check_read(filepath)
+        try:
+            lines = file_streams.tail_lines(filepath, count)
+        except UnicodeDecodeError:
+            raise ValueError("Файл содержит бинарные данные")
+        self._count_bytes("read", sum(_byte_size(line) for line in lines))
+        return lines
+
+    def write_file(self, filepath: str, content: file_streams.Content, mode: str = 'w') -> bool:
+        """
+        Записать или создать файл.
+        content - строка, байты или поток порций; при mode='w' файл
+        подменяется атомарно, читатели не видят частичной записи.
+        """
+        started = time.perf_counter()
+        self._check_permission("WRITE", filepath)
+        try:
+            self._check_write_folder(filepath)
+        except PermissionError:
+            self._record("WRITE", filepath, audit.DENY, started)
+            raise
 
         try:
-            with open(filepath, mode, encoding='utf-8') as f:
-                f.write(content)
+            self._write_checked(filepath, content, mode)
+            self._record("WRITE", filepath, audit.ALLOW, started)
 
-            rel_path = os.path.relpath(filepath, self.workspace_root)
-            self.logger.info(f"Пользователь {self.session.user.username} записал файл: {rel_path}")
+            self.logger.info("Пользователь {} записал файл: {}", self.session.user.username,
+                             os.path.relpath(filepath, self.workspace_root))
 
             return True
 
         except Exception as e:
+            self._record("WRITE", filepath, audit.ERROR, started)
             self.logger.error(f"Ошибка записи файла {filepath}: {e}")
             raise
 
+    def _check_write_folder(self, filepath: str):
+        """Проверяем, можно ли писать в эту папку (по папке верхнего уровня workspace)"""
+        folder_name = self._top_folder(os.path.normpath(os.path.abspath(filepath)))
+        if folder_name is None:
+            raise PermissionError(const.ERROR_PERMISSION_DENIED)
+        if folder_name.startswith("user_"):  # Личная папка - только своя
+            if folder_name != f"user_{self.session.user.username}":
+                raise PermissionError(f"Нет прав на запись в папку '{folder_name}'")
+        elif folder_name not in self._role_folders():
+            raise PermissionError(f"Нет прав на запись в папку '{folder_name}'")
+
+    def _write_checked(self, filepath: str, content: file_streams.Content, mode: str = 'w'):
+        """Запись файла после проверки прав"""
+        # Создаем директорию если не существует
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        if mode == 'a':
+            written = file_streams.append_write(filepath, content, self.durability)
+        else:
+            written = file_streams.atomic_write(filepath, content, self.durability)
+        self._count_bytes("write", written)
+
+        self.index.update_file(filepath, owner=self.session.user.username)
+
     def edit_file(self, filepath: str) -> bool:
         """Редактировать существующий файл"""
         if not os.path.exists(filepath):
             raise FileNotFoundError(const.ERROR_FILE_NOT_FOUND)
 
-        if not self.acl.check_permission(self.session.user.role, "WRITE", filepath):
-            raise PermissionError(const.ERROR_PERMISSION_DENIED)
+        self._check_permission("WRITE", filepath)
 
         # Читаем текущее содержимое
         current_content = self.read_file(filepath)
@@ -149,41 +379,187 @@ class FileOperations:
         return self.write_file(filepath, new_content, 'w')
 
     def delete_file(self, filepath: str) -> bool:
-        """Удалить файл"""
+        """Удалить файл (с подтверждением)"""
+        rel_path = self._check_delete(filepath)
+
+        # Подтверждение
+        print(f"\n❓ Вы уверены, что хотите удалить файл '{rel_path}'?")
+        confirm = input("Введите 'ДА' для подтверждения: ").strip().upper()
+
+        if confirm == "ДА":
+            return self._remove_checked(filepath, rel_path)
+        else:
+            print("❌ Удаление отменено")
+            return False
+
+    def remove_file(self, filepath: str) -> bool:
+        """Удалить файл без подтверждения (для программных вызовов)"""
+        rel_path = self._check_delete(filepath)
+        return self._remove_checked(filepath, rel_path)
+
+    def _check_delete(self, filepath: str) -> str:
+        """Проверки перед удалением; возвращает путь относительно workspace"""
         if not os.path.exists(filepath):
             raise FileNotFoundError(const.ERROR_FILE_NOT_FOUND)
 
-        if not self.acl.check_permission(self.session.user.role, "DELETE", filepath):
-            raise PermissionError(const.ERROR_PERMISSION_DENIED)
+        self._check_permission("DELETE", filepath)
 
         # Для безопасности - проверяем что файл в workspace
         try:
-            rel_path = os.path.relpath(filepath, self.workspace_root)
+            return os.path.relpath(filepath, self.workspace_root)
         except ValueError:
             raise PermissionError("Нельзя удалять файлы вне рабочей директории")
 
-        # Подтверждение
-        print(f"\n❓ Вы уверены, что хотите удалить файл '{rel_path}'?")
-        confirm = input("Введите 'ДА' для подтверждения: ").strip().upper()
+    def _remove_checked(self, filepath: str, rel_path: str) -> bool:
+        """Удаление файла после проверки прав"""
+        started = time.perf_counter()
+        try:
+            os.remove(filepath)
+            self.index.remove_file(filepath)
+            self._record("DELETE", filepath, audit.ALLOW, started)
+            self.logger.warning("Пользователь {} удалил файл: {}", self.session.user.username, rel_path)
+            return True
+        except Exception as e:
+            self._record("DELETE", filepath, audit.ERROR, started)
+            self.logger.error(f"Ошибка удаления файла {filepath}: {e}")
+            raise
 
-        if confirm == "ДА":
+    def resolve_path(self, path: str) -> str:
+        """Абсолютный путь; относительные пути считаются от workspace"""
+        if not os.path.isabs(path):
+            path = os.path.join(self.workspace_root, path)
+        return os.path.normpath(path)
+
+    # ========== ПАКЕТНЫЕ ОПЕРАЦИИ ==========
+
+    def _expand_patterns(self, paths: Iterable[str]) -> List[str]:
+        """
+        Раскрытие glob-шаблонов; шаблоны вида 'папка/имя' раскрываются по индексу.
+        Шаблоны раскрываются только по папкам пользователя: пути вне их
+        отбрасываются молча, чтобы отказы не раскрывали имена чужих файлов.
+        """
+        expanded = []
+        accessible = None
+        for path in paths:
+            if not glob.has_magic(path):
+                expanded.append(self.resolve_path(path))
+                continue
+
+            if accessible is None:
+                accessible = self._accessible_folders()
+            rel_path = os.path.relpath(self.resolve_path(path), self.workspace_root)
+            parts = rel_path.split(os.sep)
+            if len(parts) == 2 and not parts[0].startswith(os.pardir):
+                folder_pattern, name_pattern = parts
+                for folder in fnmatch.filter(accessible, folder_pattern):
+                    for entry in self.index.iter_folder(folder):
+                        if fnmatch.fnmatch(entry.name, name_pattern):
+                            expanded.append(os.path.join(self.workspace_root, folder, entry.name))
+            else:
+                expanded.extend(match for match in sorted(glob.glob(self.resolve_path(path)))
+                                if self._top_folder(match) in accessible)
+
+        return expanded
+
+    def _top_folder(self, path: str) -> Optional[str]:
+        """Папка верхнего уровня workspace для пути (None - вне workspace)"""
+        root_prefix = os.path.join(self.workspace_root, "")
+        if not path.startswith(root_prefix):
+            return None
+        return path[len(root_prefix):].partition(os.sep)[0] or None
+
+    def _run_batch(self, operation: str, items: List[Tuple[str, object]],
+                   action: Callable[[str, object], object]) -> List[BatchResult]:
+        """
+        Выполнение пакета: права проверяются один раз на группу (папку),
+        операции над файлами выполняются в ограниченном пуле потоков.
+        """
+        results: List[Optional[BatchResult]] = [None] * len(items)
+
+        # Группируем позиции по папке верхнего уровня
+        groups: Dict[Optional[str], List[int]] = {}
+        for position, (path, _) in enumerate(items):
+            groups.setdefault(self._top_folder(path), []).append(position)
+
+        allowed: List[int] = []
+        for folder, positions in groups.items():
+            started = time.perf_counter()
+            first_path = items[positions[0]][0]
+            if folder is not None and self._allowed(operation, first_path):
+                allowed.extend(positions)
+                continue
+
+            for position in positions:
+                self._record(operation, items[position][0], audit.DENY, started)
+                results[position] = BatchResult(path=items[position][0], ok=False,
+                                                error=const.ERROR_PERMISSION_DENIED)
+
+        def run(position: int) -> BatchResult:
+            path, payload = items[position]
+            started = time.perf_counter()
             try:
-                os.remove(filepath)
-                self.logger.warning(f"Пользователь {self.session.user.username} удалил файл: {rel_path}")
-                return True
+                result = BatchResult(path=path, ok=True, value=action(path, payload))
+            except FileNotFoundError:
+                result = BatchResult(path=path, ok=False, error=const.ERROR_FILE_NOT_FOUND)
+            except PermissionError as e:
+                result = BatchResult(path=path, ok=False, error=str(e))
+                self._record(operation, path, audit.DENY, started)
+                return result
             except Exception as e:
-                self.logger.error(f"Ошибка удаления файла {filepath}: {e}")
-                raise
-        else:
-            print("❌ Удаление отменено")
-            return False
+                result = BatchResult(path=path, ok=False, error=str(e))
+            self._record(operation, path, audit.ALLOW if result.ok else audit.ERROR, started)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, self.batch_workers)) as executor:
+            for position, result in zip(allowed, executor.map(run, allowed)):
+                results[position] = result
+
+        failed = sum(1 for result in results if not result.ok)
+        self.logger.info("Пользователь {}: пакетная операция {} над {} файлами (ошибок: {})",
+                         self.session.user.username, operation, len(items), failed)
+        return results
+
+    def read_many(self, paths: Iterable[str]) -> List[BatchResult]:
+        """Прочитать несколько файлов (пути или glob-шаблоны относительно workspace)"""
+        def read(path: str, _) -> str:
+            try:
+                return "".join(self._count_read(file_streams.iter_text(path)))
+            except UnicodeDecodeError:
+                raise ValueError("Файл содержит бинарные данные")
+
+        items = [(path, None) for path in self._expand_patterns(paths)]
+        return self._run_batch("READ", items, read)
+
+    def write_many(self, files: Union[Mapping[str, file_streams.Content],
+                                      Iterable[Tuple[str, file_streams.Content]]],
+                   mode: str = 'w') -> List[BatchResult]:
+        """Записать несколько файлов: {путь: содержимое} или пары (путь, содержимое)"""
+        if isinstance(files, Mapping):
+            files = files.items()
+
+        def write(path: str, content) -> bool:
+            self._check_write_folder(path)
+            self._write_checked(path, content, mode)
+            return True
+
+        items = [(self.resolve_path(path), content) for path, content in files]
+        return self._run_batch("WRITE", items, write)
+
+    def delete_many(self, paths: Iterable[str]) -> List[BatchResult]:
+        """Удалить несколько файлов без подтверждения (пути или glob-шаблоны)"""
+        def delete(path: str, _) -> bool:
+            os.remove(path)
+            self.index.remove_file(path)
+            return True
+
+        items = [(path, None) for path in self._expand_patterns(paths)]
+        return self._run_batch("DELETE", items, delete)
 
     def create_file(self, folder_path: str, filename: str, content: str = "") -> str:
         """Создать новый файл"""
         filepath = os.path.join(folder_path, filename)
 
-        if not self.acl.check_permission(self.session.user.role, "WRITE", filepath):
-            raise PermissionError(const.ERROR_PERMISSION_DENIED)
+        self._check_permission("WRITE", filepath)
 
         # Проверяем расширение файла
         if not self._is_valid_filename(filename):
@@ -215,4 +591,11 @@ class FileOperations:
     def _get_current_timestamp(self) -> str:
         """Получить текущую дату и время"""
         from datetime import datetime
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _byte_size(chunk: Union[str, bytes]) -> int:
+    """Размер порции в байтах UTF-8 (ASCII-текст без кодирования)"""
+    if isinstance(chunk, bytes) or chunk.isascii():
+        return len(chunk)
+    return len(chunk.encode('utf-8'))
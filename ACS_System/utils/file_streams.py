@@ -0,0 +1,244 @@
+"""
+Потоковое чтение и атомарная запись файлов
+
+Файлы читаются ограниченными порциями; большие файлы отображаются в
+память через mmap, чтобы диапазонные чтения и поиск последних строк не
+загружали весь файл. Запись идет во временный файл в той же папке,
+который затем подменяет целевой через os.replace, поэтому читатели не
+видят частично записанных файлов.
+"""
+
+import codecs
+import mmap
+import os
+import tempfile
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# Политики надежности записи
+DURABILITY_NONE = "none"        # без fsync
+DURABILITY_FILE = "file"        # fsync файла
+DURABILITY_DIR = "dir"          # fsync файла и каталога
+DURABILITY_POLICIES = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_DIR)
+
+# Права нового файла до umask, как у open(..., 'w')
+NEW_FILE_MODE = 0o666
+
+_umask_lock = threading.Lock()
+
+Content = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+
+def _resolve_range(file_size: int, offset: int, length: Optional[int]) -> tuple:
+    """Границы диапазона [начало, конец) в пределах файла"""
+    if offset < 0:
+        offset = max(file_size + offset, 0)
+    start = min(offset, file_size)
+    end = file_size if length is None else min(start + max(length, 0), file_size)
+    return start, end
+
+
+def iter_bytes(filepath: str, offset: int = 0, length: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Чтение диапазона байт порциями не больше chunk_size.
+    Отрицательное смещение отсчитывается от конца файла.
+    """
+    with open(filepath, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        start, end = _resolve_range(file_size, offset, length)
+
+        if file_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for position in range(start, end, chunk_size):
+                    yield mm[position:min(position + chunk_size, end)]
+            return
+
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def iter_text(filepath: str, offset: int = 0, length: Optional[int] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = 'utf-8') -> Iterator[str]:
+    """Чтение диапазона байт с инкрементальным декодированием текста"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter_bytes(filepath, offset, length, chunk_size)
+    whole_file = offset == 0 and length is None
+
+    first = True
+    for chunk in chunks:
+        if first and not whole_file and encoding.lower().replace('-', '') == 'utf8':
+            # Диапазон может начинаться в середине многобайтного символа
+            chunk = chunk.lstrip(bytes(range(0x80, 0xC0)))
+        first = False
+
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    # Незавершенный символ в конце диапазона допустим только для частичного чтения
+    tail = decoder.decode(b'', final=whole_file)
+    if tail:
+        yield tail
+
+
+def iter_lines(filepath: str, start: int = 0, count: Optional[int] = None,
+               encoding: str = 'utf-8') -> Iterator[str]:
+    """Строки файла с номера start (с нуля), не больше count строк"""
+    with open(filepath, 'r', encoding=encoding, newline='') as f:
+        stop = None if count is None else start + count
+        for line in islice(f, start, stop):
+            yield line
+
+
+def head_lines(filepath: str, count: int, encoding: str = 'utf-8') -> List[str]:
+    """Первые count строк файла"""
+    return list(iter_lines(filepath, 0, count, encoding))
+
+
+def tail_lines(filepath: str, count: int, encoding: str = 'utf-8') -> List[str]:
+    """Последние count строк файла (поиск с конца, без чтения всего файла)"""
+    if count <= 0:
+        return []
+
+    with open(filepath, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size == 0:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = file_size
+            # Завершающий перевод строки не начинает новую строку
+            if mm[end - 1:end] == b'\n':
+                end -= 1
+
+            position = end
+            for _ in range(count):
+                position = mm.rfind(b'\n', 0, position)
+                if position < 0:
+                    break
+
+            data = mm[position + 1:file_size]
+
+    return data.decode(encoding).splitlines(keepends=True)
+
+
+def _iter_encoded(content: Content, encoding: str) -> Iterator[bytes]:
+    """Порции содержимого в байтах"""
+    if isinstance(content, (str, bytes)):
+        content = (content,)
+
+    for chunk in content:
+        yield chunk.encode(encoding) if isinstance(chunk, str) else chunk
+
+
+def _check_durability(durability: str):
+    if durability not in DURABILITY_POLICIES:
+        raise ValueError(f"Неизвестная политика надежности записи: {durability}")
+
+
+def fsync_directory(directory: str):
+    """Сброс на диск записи каталога (после создания или переименования файла)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        # Windows не позволяет открыть каталог для fsync
+        return
+
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _current_umask() -> int:
+    """umask процесса без его изменения, если это возможно"""
+    # os.umask меняет маску для всех потоков, поэтому сначала читаем /proc (Linux)
+    try:
+        with open('/proc/self/status', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+
+    with _umask_lock:
+        mask = os.umask(0)
+        os.umask(mask)
+    return mask
+
+
+def atomic_write(filepath: str, content: Content, durability: str = DURABILITY_FILE,
+                 encoding: str = 'utf-8') -> int:
+    """
+    Атомарная запись: содержимое (строка, байты или поток порций) пишется
+    во временный файл той же папки и подменяет целевой через os.replace.
+    Возвращает число записанных байт.
+    """
+    _check_durability(durability)
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix=".tmp", dir=directory)
+
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in _iter_encoded(content, encoding):
+                f.write(chunk)
+                written += len(chunk)
+
+            f.flush()
+            if durability != DURABILITY_NONE:
+                os.fsync(f.fileno())
+
+        # mkstemp создает файл с правами 0600: сохраняем права заменяемого файла,
+        # новый получает те же права, что дал бы open(..., 'w')
+        try:
+            mode = os.stat(filepath).st_mode & 0o777
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE & ~_current_umask()
+        os.chmod(tmp_path, mode)
+
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    if durability == DURABILITY_DIR:
+        fsync_directory(directory)
+
+    return written
+
+
+def append_write(filepath: str, content: Content, durability: str = DURABILITY_FILE,
+                 encoding: str = 'utf-8') -> int:
+    """Дозапись в конец файла порциями с учетом политики надежности"""
+    _check_durability(durability)
+
+    created = not os.path.exists(filepath)
+    written = 0
+    with open(filepath, 'ab') as f:
+        for chunk in _iter_encoded(content, encoding):
+            f.write(chunk)
+            written += len(chunk)
+
+        f.flush()
+        if durability != DURABILITY_NONE:
+            os.fsync(f.fileno())
+
+    if created and durability == DURABILITY_DIR:
+        fsync_directory(os.path.dirname(os.path.abspath(filepath)))
+
+    return written
@@ -0,0 +1,149 @@
+"""
+Постраничный вывод списков файлов
+
+Страницы строятся по ключу сортировки (keyset-пагинация): очередная
+страница начинается сразу после ключа последней записи предыдущей.
+Индекс workspace хранит упорядоченные снимки папок (сортировка один раз
+до следующего изменения папки), поэтому страница - это поиск ключа
+делением пополам в каждой папке и слияние папок (heapq.merge): время
+O(папок * log N + k), дополнительная память O(папок + k) и не зависит
+ни от размера папки, ни от номера страницы.
+"""
+
+import base64
+import bisect
+import heapq
+import json
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models import FileMetadata
+
+# Ключи сортировки; имя папки и файла в конце делают ключ уникальным
+SORT_KEYS: Dict[str, Callable[[FileMetadata], tuple]] = {
+    'name': lambda m: (m.name, m.folder),
+    'size': lambda m: (m.size, m.folder, m.name),
+    'mtime': lambda m: (m.mtime, m.folder, m.name),
+    'folder': lambda m: (m.folder, m.name),
+}
+
+# Типы элементов ключа для проверки токена продолжения
+_NUMBER = (int, float)
+SORT_KEY_TYPES: Dict[str, Tuple[tuple, ...]] = {
+    'name': ((str,), (str,)),
+    'size': (_NUMBER, (str,), (str,)),
+    'mtime': (_NUMBER, (str,), (str,)),
+    'folder': ((str,), (str,)),
+}
+
+
+def get_sort_key(sort_by: str) -> Callable[[FileMetadata], tuple]:
+    """Функция ключа сортировки по имени"""
+    try:
+        return SORT_KEYS[sort_by]
+    except KeyError:
+        raise ValueError(f"Неизвестный ключ сортировки: {sort_by}")
+
+
+def filter_entries(entries: Iterable[FileMetadata], extensions: Optional[Iterable[str]] = None,
+                   min_size: Optional[int] = None, max_size: Optional[int] = None) -> Iterator[FileMetadata]:
+    """Фильтрация записей по расширению и диапазону размеров"""
+    if extensions is not None:
+        extensions = tuple(
+            ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in extensions
+        )
+
+    for entry in entries:
+        if extensions is not None and not entry.name.lower().endswith(extensions):
+            continue
+        if min_size is not None and entry.size < min_size:
+            continue
+        if max_size is not None and entry.size > max_size:
+            continue
+        yield entry
+
+
+def top_k(entries: Iterable[FileMetadata], k: int, sort_by: str = 'size',
+          descending: bool = True) -> List[FileMetadata]:
+    """Первые k записей по ключу без полной сортировки"""
+    key = get_sort_key(sort_by)
+    if descending:
+        return heapq.nlargest(k, entries, key=key)
+    return heapq.nsmallest(k, entries, key=key)
+
+
+def check_page(page_size: int, offset: int = 0):
+    """Проверка размера страницы и смещения"""
+    if page_size < 1:
+        raise ValueError("Размер страницы должен быть не меньше 1")
+    if offset < 0:
+        raise ValueError("Смещение не может быть отрицательным")
+
+
+def iter_sorted(index, folders: Iterable[str], sort_by: str = 'name', descending: bool = False,
+                after: Optional[tuple] = None) -> Iterator[FileMetadata]:
+    """Записи папок индекса по ключу, начиная после ключа after (без сортировки на запрос)"""
+    key = get_sort_key(sort_by)
+    streams = []
+    for folder in folders:
+        keys, entries = index.sorted_folder(folder, sort_by, key)
+        if descending:
+            end = len(keys) if after is None else bisect.bisect_left(keys, after)
+            streams.append(islice(reversed(entries), len(entries) - end, None))
+        else:
+            start = 0 if after is None else bisect.bisect_right(keys, after)
+            streams.append(islice(entries, start, None))
+    # Ключ уникален (содержит папку), поэтому слияние дает общий порядок
+    return heapq.merge(*streams, key=key, reverse=descending)
+
+
+def take_page(entries: Iterator[FileMetadata], page_size: int, sort_by: str = 'name',
+              offset: int = 0) -> Tuple[List[FileMetadata], Optional[tuple]]:
+    """
+    Страница из упорядоченного потока записей (смещение пропускается без хранения).
+    Возвращает (записи, ключ последней записи или None, если страниц больше нет).
+    """
+    check_page(page_size, offset)
+    # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+    page = list(islice(entries, offset, offset + page_size + 1))
+    if len(page) <= page_size:
+        return page, None
+
+    page = page[:page_size]
+    return page, get_sort_key(sort_by)(page[-1])
+
+
+def paginate(entries: Iterable[FileMetadata], page_size: int) -> Iterator[List[FileMetadata]]:
+    """Разбиение упорядоченного потока записей на страницы"""
+    check_page(page_size)
+    entries = iter(entries)
+    while True:
+        page = list(islice(entries, page_size))
+        if not page:
+            return
+        yield page
+
+
+def encode_token(sort_by: str, descending: bool, last_key: tuple) -> str:
+    """Токен продолжения листинга"""
+    payload = json.dumps([sort_by, descending, list(last_key)], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_token(token: str, sort_by: str, descending: bool) -> tuple:
+    """Разбор токена продолжения с проверкой параметров сортировки"""
+    try:
+        token_sort_by, token_descending, last_key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Некорректный токен продолжения")
+
+    if token_sort_by != sort_by or token_descending != descending:
+        raise ValueError("Токен продолжения выдан для другой сортировки")
+
+    # Ключ сравнивается с ключами записей: состав и типы должны совпадать
+    types = SORT_KEY_TYPES.get(sort_by)
+    if (types is None or not isinstance(last_key, list) or len(last_key) != len(types)
+            or not all(isinstance(value, allowed) and not isinstance(value, bool)
+                       for value, allowed in zip(last_key, types))):
+        raise ValueError("Некорректный токен продолжения")
+
+    return tuple(last_key)
@@ -1,14 +1,93 @@
 """
 Настройка логирования через loguru
 Только для технической информации, не для пользователя!
+
+Сообщения на частых путях (отказы в доступе, неудачные входы) пишутся
+через RateLimitedLogger.limited: по ключу сообщения пропускается не
+больше burst записей за interval секунд, остальные считаются и
+выводятся одной сводкой. Аргументы передаются отдельно от шаблона
+("Роль {} не имеет права {}", role, op) - loguru форматирует сообщение,
+только если его уровень кто-то принимает.
 """
 
+import atexit
 import sys
-from loguru import logger
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
+DEFAULT_RATE_INTERVAL = 10.0
+DEFAULT_RATE_BURST = 10
+# Ограничение числа отслеживаемых ключей (ключи могут зависеть от ввода)
+MAX_RATE_KEYS = 4096
+
+
+class RateLimitedLogger:
+    """Обертка логгера с ограничением частоты сообщений по ключу"""
+
+    def __init__(self, logger, interval: float = DEFAULT_RATE_INTERVAL, burst: int = DEFAULT_RATE_BURST):
+        self._logger = logger
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        # ключ -> [начало окна, сообщений в окне, подавлено, уровень]
+        self._windows: "OrderedDict[object, list]" = OrderedDict()
+
+    def __getattr__(self, name):
+        # Остальные методы (debug, info, opt, bind...) - как у обернутого логгера
+        return getattr(self._logger, name)
+
+    def limited(self, level: str, key, message: str, *args, **kwargs):
+        """
+        Сообщение с ограничением частоты по ключу. Подавленные повторы
+        выводятся сводкой при первом сообщении ключа в следующем окне.
+        """
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = [now, 0, 0, level]
+                if len(self._windows) > MAX_RATE_KEYS:
+                    self._report(*self._windows.popitem(last=False))
+            elif now - window[0] >= self.interval:
+                suppressed = window[2]
+                window[:] = [now, 0, 0, level]
+                if suppressed:
+                    self._summary(level, key, suppressed)
+
+            window[1] += 1
+            if window[1] > self.burst:
+                window[2] += 1
+                return
+
+        getattr(self._logger, level)(message, *args, **kwargs)
+
+    def flush_suppressed(self):
+        """Сводки по всем ключам с подавленными сообщениями"""
+        with self._lock:
+            windows, self._windows = self._windows, OrderedDict()
+        for key, window in windows.items():
+            self._report(key, window)
+
+    def _report(self, key, window: list):
+        if window[2]:
+            self._summary(window[3], key, window[2])
+
+    def _summary(self, level: str, key, suppressed: int):
+        getattr(self._logger, level)("Подавлено повторов сообщения {}: {} (окно {} с)",
+                                     key, suppressed, self.interval)
+
+
+def rate_limited(logger) -> RateLimitedLogger:
+    """Логгер с методом limited (уже обернутый возвращается как есть)"""
+    return logger if isinstance(logger, RateLimitedLogger) else RateLimitedLogger(logger)
+
+
 def setup_logger(config: dict):
     """Настройка логирования"""
+    # loguru импортируется при настройке, а не при импорте модуля
+    from loguru import logger
 
     # Удаляем все обработчики по умолчанию
     logger.remove()
@@ -16,6 +95,10 @@ def setup_logger(config: dict):
     # Настройки из конфигурации
     log_level = config.get("log_level", "INFO")
     log_file = config.get("log_file", "system.log")
+    logging_config = config.get("logging") or {}
+    file_sink = logging_config.get("file") or {}
+    console_sink = logging_config.get("console") or {}
+    rate_limit = logging_config.get("rate_limit") or {}
 
     # Формат для файла
     file_format = (
@@ -33,6 +116,7 @@ def setup_logger(config: dict):
     )
 
     # Добавляем обработчик для файла
+    # diagnose выводит значения переменных в трассировке - дорого и раскрывает данные
     logger.add(
         log_file,
         level=log_level,
@@ -40,9 +124,9 @@ def setup_logger(config: dict):
         rotation="10 MB",
         retention="30 days",
         compression="zip",
-        enqueue=True,
-        backtrace=True,
-        diagnose=True
+        enqueue=bool(file_sink.get("enqueue", True)),
+        backtrace=bool(file_sink.get("backtrace", True)),
+        diagnose=bool(file_sink.get("diagnose", False))
     )
 
     # Добавляем обработчик для консоли (только ERROR и выше)
@@ -50,7 +134,16 @@ def setup_logger(config: dict):
         sys.stderr,
         level="ERROR",
         format=console_format,
-        colorize=True
+        colorize=True,
+        backtrace=bool(console_sink.get("backtrace", False)),
+        diagnose=bool(console_sink.get("diagnose", False))
     )
 
-    return logger
\ No newline at end of file
+    limited = RateLimitedLogger(
+        logger,
+        float(rate_limit.get("interval", DEFAULT_RATE_INTERVAL)),
+        int(rate_limit.get("burst", DEFAULT_RATE_BURST))
+    )
+    # Сводки подавленных сообщений не теряются при завершении
+    atexit.register(limited.flush_suppressed)
+    return limited
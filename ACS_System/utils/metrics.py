@@ -0,0 +1,264 @@
+"""
+Метрики производительности
+
+Счетчики и гистограммы задержек по операциям с метками (операция, роль,
+результат). Гистограмма устроена как HDR: значения в микросекундах
+раскладываются по корзинам, ширина которых растет с порядком величины
+(16 корзин на каждую степень двойки), поэтому относительная ошибка
+перцентилей не больше ~6% в любом диапазоне, а запись значения - это
+вычисление индекса и инкремент.
+
+Метрики выводятся таблицей (меню main.py, команда stats клиента) и
+периодически записываются в текстовый файл формата Prometheus с
+атомарной заменой, чтобы сборщик не прочитал частично записанный файл.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+# 2^SUB_BUCKET_BITS корзин на каждую степень двойки
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def bucket_index(value: int) -> int:
+    """Индекс корзины для значения (целые микросекунды)"""
+    if value < 2 * SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKET_COUNT * shift + (value >> shift)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Границы корзины [нижняя, верхняя)"""
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index, index + 1
+    shift = index // SUB_BUCKET_COUNT - 1
+    mantissa = index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """Гистограмма задержек с логарифмически-линейными корзинами"""
+
+    __slots__ = ('counts', 'count', 'total', 'max', '_lock')
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bucket_index(max(int(seconds * 1_000_000), 0))
+        with self._lock:
+            counts = self.counts
+            if index >= len(counts):
+                counts.extend([0] * (index + 1 - len(counts)))
+            counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Значение перцентиля q (0..1) в секундах (середина корзины)"""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if not count:
+            return 0.0
+
+        rank = max(1, int(q * count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) / 2 / 1_000_000, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Counter:
+    """Монотонный счетчик"""
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    """Реестр метрик: (имя, метки) -> счетчик или гистограмма"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.time()
+        self._counters: Dict[Tuple[str, Labels], Counter] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._exporter: Optional[threading.Thread] = None
+
+    def describe(self, name: str, help_text: str):
+        """Описание метрики для экспорта (строка HELP)"""
+        self._help[name] = help_text
+
+    def _get(self, table: dict, factory, name: str, labels: dict):
+        key = (name, tuple(labels.items()))
+        metric = table.get(key)
+        if metric is None:
+            with self._lock:
+                metric = table.setdefault(key, factory())
+        return metric
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Увеличение счетчика"""
+        if self.enabled:
+            self._get(self._counters, Counter, name, labels).inc(amount)
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Запись длительности в гистограмму"""
+        if self.enabled:
+            self._get(self._histograms, Histogram, name, labels).observe(seconds)
+
+    def histograms(self) -> List[Tuple[str, Labels, Histogram]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        return sorted(((name, labels, histogram) for (name, labels), histogram in items),
+                      key=lambda item: (item[0], item[1]))
+
+    def counters(self) -> List[Tuple[str, Labels, Counter]]:
+        with self._lock:
+            items = list(self._counters.items())
+        return sorted(((name, labels, counter) for (name, labels), counter in items),
+                      key=lambda item: (item[0], item[1]))
+
+    def summary(self) -> dict:
+        """Сводка для вывода: гистограммы (мс) и счетчики"""
+        histograms = []
+        for name, labels, histogram in self.histograms():
+            row = {'name': name, 'labels': dict(labels), 'count': histogram.count,
+                   'mean_ms': round(histogram.mean() * 1000, 3), 'max_ms': round(histogram.max * 1000, 3)}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = round(histogram.quantile(q) * 1000, 3)
+            histograms.append(row)
+
+        counters = [{'name': name, 'labels': dict(labels), 'value': counter.value}
+                    for name, labels, counter in self.counters()]
+        return {'uptime': round(time.time() - self.started, 1), 'histograms': histograms, 'counters': counters}
+
+    def render_prometheus(self) -> str:
+        """Текст в формате экспозиции Prometheus (гистограммы как summary)"""
+        lines = []
+        described = set()
+
+        def header(name: str, kind: str):
+            if name in described:
+                return
+            described.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, labels, histogram in self.histograms():
+            header(name, "summary")
+            for q in QUANTILES:
+                lines.append(f"{name}{_format_labels(labels + (('quantile', str(q)),))} {histogram.quantile(q):.6f}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for name, labels, counter in self.counters():
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {counter.value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Атомарная перезапись файла метрик"""
+        atomic_write(path, self.render_prometheus(), durability=DURABILITY_NONE)
+
+    def start_exporter(self, path: str, interval: float = 15.0, logger=None):
+        """Периодическая запись файла метрик в фоновом потоке"""
+        if self._exporter is not None:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    if logger is not None:
+                        logger.error(f"Ошибка записи метрик {path}: {e}")
+
+        self._exporter = threading.Thread(target=worker, name="metrics-exporter", daemon=True)
+        self._exporter.start()
+
+    def close(self):
+        """Остановка фонового экспорта"""
+        self._stop.set()
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_summary(summary: dict) -> List[str]:
+    """Строки таблицы метрик для вывода в консоль"""
+    lines = [f"{'метрика':<28} {'метки':<42} {'кол-во':>8} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'макс мс':>9}"]
+    for row in summary['histograms']:
+        labels = ",".join(f"{k}={v}" for k, v in row['labels'].items())
+        lines.append(f"{row['name']:<28} {labels:<42} {row['count']:>8} {row['p50_ms']:>9.3f} "
+                     f"{row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} {row['max_ms']:>9.3f}")
+    for row in summary['counters']:
+        labels = ",".join(f"{k}={v}" for k, v in row['labels'].items())
+        lines.append(f"{row['name']:<28} {labels:<42} {row['value']:>8}")
+    return lines
+
+
+# Метрики, которые пишут модули системы
+METRIC_HELP = {
+    'acs_auth_seconds': "Длительность аутентификации",
+    'acs_acl_check_seconds': "Длительность проверки прав",
+    'acs_file_op_seconds': "Длительность файловых операций",
+    'acs_file_bytes_total': "Прочитано и записано байт",
+    'acs_menu_actions_total': "Выбранные действия меню main.py",
+}
+
+_registry = MetricsRegistry()
+for _name, _help in METRIC_HELP.items():
+    _registry.describe(_name, _help)
+
+
+def get_registry() -> MetricsRegistry:
+    """Общий реестр метрик процесса"""
+    return _registry
+
+
+def configure(config_manager) -> MetricsRegistry:
+    """Настройка общего реестра по system.metrics и запуск экспорта в файл"""
+    config = config_manager.get_metrics_config()
+    _registry.enabled = config['enabled']
+    if config['enabled'] and config['file']:
+        _registry.start_exporter(config['file'], config['interval'])
+    return _registry
@@ -0,0 +1,206 @@
+"""
+Профилирование по выборке вызовов
+
+Включается в config.yaml (system.profiling). Публичные методы объекта
+(FileOperations, AccessController, Authenticator, UserRepository)
+подменяются на уровне экземпляра обертками: каждый N-й вызов
+выполняется под cProfile и, если включено, под tracemalloc. Профили
+копятся по метке (сессия пользователя или компонент) и сохраняются в
+папку logs/ workspace: .prof для pstats/snakeviz и текстовый отчет с
+самыми дорогими функциями и местами выделения памяти.
+
+Если профилирование выключено, объекты не оборачиваются вовсе.
+Методы-генераторы профилируются только до возврата генератора.
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_TOP = 25
+TRACEBACK_DEPTH = 1
+
+
+class SessionProfile:
+    """Накопленные профили одной метки"""
+
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self.calls: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.alloc_size: Counter = Counter()
+        self.alloc_count: Counter = Counter()
+        self.started = datetime.now()
+
+
+class Profiler:
+    """Выборочное профилирование методов объектов"""
+
+    def __init__(self, directory: str, sample_rate: float = DEFAULT_SAMPLE_RATE, memory: bool = False,
+                 top: int = DEFAULT_TOP, logger=None):
+        self.directory = directory
+        self.every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.memory = memory
+        self.top = top
+        self.logger = logger
+
+        # cProfile допускает один активный профилировщик: одновременно замеряется один вызов
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, SessionProfile] = {}
+
+    def instrument(self, obj, label: Optional[str] = None):
+        """Обертывание публичных методов объекта; возвращает тот же объект"""
+        if not self.every:
+            return obj
+
+        label = label or type(obj).__name__
+        for name, _ in inspect.getmembers(type(obj), inspect.isfunction):
+            if name.startswith('_'):
+                continue
+            method = getattr(obj, name)
+            setattr(obj, name, self._wrap(method, label, f"{type(obj).__name__}.{name}"))
+        return obj
+
+    def _wrap(self, method, label: str, name: str):
+        calls = itertools.count()
+        every = self.every
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if next(calls) % every or not self._active.acquire(blocking=False):
+                return method(*args, **kwargs)
+            try:
+                return self._profile_call(label, name, method, args, kwargs)
+            finally:
+                self._active.release()
+
+        return wrapper
+
+    def _profile_call(self, label: str, name: str, method, args, kwargs):
+        profile = cProfile.Profile()
+        trace = self.memory and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start(TRACEBACK_DEPTH)
+
+        started = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (например, отладчик)
+            profile = None
+        try:
+            return method(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - started
+            snapshot = None
+            if trace:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+            self._collect(label, name, profile, snapshot, elapsed)
+
+    def _collect(self, label: str, name: str, profile, snapshot, elapsed: float):
+        allocations = []
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            allocations = snapshot.statistics('lineno')
+
+        with self._lock:
+            session = self._sessions.get(label)
+            if session is None:
+                session = self._sessions[label] = SessionProfile()
+
+            session.calls[name] += 1
+            session.seconds[name] += elapsed
+            if profile is not None:
+                if session.stats is None:
+                    session.stats = pstats.Stats(profile)
+                else:
+                    session.stats.add(profile)
+            for stat in allocations:
+                site = str(stat.traceback[0])
+                session.alloc_size[site] += stat.size
+                session.alloc_count[site] += stat.count
+
+    def dump(self, label: str) -> Optional[str]:
+        """Сохранение и сброс профиля метки; возвращает путь отчета"""
+        with self._lock:
+            session = self._sessions.pop(label, None)
+        if session is None:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = re.sub(r"[^\w.-]", "_", label)
+        base = os.path.join(self.directory, f"profile-{safe_label}-{datetime.now():%Y%m%d-%H%M%S-%f}")
+
+        if session.stats is not None:
+            session.stats.dump_stats(base + ".prof")
+        atomic_write(base + ".txt", self._report(label, session), durability=DURABILITY_NONE)
+
+        if self.logger is not None:
+            self.logger.info("Профиль {} сохранен: {}.txt", label, base)
+        return base + ".txt"
+
+    def dump_all(self):
+        """Сохранение профилей всех меток"""
+        with self._lock:
+            labels = list(self._sessions)
+        for label in labels:
+            try:
+                self.dump(label)
+            except OSError as e:
+                if self.logger is not None:
+                    self.logger.error(f"Ошибка сохранения профиля {label}: {e}")
+
+    def _report(self, label: str, session: SessionProfile) -> str:
+        out = io.StringIO()
+        out.write(f"Профиль: {label}\n")
+        out.write(f"Период: {session.started:%Y-%m-%d %H:%M:%S} - {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+        out.write(f"Выборка: каждый {self.every}-й вызов\n\n")
+
+        out.write(f"{'вызовов':>8} {'всего мс':>10} {'сред. мс':>9}  метод\n")
+        for name, count in session.calls.most_common():
+            total_ms = session.seconds[name] * 1000
+            out.write(f"{count:>8} {total_ms:>10.2f} {total_ms / count:>9.3f}  {name}\n")
+
+        if session.stats is not None:
+            out.write(f"\nФункции по суммарному времени (первые {self.top}):\n")
+            session.stats.stream = out
+            session.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        if session.alloc_size:
+            out.write(f"\nВыделения памяти, живые в конце вызова (первые {self.top}):\n")
+            for site, size in session.alloc_size.most_common(self.top):
+                out.write(f"{size / 1024:>10.1f} КиБ {session.alloc_count[site]:>8} блоков  {site}\n")
+
+        return out.getvalue()
+
+    def close(self):
+        """Сохранение накопленных профилей"""
+        self.dump_all()
+
+
+def open_profiler(config_manager, logger=None) -> Optional[Profiler]:
+    """Профилировщик по настройкам system.profiling (None, если выключен)"""
+    config = config_manager.get_profiling_config()
+    if not config['enabled']:
+        return None
+    return Profiler(config['directory'], config['sample_rate'], config['memory'], config['top'], logger)
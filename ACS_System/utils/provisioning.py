@@ -0,0 +1,156 @@
+"""
+Подготовка рабочей директории
+
+Результат подготовки записывается в манифест: отпечаток состава системных
+папок и тестовых файлов и отметка источника пользователей (время
+модификации и размер файла). Список пользователей, для которых созданы
+личные папки, хранится рядом отдельным файлом. Если ничего не изменилось,
+подготовка пропускается после чтения небольшого манифеста; иначе папки
+создаются только для новых пользователей в пуле потоков.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+MANIFEST_VERSION = 1
+PROVISION_CHUNK_SIZE = 256
+
+# (имя файла, содержимое)
+FileSpec = Tuple[str, str]
+
+
+class WorkspaceProvisioner:
+    """Создание папок и тестовых файлов workspace с учетом манифеста"""
+
+    def __init__(self, workspace_root: str, manifest_file: str, workers: int = 8,
+                 progress: Optional[Callable[[int, int], None]] = None):
+        self.workspace_root = workspace_root
+        self.manifest_file = Path(manifest_file)
+        self.users_file = self.manifest_file.with_suffix(".users")
+        self.workers = workers
+        # progress(обработано пользователей, всего новых)
+        self.progress = progress
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def _save_manifest(self, manifest: dict):
+        atomic_write(str(self.manifest_file), json.dumps(manifest, ensure_ascii=False), durability=DURABILITY_NONE)
+
+    def _load_users(self) -> set:
+        """Пользователи, для которых уже созданы личные папки"""
+        try:
+            with open(self.users_file, 'r', encoding='utf-8') as f:
+                return {line.rstrip('\n') for line in f if line.strip()}
+        except OSError:
+            return set()
+
+    def _save_users(self, usernames: Iterable[str]):
+        atomic_write(str(self.users_file), (f"{name}\n" for name in usernames), durability=DURABILITY_NONE)
+
+    @staticmethod
+    def layout_hash(folders: Iterable[str], sample_files: Dict[str, List[FileSpec]]) -> str:
+        """Отпечаток состава системных папок и тестовых файлов"""
+        layout = {'folders': sorted(folders), 'files': {k: sorted(v) for k, v in sample_files.items()}}
+        return hashlib.sha256(json.dumps(layout, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def provision(self, folders: Iterable[str], sample_files: Dict[str, List[FileSpec]],
+                  users: Callable[[], Iterable[Tuple[str, str]]], users_stamp: Sequence,
+                  user_files: Callable[[str, str], List[FileSpec]]) -> int:
+        """
+        Подготовка workspace. users() возвращает пары (имя, роль) и вызывается
+        только если источник пользователей изменился; user_files(имя, роль) -
+        файлы личной папки. Возвращает число подготовленных пользователей.
+        """
+        folders = sorted(set(folders))
+        layout = self.layout_hash(folders, sample_files)
+        manifest = self._load_manifest()
+        users_stamp = list(users_stamp)
+
+        workspace_exists = os.path.isdir(self.workspace_root)
+        if (workspace_exists and manifest.get('layout') == layout
+                and manifest.get('users_stamp') == users_stamp):
+            return 0
+
+        if not workspace_exists or manifest.get('layout') != layout:
+            self._create_layout(folders, sample_files)
+
+        # Если workspace создается заново, личные папки нужны всем
+        known = self._load_users() if workspace_exists and manifest else set()
+
+        current = {}
+        for username, role in users():
+            current[username] = role
+        new_users = [(name, role) for name, role in current.items() if name not in known]
+
+        self._provision_users(new_users, user_files)
+
+        # Список пользователей пишется раньше манифеста: манифест подтверждает его
+        self._save_users(sorted(current))
+        self._save_manifest({
+            'version': MANIFEST_VERSION,
+            'layout': layout,
+            'users_stamp': users_stamp,
+        })
+        return len(new_users)
+
+    def _create_layout(self, folders: List[str], sample_files: Dict[str, List[FileSpec]]):
+        """Системные папки и тестовые файлы"""
+        os.makedirs(self.workspace_root, exist_ok=True)
+        for folder in folders:
+            os.makedirs(os.path.join(self.workspace_root, folder), exist_ok=True)
+
+        for folder, files in sample_files.items():
+            os.makedirs(os.path.join(self.workspace_root, folder), exist_ok=True)
+            for filename, content in files:
+                _create_file(os.path.join(self.workspace_root, folder, filename), content)
+
+    def _provision_users(self, users: List[Tuple[str, str]],
+                         user_files: Callable[[str, str], List[FileSpec]]):
+        """Личные папки пользователей; большие наборы - в пуле потоков"""
+        total = len(users)
+        if not total:
+            return
+
+        def provision_chunk(chunk):
+            for username, role in chunk:
+                folder = os.path.join(self.workspace_root, f"user_{username}")
+                os.makedirs(folder, exist_ok=True)
+                for filename, content in user_files(username, role):
+                    _create_file(os.path.join(folder, filename), content)
+            return len(chunk)
+
+        chunks = [users[i:i + PROVISION_CHUNK_SIZE] for i in range(0, total, PROVISION_CHUNK_SIZE)]
+        done = 0
+        if len(chunks) == 1:
+            done = provision_chunk(chunks[0])
+            self._report(done, total)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for count in executor.map(provision_chunk, chunks):
+                done += count
+                self._report(done, total)
+
+    def _report(self, done: int, total: int):
+        if self.progress is not None:
+            self.progress(done, total)
+
+
+def _create_file(filepath: str, content: str):
+    """Создание файла, если его нет (без отдельной проверки существования)"""
+    try:
+        with open(filepath, 'x', encoding='utf-8') as f:
+            f.write(content)
+    except FileExistsError:
+        pass
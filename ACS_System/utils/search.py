@@ -0,0 +1,470 @@
+"""
+Полнотекстовый поиск по файлам workspace
+
+Инвертированный индекс: терм -> документ -> позиции терма. Текст
+приводится к нижнему регистру, ё заменяется на е, у слов отсекаются
+окончания (легкий стеммер для русского и английского), поэтому
+"отчёты" находит "отчет" и "отчета". Имя файла индексируется вместе с
+содержимым.
+
+Запрос - слова через пробел, все должны встречаться в файле:
+
+    прибыль отчет        - оба слова
+    "отчет за месяц"     - фраза (слова подряд)
+    прото*               - префикс
+
+Результаты ранжируются по BM25. Индекс обновляется по событиям
+WorkspaceIndex (запись и удаление через FileOperations, пересканирование
+папок по mtime): событие только ставит файл в очередь, а чтение и
+разбор выполняются перед поиском или фоновым потоком, поэтому запись
+файла не замедляется. Первичное построение (новый или поврежденный
+индекс) идет в фоновом потоке start_sync; поиск в это время не ждет его
+и возвращает результаты по уже разобранным файлам. Фильтрация по правам - на вызывающей стороне
+(FileOperations.search, main.py): поиск получает список папок.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.models import FileMetadata, SearchHit
+from utils.file_streams import DURABILITY_NONE, atomic_write, iter_lines
+
+SEARCH_VERSION = 1
+
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+DEFAULT_LIMIT = 20
+# Первые байты файла, по которым он признается бинарным
+BINARY_PROBE = 4096
+MAX_TOKEN_LENGTH = 64
+# Префикс раскрывается не более чем в столько термов
+MAX_PREFIX_TERMS = 256
+SNIPPET_LENGTH = 120
+SNIPPET_MAX_LINES = 2000
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Окончания по убыванию длины; основа после отсечения - не короче MIN_STEM
+RU_ENDINGS = tuple(sorted((
+    "иями", "ями", "ами", "иях", "ием", "ией", "ого", "его", "ому", "ему", "ыми", "ими", "ях", "ах",
+    "ии", "ия", "ие", "ию", "ий", "ов", "ев", "ой", "ей", "ый", "ая", "яя", "ое", "ее", "ом", "ем",
+    "ам", "ям", "ую", "юю", "ые", "ых", "их", "ью", "ы", "и", "а", "я", "о", "е", "у", "ю", "ь", "й",
+), key=len, reverse=True))
+MIN_STEM = 3
+
+# Элементы запроса
+TERM = "term"
+PHRASE = "phrase"
+PREFIX = "prefix"
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр и ё -> е"""
+    return text.lower().replace("ё", "е")
+
+
+def stem(token: str) -> str:
+    """Отсечение окончания (русский или английский по алфавиту слова)"""
+    if token.isdigit():
+        return token
+    if CYRILLIC_RE.search(token):
+        for ending in RU_ENDINGS:
+            if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM:
+                return token[:-len(ending)]
+        return token
+    if token.endswith("ies") and len(token) - 3 >= MIN_STEM:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith("ss") and len(token) - 1 >= MIN_STEM:
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Термы текста в порядке следования"""
+    return [stem(token) for token in TOKEN_RE.findall(normalize(text)) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+def parse_query(query: str) -> List[Tuple[str, List[str]]]:
+    """Элементы запроса: (TERM | PHRASE | PREFIX, термы)"""
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            terms = tokenize(phrase)
+            if len(terms) > 1:
+                clauses.append((PHRASE, terms))
+            elif terms:
+                clauses.append((TERM, terms))
+        elif word.endswith("*"):
+            tokens = TOKEN_RE.findall(normalize(word))
+            if tokens:
+                # Длинный префикс сводится к основе: "отчеты*" ищет "отчет..."
+                prefix = tokens[-1] if len(tokens[-1]) <= MIN_STEM else stem(tokens[-1])
+                clauses.extend((TERM, [stem(token)]) for token in tokens[:-1])
+                clauses.append((PREFIX, [prefix]))
+        else:
+            clauses.extend((TERM, [term]) for term in tokenize(word))
+    return clauses
+
+
+@dataclass
+class Document:
+    """Проиндексированный файл: метаданные и прямой индекс термов"""
+    folder: str
+    name: str
+    size: int
+    mtime: float
+    length: int = 0
+    terms: Dict[str, List[int]] = field(default_factory=dict)
+
+
+class SearchIndex:
+    """Инвертированный индекс текстовых файлов workspace"""
+
+    def __init__(self, workspace_root: str, index_file: str, logger=None, save_interval: float = 5.0,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE):
+        self.workspace_root = os.path.abspath(workspace_root)
+        self.index_file = Path(index_file)
+        self.logger = logger
+        self.save_interval = save_interval
+        self.max_file_size = max_file_size
+
+        self._lock = threading.RLock()
+        # Разбор файлов выполняется вне _lock, но последовательно
+        self._flush_lock = threading.Lock()
+        self._docs: Dict[int, Document] = {}
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._total_length = 0
+        self._next_id = 1
+        # (папка, имя) -> новая запись индекса или None (файл удален)
+        self._pending: Dict[Tuple[str, str], Optional[FileMetadata]] = {}
+        self._in_flight = 0
+        self._dirty = False
+        self._last_save = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> "SearchIndex":
+        """Загрузка сохраненного индекса"""
+        if not self.index_file.exists():
+            return self
+
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') == SEARCH_VERSION:
+                with self._lock:
+                    for folder, name, size, mtime, terms in data.get('docs', []):
+                        self._add(Document(folder, name, size, mtime, sum(map(len, terms.values())), terms))
+        except (OSError, ValueError, TypeError) as e:
+            self._log('warning', f"Поисковый индекс поврежден, будет перестроен: {e}")
+            with self._lock:
+                self._docs, self._ids, self._postings = {}, {}, {}
+                self._sorted_terms, self._total_length = None, 0
+
+        return self
+
+    def attach(self, workspace_index):
+        """Подписка на события индекса workspace"""
+        workspace_index.subscribe(self._on_change)
+
+    def _on_change(self, old: Optional[FileMetadata], new: Optional[FileMetadata]):
+        """Постановка измененного файла в очередь (разбор - позже)"""
+        entry = new or old
+        with self._lock:
+            self._pending[(entry.folder, entry.name)] = new
+
+    def sync(self, workspace_index) -> int:
+        """
+        Сверка с индексом workspace по размеру и mtime файлов: измененные,
+        новые и удаленные файлы ставятся в очередь. Возвращает их число.
+        """
+        seen = set()
+        changed = {}
+        with self._lock:
+            for folder in workspace_index.folders():
+                for entry in workspace_index.iter_folder(folder):
+                    key = (folder, entry.name)
+                    seen.add(key)
+                    doc_id = self._ids.get(key)
+                    doc = self._docs[doc_id] if doc_id is not None else None
+                    if doc is None or doc.size != entry.size or doc.mtime != entry.mtime:
+                        changed[key] = entry
+            for key in self._ids:
+                if key not in seen:
+                    changed[key] = None
+            self._pending.update(changed)
+        return len(changed)
+
+    def start_sync(self, workspace_index, interval: float = 300.0):
+        """Фоновый разбор очереди при запуске, затем пересканирование раз в interval (0 - только разбор)"""
+        if self._thread is not None:
+            return
+
+        def worker():
+            try:
+                self.flush()
+            except Exception as e:
+                self._log('error', f"Ошибка построения поискового индекса: {e}")
+
+            while interval > 0 and not self._stop.wait(interval):
+                try:
+                    workspace_index.refresh(deep=True)
+                    self.sync(workspace_index)
+                    self.flush()
+                except Exception as e:
+                    self._log('error', f"Ошибка обновления поискового индекса: {e}")
+
+        self._thread = threading.Thread(target=worker, name="search-sync", daemon=True)
+        self._thread.start()
+
+    def pending(self) -> int:
+        """Число файлов в очереди на разбор (включая разбираемые сейчас)"""
+        return len(self._pending) + self._in_flight
+
+    def flush(self, wait: bool = True) -> int:
+        """Разбор файлов из очереди; возвращает их число (wait=False - не ждать идущий разбор)"""
+        if not self._flush_lock.acquire(blocking=wait):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            self._in_flight = len(pending)
+
+            for (folder, name), entry in pending.items():
+                doc = None
+                if entry is not None:
+                    doc = Document(folder, name, entry.size, entry.mtime)
+                    doc.terms = self._read_terms(doc)
+                    doc.length = sum(map(len, doc.terms.values()))
+
+                with self._lock:
+                    doc_id = self._ids.get((folder, name))
+                    if doc_id is not None:
+                        self._remove(doc_id)
+                    if doc is not None:
+                        self._add(doc)
+                    self._dirty = True
+                self._in_flight -= 1
+        finally:
+            self._in_flight = 0
+            self._flush_lock.release()
+
+        if pending and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        return len(pending)
+
+    def _read_terms(self, doc: Document) -> Dict[str, List[int]]:
+        """Термы имени и содержимого файла с позициями (бинарные и большие - только имя)"""
+        tokens = tokenize(doc.name)
+        text = self._read_text(os.path.join(self.workspace_root, doc.folder, doc.name), doc.size)
+        if text:
+            # Разрыв позиций: фраза не склеивается из имени и начала текста
+            tokens.append("")
+            tokens.extend(tokenize(text))
+
+        terms: Dict[str, List[int]] = {}
+        for position, term in enumerate(tokens):
+            if term:
+                terms.setdefault(term, []).append(position)
+        return terms
+
+    def _read_text(self, path: str, size: int) -> Optional[str]:
+        if size > self.max_file_size:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_size or b"\0" in data[:BINARY_PROBE]:
+            return None
+        try:
+            return data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return None
+
+    def _add(self, doc: Document):
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = doc
+        self._ids[(doc.folder, doc.name)] = doc_id
+        self._total_length += doc.length
+        for term, positions in doc.terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._sorted_terms = None
+            postings[doc_id] = positions
+
+    def _remove(self, doc_id: int):
+        doc = self._docs.pop(doc_id)
+        del self._ids[(doc.folder, doc.name)]
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def search(self, query: str, folders: Optional[Iterable[str]] = None,
+               limit: int = DEFAULT_LIMIT) -> List[SearchHit]:
+        """Поиск по файлам папок folders (None - по всем), лучшие limit результатов"""
+        # Пока фоновый поток строит индекс, поиск идет по уже разобранным файлам
+        self.flush(wait=False)
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+
+        allowed = set(folders) if folders is not None else None
+        with self._lock:
+            if not self._docs:
+                return []
+            scores: Optional[Dict[int, float]] = None
+            # Сначала самые редкие элементы: меньше кандидатов для остальных
+            for kind, terms in sorted(clauses, key=self._estimate):
+                matched = self._match(kind, terms, scores)
+                if scores is None:
+                    scores = {doc_id: score for doc_id, score in matched.items()
+                              if allowed is None or self._docs[doc_id].folder in allowed}
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in matched.items()}
+                if not scores:
+                    return []
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            hits = [SearchHit(self._docs[doc_id].folder, self._docs[doc_id].name, round(score, 4))
+                    for doc_id, score in best]
+
+        for hit in hits:
+            hit.snippet = self._snippet(hit, clauses)
+        return hits
+
+    def _estimate(self, clause: Tuple[str, List[str]]) -> int:
+        kind, terms = clause
+        if kind == PREFIX:
+            return sum(len(self._postings[term]) for term in self._prefix_terms(terms[0]))
+        return min(len(self._postings.get(term, ())) for term in terms)
+
+    def _match(self, kind: str, terms: List[str], candidates: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """Документы, подходящие под элемент запроса, с вкладом в оценку"""
+        if kind == PREFIX:
+            matched: Dict[int, float] = {}
+            for term in self._prefix_terms(terms[0]):
+                for doc_id, score in self._term_scores(term, candidates).items():
+                    matched[doc_id] = matched.get(doc_id, 0.0) + score
+            return matched
+
+        if kind == TERM:
+            return self._term_scores(terms[0], candidates)
+
+        # Фраза: все термы, позиции идут подряд
+        per_term = [self._term_scores(term, candidates) for term in terms]
+        common = set.intersection(*(set(scores) for scores in per_term))
+        matched = {}
+        for doc_id in common:
+            positions = [self._postings[term][doc_id] for term in terms]
+            following = [set(term_positions) for term_positions in positions[1:]]
+            if any(all(start + offset in following[offset - 1] for offset in range(1, len(terms)))
+                   for start in positions[0]):
+                matched[doc_id] = sum(scores[doc_id] for scores in per_term)
+        return matched
+
+    def _term_scores(self, term: str, candidates: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """BM25 терма по документам (только среди кандидатов, если они заданы)"""
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+
+        count = len(self._docs)
+        average = self._total_length / count or 1.0
+        idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+        docs = postings.keys() if candidates is None else (doc_id for doc_id in candidates if doc_id in postings)
+
+        scores = {}
+        for doc_id in docs:
+            frequency = len(postings[doc_id])
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._docs[doc_id].length / average)
+            scores[doc_id] = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """Термы с префиксом (по отсортированному списку термов)"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        for term in self._sorted_terms[bisect_left(self._sorted_terms, prefix):]:
+            if not term.startswith(prefix) or len(terms) >= MAX_PREFIX_TERMS:
+                break
+            terms.append(term)
+        return terms
+
+    def _snippet(self, hit: SearchHit, clauses: List[Tuple[str, List[str]]]) -> Optional[str]:
+        """Первая строка файла, содержащая слово запроса"""
+        exact = {term for kind, terms in clauses if kind != PREFIX for term in terms}
+        prefixes = tuple(terms[0] for kind, terms in clauses if kind == PREFIX)
+        try:
+            for number, line in enumerate(iter_lines(os.path.join(self.workspace_root, hit.folder, hit.name))):
+                if number >= SNIPPET_MAX_LINES:
+                    break
+                if any(term in exact or (prefixes and term.startswith(prefixes)) for term in tokenize(line)):
+                    line = line.strip()
+                    return line if len(line) <= SNIPPET_LENGTH else line[:SNIPPET_LENGTH - 1] + "…"
+        except (OSError, UnicodeDecodeError):
+            pass
+        return None
+
+    def save(self):
+        """Сохранение индекса на диск (атомарная замена файла)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            docs = [[doc.folder, doc.name, doc.size, doc.mtime, doc.terms] for doc in self._docs.values()]
+            data = json.dumps({'version': SEARCH_VERSION, 'docs': docs}, ensure_ascii=False, separators=(',', ':'))
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            atomic_write(str(self.index_file), data, durability=DURABILITY_NONE)
+        except OSError as e:
+            self._dirty = True
+            self._log('error', f"Ошибка сохранения поискового индекса: {e}")
+
+    def close(self):
+        """Остановка фонового обновления и сохранение индекса"""
+        self._stop.set()
+        self.save()
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+
+def open_search_index(config_manager, workspace_index, logger=None) -> Optional[SearchIndex]:
+    """Поисковый индекс по настройкам system.search (None, если выключен)"""
+    config = config_manager.get_search_config()
+    if not config['enabled']:
+        return None
+
+    search = SearchIndex(config_manager.get_workspace_root(), config['index_file'], logger,
+                         max_file_size=config['max_file_size']).load()
+    search.attach(workspace_index)
+    search.sync(workspace_index)
+    search.start_sync(workspace_index, config['sync_interval'])
+    return search
@@ -0,0 +1,335 @@
+"""
+Индекс метаданных файлов рабочей директории
+
+Индекс строится один раз, сохраняется на диск и дальше обновляется
+инкрементально: операциями FileOperations и пересканированием только тех
+папок, у которых изменилось время модификации каталога.
+
+Ограничение: время модификации каталога меняется только при создании,
+удалении и переименовании файлов. Правка существующего файла в обход
+системы (другим процессом, на месте) обычным refresh() не обнаруживается:
+размер и время такого файла в индексе обновит только refresh(deep=True),
+который выполняют фоновые сверки поиска (search.sync_interval) и
+статистики (stats_reconcile_interval).
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models import FileMetadata
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+INDEX_VERSION = 1
+
+
+class WorkspaceIndex:
+    """Индекс файлов workspace: имя, папка, размер, время изменения, владелец"""
+
+    def __init__(self, workspace_root: str, index_file: str, logger=None, save_interval: float = 5.0):
+        self.workspace_root = os.path.abspath(workspace_root)
+        self.index_file = Path(index_file)
+        self.logger = logger
+        self.save_interval = save_interval
+
+        self._lock = threading.RLock()
+        self._folders: Dict[str, Dict[str, FileMetadata]] = {}
+        self._folder_mtimes: Dict[str, int] = {}
+        # Упорядоченные снимки папок для постраничного вывода: (папка, ключ) -> (ключи, записи)
+        self._sorted: Dict[Tuple[str, str], Tuple[list, list]] = {}
+        self._listeners: List[Callable] = []
+        self._dirty = False
+        self._last_save = 0.0
+
+    def load(self) -> "WorkspaceIndex":
+        """Загрузка сохраненного индекса и досканирование изменившихся папок"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if data.get('version') == INDEX_VERSION:
+                    self._restore(data)
+            except (OSError, ValueError) as e:
+                self._log('warning', f"Индекс workspace поврежден, будет перестроен: {e}")
+                self._folders.clear()
+                self._folder_mtimes.clear()
+
+        self.refresh()
+        self.save(force=True)
+        return self
+
+    def _restore(self, data: dict):
+        """Восстановление индекса из сохраненного словаря"""
+        for folder, folder_data in data.get('folders', {}).items():
+            files = {}
+            for name, size, mtime, owner in folder_data.get('files', []):
+                files[name] = FileMetadata(name=name, folder=folder, size=size, mtime=mtime, owner=owner)
+            self._folders[folder] = files
+            self._folder_mtimes[folder] = folder_data.get('mtime_ns', 0)
+
+    def subscribe(self, callback: Callable[[Optional[FileMetadata], Optional[FileMetadata]], None]):
+        """Подписка на изменения индекса: callback(старая запись, новая запись)"""
+        self._listeners.append(callback)
+
+    def _notify(self, old: Optional[FileMetadata], new: Optional[FileMetadata]):
+        """Оповещение подписчиков об изменении записи"""
+        for callback in self._listeners:
+            try:
+                callback(old, new)
+            except Exception as e:
+                self._log('error', f"Ошибка обработчика индекса: {e}")
+
+    def refresh(self, folders: Optional[Iterable[str]] = None, deep: bool = False) -> int:
+        """
+        Пересканирование папок, у которых изменилось время модификации.
+        deep=True дополнительно проверяет размер и время каждого файла
+        (нужно, чтобы увидеть правки файлов на месте в обход системы).
+        Возвращает количество пересканированных папок.
+        """
+        if folders is None:
+            folders = self._scan_top_folders()
+
+        rescanned = 0
+        for folder in folders:
+            folder_path = os.path.join(self.workspace_root, folder)
+            try:
+                mtime_ns = os.stat(folder_path).st_mtime_ns
+            except FileNotFoundError:
+                if folder in self._folders:
+                    self._drop_folder(folder)
+                    rescanned += 1
+                continue
+
+            if deep or self._folder_mtimes.get(folder) != mtime_ns or folder not in self._folders:
+                self.rescan_folder(folder, mtime_ns)
+                rescanned += 1
+
+        return rescanned
+
+    def _scan_top_folders(self) -> List[str]:
+        """Папки верхнего уровня workspace (в т.ч. удаленные с диска)"""
+        folders = set(self._folders)
+        try:
+            with os.scandir(self.workspace_root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        folders.add(entry.name)
+        except FileNotFoundError:
+            pass
+        return sorted(folders)
+
+    def rescan_folder(self, folder: str, mtime_ns: Optional[int] = None):
+        """Полное пересканирование одной папки"""
+        folder_path = os.path.join(self.workspace_root, folder)
+        scanned = {}
+
+        try:
+            if mtime_ns is None:
+                mtime_ns = os.stat(folder_path).st_mtime_ns
+
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    # Скрытые файлы (в т.ч. временные файлы атомарной записи) не индексируются
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    scanned[entry.name] = (stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            self._drop_folder(folder)
+            return
+        except PermissionError:
+            self._log('warning', f"Нет доступа к папке: {folder_path}")
+            return
+
+        with self._lock:
+            old_files = self._folders.get(folder, {})
+            new_files = {}
+            default_owner = self._default_owner(folder)
+
+            changed = False
+            for name, (size, mtime) in scanned.items():
+                old = old_files.get(name)
+                if old is not None and old.size == size and old.mtime == mtime:
+                    new_files[name] = old
+                    continue
+
+                owner = old.owner if old is not None else default_owner
+                new = FileMetadata(name=name, folder=folder, size=size, mtime=mtime, owner=owner)
+                new_files[name] = new
+                changed = True
+                self._notify(old, new)
+
+            for name, old in old_files.items():
+                if name not in new_files:
+                    changed = True
+                    self._notify(old, None)
+
+            if changed:
+                self._drop_sorted(folder)
+
+            # Подмена словаря целиком: читатели не видят частично собранную папку
+            self._folders[folder] = new_files
+            self._folder_mtimes[folder] = mtime_ns
+            self._dirty = True
+
+    def _drop_folder(self, folder: str):
+        """Удаление исчезнувшей папки из индекса"""
+        with self._lock:
+            for old in self._folders.pop(folder, {}).values():
+                self._notify(old, None)
+            self._drop_sorted(folder)
+            self._folder_mtimes.pop(folder, None)
+            self._dirty = True
+
+    def _split_path(self, filepath: str) -> Optional[tuple]:
+        """Разбор пути на (папка, имя файла) относительно workspace"""
+        rel_path = os.path.relpath(os.path.abspath(filepath), self.workspace_root)
+        parts = rel_path.split(os.sep)
+        if len(parts) != 2 or parts[0] in (os.curdir, os.pardir) or parts[1].startswith('.'):
+            # Индексируются только файлы непосредственно в папках workspace
+            return None
+        return parts[0], parts[1]
+
+    @staticmethod
+    def _default_owner(folder: str) -> Optional[str]:
+        """Владелец по умолчанию: хозяин личной папки"""
+        if folder.startswith("user_"):
+            return folder[len("user_"):]
+        return None
+
+    def update_file(self, filepath: str, owner: Optional[str] = None) -> Optional[FileMetadata]:
+        """Обновление записи после создания или изменения файла"""
+        location = self._split_path(filepath)
+        if location is None:
+            return None
+        folder, name = location
+
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            self.remove_file(filepath)
+            return None
+
+        with self._lock:
+            files = self._folders.setdefault(folder, {})
+            old = files.get(name)
+            # Владелец сохраняется при изменении; автор записи становится
+            # владельцем только нового файла вне личных папок
+            owner = (old.owner if old is not None else None) or self._default_owner(folder) or owner
+
+            new = FileMetadata(name=name, folder=folder, size=stat.st_size, mtime=stat.st_mtime, owner=owner)
+            files[name] = new
+            self._drop_sorted(folder)
+            self._touch_folder(folder)
+            self._notify(old, new)
+
+        self._maybe_save()
+        return new
+
+    def remove_file(self, filepath: str):
+        """Удаление записи после удаления файла"""
+        location = self._split_path(filepath)
+        if location is None:
+            return
+        folder, name = location
+
+        with self._lock:
+            old = self._folders.get(folder, {}).pop(name, None)
+            if old is None:
+                return
+            self._drop_sorted(folder)
+            self._touch_folder(folder)
+            self._notify(old, None)
+
+        self._maybe_save()
+
+    def _touch_folder(self, folder: str):
+        """Запоминаем новое время модификации папки, чтобы не пересканировать ее"""
+        try:
+            self._folder_mtimes[folder] = os.stat(os.path.join(self.workspace_root, folder)).st_mtime_ns
+        except FileNotFoundError:
+            self._folder_mtimes.pop(folder, None)
+        self._dirty = True
+
+    def list_folder(self, folder: str) -> List[FileMetadata]:
+        """Файлы папки из памяти"""
+        return list(self._folders.get(folder, {}).values())
+
+    def iter_folder(self, folder: str) -> Iterator[FileMetadata]:
+        """Обход файлов папки без построения списка словарей"""
+        # Снимок ссылок защищает обход от параллельных изменений папки
+        yield from tuple(self._folders.get(folder, {}).values())
+
+    def sorted_folder(self, folder: str, sort_by: str,
+                      key: Callable[[FileMetadata], tuple]) -> Tuple[list, List[FileMetadata]]:
+        """
+        Записи папки, упорядоченные по ключу, и список их ключей (для bisect).
+        Снимок строится при первом запросе и сбрасывается при изменении папки;
+        выданные списки не изменяются, поэтому их можно обходить без блокировки.
+        """
+        with self._lock:
+            cached = self._sorted.get((folder, sort_by))
+            if cached is None:
+                entries = sorted(self._folders.get(folder, {}).values(), key=key)
+                cached = ([key(entry) for entry in entries], entries)
+                self._sorted[(folder, sort_by)] = cached
+            return cached
+
+    def _drop_sorted(self, folder: str):
+        """Сброс упорядоченных снимков измененной папки"""
+        for cache_key in [cache_key for cache_key in self._sorted if cache_key[0] == folder]:
+            del self._sorted[cache_key]
+
+    def count(self, folder: str) -> int:
+        """Количество файлов в папке"""
+        return len(self._folders.get(folder, {}))
+
+    def get(self, folder: str, name: str) -> Optional[FileMetadata]:
+        """Запись о файле"""
+        return self._folders.get(folder, {}).get(name)
+
+    def folders(self) -> List[str]:
+        """Проиндексированные папки"""
+        return list(self._folders)
+
+    def _maybe_save(self):
+        """Отложенное сохранение: не чаще одного раза в save_interval секунд"""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self, force: bool = False):
+        """Сохранение индекса на диск (атомарная замена файла)"""
+        with self._lock:
+            if not (self._dirty or force):
+                return
+
+            data = {
+                'version': INDEX_VERSION,
+                'folders': {
+                    folder: {
+                        'mtime_ns': self._folder_mtimes.get(folder, 0),
+                        'files': [[m.name, m.size, m.mtime, m.owner] for m in files.values()]
+                    }
+                    for folder, files in self._folders.items()
+                }
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            atomic_write(str(self.index_file), json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+                         durability=DURABILITY_NONE)
+        except OSError as e:
+            self._dirty = True
+            self._log('error', f"Ошибка сохранения индекса workspace: {e}")
+
+    def close(self):
+        """Сохранение несохраненных изменений"""
+        self.save()
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
@@ -0,0 +1,199 @@
+"""
+Статистика рабочей директории
+
+Счетчики по папкам и пользователям (число файлов, объем, время последнего
+изменения) ведутся инкрементально по событиям индекса workspace и
+сохраняются между запусками, поэтому экран информации не обходит диск.
+"""
+
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from core.models import FileMetadata
+from utils.file_streams import DURABILITY_NONE, atomic_write
+
+STATS_VERSION = 1
+
+
+@dataclass
+class StatsCounter:
+    """Счетчики группы файлов"""
+    files: int = 0
+    bytes: int = 0
+    last_modified: float = 0.0
+
+    def add(self, entry: FileMetadata):
+        self.files += 1
+        self.bytes += entry.size
+        self.last_modified = max(self.last_modified, entry.mtime)
+
+    def remove(self, entry: FileMetadata, when: float):
+        self.files -= 1
+        self.bytes -= entry.size
+        self.last_modified = max(self.last_modified, when)
+
+
+class WorkspaceStats:
+    """Статистика workspace по папкам и пользователям"""
+
+    def __init__(self, stats_file: str, logger=None, save_interval: float = 5.0):
+        self.stats_file = Path(stats_file)
+        self.logger = logger
+        self.save_interval = save_interval
+
+        self._lock = threading.RLock()
+        self.folders: Dict[str, StatsCounter] = {}
+        self.users: Dict[str, StatsCounter] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> "WorkspaceStats":
+        """Загрузка сохраненных счетчиков"""
+        if not self.stats_file.exists():
+            return self
+
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') == STATS_VERSION:
+                self.folders = {name: StatsCounter(*values) for name, values in data.get('folders', {}).items()}
+                self.users = {name: StatsCounter(*values) for name, values in data.get('users', {}).items()}
+        except (OSError, ValueError, TypeError) as e:
+            self._log('warning', f"Файл статистики поврежден, будет пересчитан: {e}")
+            self.folders, self.users = {}, {}
+
+        return self
+
+    def attach(self, workspace_index):
+        """Подписка на события индекса (до его загрузки, чтобы учесть досканирование)"""
+        workspace_index.subscribe(self._on_change)
+
+    def verify(self, workspace_index):
+        """Сверка числа файлов с индексом; при расхождении - пересчет"""
+        consistent = (
+            set(name for name, counter in self.folders.items() if counter.files) ==
+            set(folder for folder in workspace_index.folders() if workspace_index.count(folder)) and
+            all(counter.files == workspace_index.count(name) for name, counter in self.folders.items())
+        )
+        if not consistent:
+            self.reconcile(workspace_index)
+
+    def _on_change(self, old: Optional[FileMetadata], new: Optional[FileMetadata]):
+        """Инкрементальное обновление счетчиков по событию индекса"""
+        now = time.time()
+        with self._lock:
+            if old is not None:
+                self.folders.setdefault(old.folder, StatsCounter()).remove(old, now)
+                if old.owner:
+                    self.users.setdefault(old.owner, StatsCounter()).remove(old, now)
+            if new is not None:
+                self.folders.setdefault(new.folder, StatsCounter()).add(new)
+                if new.owner:
+                    self.users.setdefault(new.owner, StatsCounter()).add(new)
+            self._dirty = True
+
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def reconcile(self, workspace_index):
+        """Полный пересчет счетчиков по содержимому индекса (без обращения к диску)"""
+        folders: Dict[str, StatsCounter] = {}
+        users: Dict[str, StatsCounter] = {}
+
+        for folder in workspace_index.folders():
+            for entry in workspace_index.iter_folder(folder):
+                folders.setdefault(folder, StatsCounter()).add(entry)
+                if entry.owner:
+                    users.setdefault(entry.owner, StatsCounter()).add(entry)
+
+        with self._lock:
+            self.folders, self.users = folders, users
+            self._dirty = True
+
+        self._log('info', f"Статистика workspace пересчитана: {self.total().files} файлов")
+        self.save()
+
+    def start_reconciliation(self, workspace_index, interval: float = 300.0):
+        """Фоновая сверка: глубокое пересканирование индекса и пересчет счетчиков (interval <= 0 - выключена)"""
+        if self._thread is not None or interval <= 0:
+            return
+
+        def worker():
+            while not self._stop.wait(interval):
+                try:
+                    workspace_index.refresh(deep=True)
+                    self.reconcile(workspace_index)
+                except Exception as e:
+                    self._log('error', f"Ошибка сверки статистики: {e}")
+
+        self._thread = threading.Thread(target=worker, name="stats-reconcile", daemon=True)
+        self._thread.start()
+
+    def total(self, folders: Optional[Iterable[str]] = None) -> StatsCounter:
+        """Итог по всему workspace или по указанным папкам"""
+        total = StatsCounter()
+        with self._lock:
+            counters = self.folders.values() if folders is None else (
+                self.folders[name] for name in set(folders) if name in self.folders)
+            for counter in counters:
+                total.files += counter.files
+                total.bytes += counter.bytes
+                total.last_modified = max(total.last_modified, counter.last_modified)
+        return total
+
+    def to_dict(self, folders: Optional[Iterable[str]] = None, users: Optional[Iterable[str]] = None) -> dict:
+        """Статистика в виде словаря для экспорта (None - все папки / все пользователи)"""
+        folders = None if folders is None else set(folders)
+        users = None if users is None else set(users)
+        with self._lock:
+            return {
+                'generated_at': datetime.now().isoformat(),
+                'total': asdict(self.total(folders)),
+                'folders': {name: asdict(counter) for name, counter in sorted(self.folders.items())
+                            if counter.files and (folders is None or name in folders)},
+                'users': {name: asdict(counter) for name, counter in sorted(self.users.items())
+                          if counter.files and (users is None or name in users)}
+            }
+
+    def export_json(self, filepath: str, folders: Optional[Iterable[str]] = None,
+                    users: Optional[Iterable[str]] = None) -> str:
+        """Экспорт статистики в JSON файл"""
+        atomic_write(filepath, json.dumps(self.to_dict(folders, users), ensure_ascii=False, indent=2))
+        return filepath
+
+    def save(self):
+        """Сохранение счетчиков на диск (атомарная замена файла)"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            data = {
+                'version': STATS_VERSION,
+                'folders': {name: [c.files, c.bytes, c.last_modified] for name, c in self.folders.items()},
+                'users': {name: [c.files, c.bytes, c.last_modified] for name, c in self.users.items()}
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            atomic_write(str(self.stats_file), json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+                         durability=DURABILITY_NONE)
+        except OSError as e:
+            self._dirty = True
+            self._log('error', f"Ошибка сохранения статистики: {e}")
+
+    def close(self):
+        """Остановка фоновой сверки и сохранение счетчиков"""
+        self._stop.set()
+        self.save()
+
+    def _log(self, level: str, message: str):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)